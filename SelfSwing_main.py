@@ -8,6 +8,8 @@
 # Each entry in there is of type "Ongoing", child-classes for the different types
 
 
+import os
+
 import pygame
 from pygame.locals import *
 
@@ -26,10 +28,44 @@ import balls
 
 import ongoing
 
+from frametiming import frame_timer, FrameOverlay
+import eventlog
+import profiling
+
 
 # used to ensure max number of ticks calculated per second
 FrameLimiter = pygame.time.Clock()
 
+# shows the frame timing per stage, toggled with F3
+overlay = FrameOverlay(frame_timer)
+overlay_visible = False
+
+# opt-in Chrome trace of ticks, events and draws, see tracing.py
+if os.environ.get("SWING_TRACE"):
+    import atexit
+    import tracing
+    atexit.register(tracing.start(os.environ["SWING_TRACE"]).close)
+
+# Prometheus text endpoint of the engine metrics, see metrics.py
+if os.environ.get("SWING_METRICS_PORT"):
+    import metrics
+    metrics.serve(int(os.environ["SWING_METRICS_PORT"]))
+
+# memory time series, see memprofile.py
+memory_monitor = None
+if os.environ.get("SWING_MEMPROFILE"):
+    import atexit
+    import memprofile
+    memory_monitor = memprofile.MemoryMonitor(
+        os.environ["SWING_MEMPROFILE"], float(os.environ.get("SWING_MEMPROFILE_INTERVAL", 60)))
+    memory_monitor.start()
+    atexit.register(memory_monitor.stop)
+
+# cProfile capture, started and stopped with F4
+profile_capture = profiling.ProfileCapture()
+# reports frames slower than SWING_WATCHDOG_MS milliseconds, off if not set
+watchdog = None
+
 
 def main():
 
@@ -54,18 +90,25 @@ def main():
     #ongoing.ball_falls(balls.Bomb(), 1)
     
     
+    import atexit
+    global watchdog
+    if os.environ.get("SWING_WATCHDOG_MS"):
+        watchdog = profiling.SlowFrameWatchdog(float(os.environ["SWING_WATCHDOG_MS"]) / 1000)
+        atexit.register(watchdog.stop)
+    # a profile still running when the game is closed is written, too
+    atexit.register(stop_profile)
+
     # Event Loop
     while 1:
+        if watchdog is not None:
+            watchdog.frame_started()
+        frame_timer.begin_frame()
         ### Step 1, process user input
         process_user_input()
+        frame_timer.mark("input")
         
-        ### Step 1.5, auto-drop if no balls are Falling/Thrown atm
-        if  not game.ongoing.event_type_exists(game.ongoing.FallingBall) and (
-            not game.ongoing.event_type_exists(game.ongoing.ThrownBall)):
-            game.drop_ball()
-
-        ## Step 2, proceed ongoing Events
-        game.tick()
+        ### Step 1.5 and 2, auto-drop and proceed ongoing Events
+        update_game()
         
         
         ### Step 2.5, check if the game ended
@@ -77,17 +120,40 @@ def main():
         
         ### Step 3, update screen where necessary. TODO make this only one call, game.draw()
         game.depot.draw_if_changed(screen)
+        frame_timer.mark("draw.depot")
         game.crane.draw_if_changed(screen)
+        frame_timer.mark("draw.crane")
         game.playfield.draw_if_changed(screen)
+        frame_timer.mark("draw.playfield")
         game.score_area.draw_if_changed(screen)
+        frame_timer.mark("draw.score_area")
+        if overlay_visible:
+            overlay.draw(screen, game.ongoing.get_number_of_events())
+            frame_timer.mark("draw.overlay")
         
         # reveal new-drawn frame
         pygame.display.flip()
+        frame_timer.mark("display.flip")
+        if watchdog is not None:
+            report = watchdog.frame_finished()
+            if report:
+                eventlog.warning("slow_frame", path=report)
+        if memory_monitor is not None:
+            memory_monitor.maybe_sample()
         
         
         # make sure the loop doesn't cycle faster than the FPS limit
         FrameLimiter.tick(max_FPS)
 
+def update_game():
+    """The game mechanics of one frame: auto-drop if no balls are Falling/Thrown atm, then
+    game.tick(). The stages are marked for the frame timer"""
+    if  not game.ongoing.event_type_exists(game.ongoing.FallingBall) and (
+        not game.ongoing.event_type_exists(game.ongoing.ThrownBall)):
+        game.drop_ball()
+    frame_timer.mark("auto_drop")
+    game.tick(frame_timer.mark)
+
 def finish_game(finalscore: int):
     import constants
     finalscore_pixelpos = (constants.scoredisplayarea_position_x, 50)
@@ -107,6 +173,27 @@ def finish_game(finalscore: int):
 
 
 
+def stop_profile():
+    """Stops the F4 profile if it is running and writes it"""
+    if profile_capture.running():
+        eventlog.info("profile", running=False, path=profile_capture.stop())
+
+
+def toggle_overlay():
+    """Shows or hides the frame timing overlay. Timing is collected while it is shown"""
+    global overlay_visible
+    overlay_visible = not overlay_visible
+    if overlay_visible:
+        frame_timer.reset()
+        frame_timer.enable()
+    else:
+        frame_timer.disable()
+        # paint over the overlay
+        screen.fill((217,217,217))
+        for part in (game.depot, game.crane, game.playfield, game.score_area):
+            part.changed()
+
+
 def process_user_input():
     for event in pygame.event.get():
             
@@ -132,6 +219,14 @@ def process_user_input():
                 balls.force_special("C")
             if event.key == K_h:
                 balls.force_special("H")
+            if event.key == K_F3:
+                toggle_overlay()
+            if event.key == K_F4:
+                if profile_capture.running():
+                    stop_profile()
+                else:
+                    profile_capture.start()
+                    eventlog.info("profile", running=True)
 
 
 
@@ -13,6 +13,7 @@ from typing import Tuple
 import colorschemes
 import pygame
 import random
+import metrics
 from constants import ball_size, pixel_coord_in_playfield
 from abc import ABC, abstractmethod
 
@@ -21,11 +22,24 @@ ball_colors = colorschemes.simple_standard_ball_colors
 text_colors = colorschemes.simple_standard_text_colors
 ballfont = pygame.font.SysFont("monospace", 24)
 
+# loaded images, by filename. Every Ball of a kind shares the same pygame.Surface
+_image_cache = {}
+
+def load_image(filename: str):
+    """Loads an image on first use, later calls return the same pygame.Surface"""
+    image = _image_cache.get(filename)
+    if image is None:
+        image = pygame.image.load(filename)
+        _image_cache[filename] = image
+    return image
+
 
 class PlayfieldSpace(ABC):
     """Abstract Base Class for a position in the playfield. It can either be a ball 
     (whatever kind) or an EmptySpace or BlockedSpace. (BlockedSpace means, blocked by 
     seesaw). Must have draw(), getweight() and getcolor() methods."""
+
+    __slots__ = ()
     
     @abstractmethod
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
@@ -49,10 +63,16 @@ class PlayfieldSpace(ABC):
         return False
 
 class EmptySpace(PlayfieldSpace):
-    """Dummy class for places where there is no Ball. Empty Constructor."""
+    """Dummy class for places where there is no Ball. Empty Constructor. There is
+    only one EmptySpace, every call of the constructor returns the same object."""
 
-    def __init__(self):
-        pass
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
         pass
@@ -70,10 +90,16 @@ class EmptySpace(PlayfieldSpace):
         return False
 
 class BlockedSpace(PlayfieldSpace):
-    """Dummy class for positions blocked by the seesaw state"""
+    """Dummy class for positions blocked by the seesaw state. Like EmptySpace,
+    there is only one BlockedSpace."""
 
-    def __init__(self):
-        pass
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
         # just a black rectangle for now
@@ -95,6 +121,8 @@ class Ball(PlayfieldSpace):
     """Abstract class indicating that in this space is a ball. Can be either a ColoredBall 
     or a SpecialBall."""
 
+    __slots__ = ()
+
     @abstractmethod
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
         pass
@@ -132,6 +160,8 @@ class ColoredBall(Ball):
     """Child-class of Ball. Has a color (int, 1 <= color <= maxcolors)
     and a weight (int, 0 or greater). Constructor is Colored_Ball(color, weight)."""
 
+    __slots__ = ("color", "weight", "scoring")
+
     def __init__(self, color: int, weight: int):
         self.color = color
         self.weight = weight
@@ -188,11 +218,19 @@ class ColoredBall(Ball):
 
 class SpecialBall(Ball):
     """abstract class. Must be instanciated as one of the SpecialBall types. These all have weight==0.
-    Must implement draw(surf, drawpos) and land_on_bottom(coords) and land_on_ball(coords)."""
+    Must implement draw(surf, drawpos) and land_on_bottom(coords) and land_on_ball(coords).
+    The image is shared by all Balls of a kind, subclasses only name the file in imagefile."""
+
+    __slots__ = ()
+    imagefile = None
 
     @abstractmethod
     def __init__(self):
         pass
+
+    @property
+    def image(self):
+        return load_image(self.imagefile)
     
     def getweight(self):
         return 0
@@ -203,7 +241,6 @@ class SpecialBall(Ball):
     @abstractmethod
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
         surf.blit(self.image, drawpos)
-        # somehow make sure that self.image exists. @property decorator?
 
     @abstractmethod
     def landing_effect_on_ground(self, coords: Tuple[int]):
@@ -235,10 +272,12 @@ class Bomb(SpecialBall):
     """Special Ball. If landing on a Ball, it explodes a 3x3 area. If landing on a BlockedSpace, it
     just lies around, but explodes once any Ball lands on it or a neighboring Bomb explodes."""
 
+    __slots__ = ()
     level_required = 4
+    imagefile = "specials/Bombe-selbstgemalt.png"
 
     def __init__(self):
-        self.image = pygame.image.load("specials/bombe-selbstgemalt.png")
+        pass
 
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
         super().draw(surf, drawpos)
@@ -250,29 +289,10 @@ class Bomb(SpecialBall):
         self.explode(coords)
 
     def explode(self, coords: Tuple[int]):
+        """Explode this Bomb lying at coords, including any chain reaction. Refreshes the status."""
         import game
-        the_playfield = game.playfield
-        # TODO in 3x3 area: Display explosion sprite (ongoing), explode bombs, remove other balls
-        xcenter,ycenter = coords
-        xcenter = int(xcenter)
-        ycenter = int(ycenter)
-
-        game.ongoing.draw_explosion(coords)
-        the_playfield.remove_ball_at(coords)
-
-        for x in range(xcenter-1, xcenter+2):
-            if x < 0 or xcenter > 7:
-                continue
-            for y in range(ycenter-1, ycenter+2):
-                if y < 0 or y > 7:
-                    continue
-                ball_there = the_playfield.get_ball_at((x,y))
-                if isinstance(ball_there, Bomb):
-                    ball_there.explode((x,y))
-                elif isinstance(ball_there, Ball):
-                    the_playfield.remove_ball_at((x,y))
-
-        the_playfield.refresh_status()
+        game.playfield.trigger_explosion(coords)
+        game.playfield.refresh_status()
     
     def matches_color(self, ball: Ball):
         return False
@@ -289,10 +309,12 @@ class Cutter(SpecialBall):
     """Special Ball. Destroys the stack it lands on. Once hitting the BlockedSpace or
     height 0, it disappears."""
 
+    __slots__ = ()
     level_required = 5
+    imagefile = "specials/bohrer-selbstgemalt.png"
 
     def __init__(self):
-        self.image = pygame.image.load("specials/bohrer-selbstgemalt.png")
+        pass
     
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
         super().draw(surf, drawpos)
@@ -304,7 +326,7 @@ class Cutter(SpecialBall):
     def landing_effect_on_ball(self, coords: Tuple[int]):
         import game
         x,y = coords
-        game.playfield.remove_ball_at((x, y-1))
+        game.playfield.remove_ball_at((x, game.playfield.top_ball_height(x)))
         game.playfield.remove_ball_at(coords)
         game.ongoing.ball_falls_from_height(self, x, y)
     
@@ -316,17 +338,18 @@ class Cutter(SpecialBall):
 
     def lands_on_ball(self, coords: Tuple[int, int], ball_below: Ball):
         import game
-        game.playfield.remove_ball_at((coords[0], coords[1]-1))
+        game.playfield.remove_ball_at((coords[0], game.playfield.top_ball_height(coords[0])))
         game.ongoing.ball_falls_from_height(self, coords[0], coords[1])
 
 class Heart(SpecialBall):
     """No special effects. When Scoring, this will increase the global 
     score factor by 0.1*(number of Hearts scored)"""
 
+    __slots__ = ("scoring",)
     level_required = 4
+    imagefile = "specials/Herz-selbstgemalt.png"
 
     def __init__(self):
-        self.image = pygame.image.load("specials/Herz-selbstgemalt.png")
         self.scoring = False
     
     def draw(self, surf: pygame.Surface, drawpos: Tuple[int]):
@@ -355,6 +378,10 @@ class Heart(SpecialBall):
         import game
         return game.playfield.add_on_top(self, coords[0])
 
+# the one EmptySpace and BlockedSpace, see their constructors
+empty_space = EmptySpace()
+blocked_space = BlockedSpace()
+
 nextspecial = Bomb()
 nextspecial_delay = 5
 
@@ -389,6 +416,7 @@ def generate_ball():
     global nextspecial_delay
     if nextspecial_delay == 0:
         ret = nextspecial
+        metrics.specials_spawned.inc(type(ret).__name__)
         regenerate_nextspecial()
         return ret
     nextspecial_delay -= 1
@@ -421,4 +449,4 @@ def force_special(char):
     else:
         return
     nextspecial_delay = 1
-    
\ No newline at end of file
+    
@@ -0,0 +1 @@
+# empty file to make sure this is handled as a package
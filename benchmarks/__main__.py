@@ -0,0 +1,86 @@
+# command line of the benchmark suite, run python -m benchmarks from the main folder.
+# Prints the results as JSON, or writes them to the file given with --output.
+# --save-baseline stores the results as baseline of this machine, --compare runs the suite
+# and compares with that baseline. The exit code is 1 if any operation regressed.
+
+import argparse
+import json
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+from benchmarks import compare
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.suite import OPERATIONS, run_suite
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Times engine and renderer hot paths.")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="scenario to run, can be repeated. Default: all")
+    parser.add_argument("--operation", action="append", choices=list(OPERATIONS),
+                        help="operation to time, can be repeated. Default: all")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3, help="untimed runs before sampling")
+    parser.add_argument("--repetitions", type=int, default=30, help="samples per operation")
+    parser.add_argument("--output", help="write the JSON to this file instead of stdout")
+    # comparing right after saving would compare the run with itself
+    baseline_mode = parser.add_mutually_exclusive_group()
+    baseline_mode.add_argument("--save-baseline", action="store_true",
+                               help="store the results as baseline of this machine")
+    baseline_mode.add_argument("--compare", action="store_true",
+                               help="compare the results with the baseline of this machine")
+    parser.add_argument("--baseline", default=None,
+                        help="baseline file. Default: benchmarks/baselines/<machine>.json")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed relative slowdown of the median (default 0.1 = 10%%)")
+    parser.add_argument("--alpha", type=float, default=0.01,
+                        help="significance level of the Mann-Whitney U test")
+    return parser.parse_args(argv)
+
+
+def run_comparison(args, report):
+    """Prints one line per operation. Returns the exit code, 1 if anything regressed"""
+    path = args.baseline or compare.baseline_path()
+    try:
+        baseline = compare.load_baseline(path)
+    except FileNotFoundError:
+        print("No baseline at {}, run with --save-baseline first".format(path), file=sys.stderr)
+        return 2
+    comparisons = compare.compare(baseline, report, args.threshold, args.alpha)
+    for comparison in comparisons:
+        print(comparison.describe())
+    regressions = [c for c in comparisons if c.regressed]
+    print("{} of {} operations regressed against {}".format(
+        len(regressions), len(comparisons), path))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_suite(args.scenario, args.operation, args.seed, args.warmup, args.repetitions)
+    if args.save_baseline:
+        path = args.baseline or compare.baseline_path()
+        compare.save_baseline(report, path)
+        print("Baseline saved to {}".format(path))
+    if args.compare:
+        exit_code = run_comparison(args, report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=1)
+        return exit_code
+    if args.save_baseline and not args.output:
+        return 0
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# compares benchmark results with a stored baseline of the same machine. An operation has
+# regressed if its samples are significantly slower (Mann-Whitney U test) and its median is
+# slower by more than the threshold. Both conditions are needed: small but consistent
+# changes are ignored, as are big differences caused by a few noisy samples.
+
+# shorts:
+# - baseline_path(machine) default baseline file of a machine, in benchmarks/baselines/
+# - save_baseline(report, path) / load_baseline(path) store and read a suite report as JSON
+# - mann_whitney_u(a, b) two-sided p-value that a and b come from the same distribution
+# - compare(baseline, report, threshold, alpha) list of Comparisons of all shared operations
+
+import json
+import math
+import os
+import platform
+import re
+import statistics
+
+BASELINE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+class Comparison:
+    """Result of comparing one operation of one scenario with its baseline. Vars:
+        scenario, operation (str)
+        ratio (float), median now divided by median of the baseline. Above 1 is slower
+        p_value (float), two-sided p-value of the Mann-Whitney U test
+        regressed (bool), significantly slower by more than the threshold
+        improved (bool), significantly faster by more than the threshold
+    Constructor: Comparison(scenario, operation, ratio, p_value, regressed, improved)
+    """
+
+    __slots__ = ("scenario", "operation", "ratio", "p_value", "regressed", "improved")
+
+    def __init__(self, scenario: str, operation: str, ratio: float, p_value: float,
+                 regressed: bool, improved: bool):
+        self.scenario = scenario
+        self.operation = operation
+        self.ratio = ratio
+        self.p_value = p_value
+        self.regressed = regressed
+        self.improved = improved
+
+    def describe(self):
+        if self.regressed:
+            verdict = "REGRESSED"
+        elif self.improved:
+            verdict = "improved"
+        else:
+            verdict = "ok"
+        return "{:<14} {:<20} {:>+8.1%}  p={:.4f}  {}".format(
+            self.scenario, self.operation, self.ratio - 1, self.p_value, verdict)
+
+
+def baseline_path(machine: str = None):
+    """Default baseline file of the machine, named after its network name"""
+    if machine is None:
+        machine = platform.node() or "unknown"
+    return os.path.join(BASELINE_FOLDER, re.sub(r"[^\w.-]", "_", machine) + ".json")
+
+
+def save_baseline(report: dict, path: str):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def load_baseline(path: str):
+    """Reads a stored suite report. Raises FileNotFoundError if there is no baseline yet"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def mann_whitney_u(a: list, b: list):
+    """Two-sided p-value of the Mann-Whitney U test, normal approximation with tie
+    correction. Good enough from about 8 samples per side"""
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Both sample lists must contain values")
+    pooled = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+
+    # average ranks of tied values, and the tie correction term
+    rank_sum_a = 0.0
+    ties = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_sum_a += rank * sum(1 for k in range(i, j + 1) if pooled[k][1] == 0)
+        tied = j - i + 1
+        ties += tied ** 3 - tied
+        i = j + 1
+
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def compare(baseline: dict, report: dict, threshold: float = 0.1, alpha: float = 0.01):
+    """Compares every operation that is in both reports. threshold is the allowed relative
+    slowdown of the median, alpha the significance level. Returns a list of Comparisons"""
+    comparisons = []
+    for scenario, operations in report["results"].items():
+        old_operations = baseline["results"].get(scenario, {})
+        for operation, entry in operations.items():
+            if operation not in old_operations:
+                continue
+            old = old_operations[operation]["samples"]
+            new = entry["samples"]
+            ratio = statistics.median(new) / statistics.median(old)
+            p_value = mann_whitney_u(old, new)
+            significant = p_value < alpha
+            comparisons.append(Comparison(
+                scenario, operation, ratio, p_value,
+                regressed=significant and ratio > 1 + threshold,
+                improved=significant and ratio < 1 / (1 + threshold)))
+    return comparisons
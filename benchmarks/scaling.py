@@ -0,0 +1,114 @@
+# measures how the per-tick work of the game grows with the board size. On every board, a
+# seeded sequence of Balls is dropped over all columns until it is filled to about half its
+# height, and every game.tick() of that is timed: Balls fall, seesaws tilt, Balls are thrown
+# and Scorings run meanwhile. check_Scoring_full() and refresh_status() are timed on a board
+# filled to half its height that neither scores nor combines. The cost per cell should stay
+# roughly the same from the standard 4x8 board up to 16 seesaws x 16 rows.
+
+# shorts:
+# - run with python -m benchmarks.scaling from the main folder
+# - SIZES are (seesaws, rows) pairs, measure(seesaws, rows) times one board
+# - play(seesaws, rows) is the timed drop sequence, the same for every run of a size
+
+import random
+import sys
+import time
+import timeit
+
+sys.path.append("S:/SwingSelfmade/")
+
+import balls
+import constants
+import game
+import ongoing
+import playfield
+
+SIZES = [(4, 8), (4, 16), (8, 8), (8, 16), (16, 8), (16, 16)]
+REPEATS = 5
+NUMBER = 200
+SEED = 1
+# a Ball is dropped every DROP_EVERY ticks, so several fall at the same time
+DROP_EVERY = 8
+# after the last drop, the board gets this many ticks to settle
+SETTLE_TICKS = 300
+
+
+def make_board(seesaws: int, rows: int):
+    """Playfield of that size, every column filled to half its height. Neighbouring
+    columns and rows never share a color, and both sides of each seesaw weigh the same"""
+    board = playfield.Playfield(constants.playfieldsize, seesaws, rows)
+    for x in range(board.columns):
+        for y in range(rows // 2):
+            board.add_on_top(balls.ColoredBall((x + y) % 3 + 1, 1), x)
+    return board
+
+
+def best_time(func):
+    """Fastest of REPEATS runs, in microseconds per call"""
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEATS)) / NUMBER * 1e6
+
+
+def play(seesaws: int, rows: int):
+    """Drops columns*rows/2 seeded Balls on an empty board of that size, one every DROP_EVERY
+    ticks into the columns in turn, then lets it settle. Returns (seconds spent in
+    game.tick(), ticks, score)"""
+    random.seed(SEED)
+    game.reset()
+    balls.regenerate_nextspecial()
+    board = playfield.Playfield(constants.playfieldsize, seesaws, rows)
+    game.playfield = board
+    drops = board.columns * rows // 2
+    ticks = drops * DROP_EVERY + SETTLE_TICKS
+
+    seconds = 0.0
+    for tick in range(ticks):
+        if tick % DROP_EVERY == 0 and tick // DROP_EVERY < drops:
+            column = (tick // DROP_EVERY * 3) % board.columns
+            ongoing.drop_ball_in_column(balls.generate_ball(), column)
+        start = time.perf_counter()
+        game.tick()
+        seconds += time.perf_counter() - start
+    return seconds, ticks, game.score
+
+
+def measure(seesaws: int, rows: int):
+    """Returns (cells, tick, scoring check, refresh) for a board of that size,
+    the times in microseconds per call"""
+    runs = [play(seesaws, rows) for _ in range(REPEATS)]
+    seconds, ticks, score = min(runs)
+    if score == 0:
+        raise RuntimeError("Nothing scored on the benchmark board {}x{}".format(seesaws, rows))
+    tick = seconds / ticks * 1e6
+
+    ongoing.reset()
+    board = make_board(seesaws, rows)
+    game.playfield = board
+    board.refresh_status()
+    if ongoing.get_number_of_events() or board.any_seesaw_is_moving():
+        raise RuntimeError("Benchmark board {}x{} is not at rest".format(seesaws, rows))
+
+    cells = board.columns * rows
+    return (cells, tick, best_time(board.check_Scoring_full),
+            best_time(board.refresh_status))
+
+
+def main():
+    saved = game.playfield
+    print("{:>8} {:>5} {:>6} {:>10} {:>10} {:>10} {:>12}".format(
+        "seesaws", "rows", "cells", "tick us", "score us", "refresh us", "ns per cell"))
+    per_cell = []
+    try:
+        for seesaws, rows in SIZES:
+            cells, tick, scoring, refresh = measure(seesaws, rows)
+            per_cell.append((tick + scoring + refresh) * 1000 / cells)
+            print("{:>8} {:>5} {:>6} {:>10.2f} {:>10.2f} {:>10.2f} {:>12.1f}".format(
+                seesaws, rows, cells, tick, scoring, refresh, per_cell[-1]))
+    finally:
+        game.playfield = saved
+        game.reset()
+    print("cost per cell, largest board relative to smallest: {:.2f}".format(
+        per_cell[-1] / per_cell[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# provides reproducible game situations for the benchmarks. Every scenario is a function
+# scenario(seed) that puts the module globals (game.playfield, ongoing.eventQueue, ...) into
+# a fixed state. The same seed always gives the same board, the same falling Balls and the
+# same upcoming Balls of the depot.
+
+# shorts:
+# - SCENARIOS maps scenario names to their setup functions, in the order they are run
+# - start(seed) resets the game and seeds the random generators, the first step of every scenario
+# - fill_board(heights, ...) puts quiet stacks on the board: no Scoring, no Combining, no tilting
+
+import random
+
+import balls
+import constants
+import game
+import ongoing
+
+
+def start(seed: int, level: int = 4):
+    """Seeds the random generator, resets the game and sets the level"""
+    random.seed(seed)
+    game.reset()
+    balls.regenerate_nextspecial()
+    ongoing.headless = False
+    game.level = level
+    game.balls_dropped = 50 * (level - 4)
+
+
+def quiet_color(colors: list, x: int, below: list, rng: random.Random):
+    """Random color for the next Ball of column x that starts neither a horizontal three with
+    the two columns to the left nor a vertical run of combining_minimum"""
+    y = len(below)
+    forbidden = set()
+    if x >= 2 and y < len(colors[x - 1]) and y < len(colors[x - 2]):
+        if colors[x - 1][y] == colors[x - 2][y]:
+            forbidden.add(colors[x - 1][y])
+    run = below[-(constants.combining_minimum - 1):]
+    if len(run) == constants.combining_minimum - 1 and len(set(run)) == 1:
+        forbidden.add(run[0])
+    return rng.choice([c for c in range(1, game.level) if c not in forbidden])
+
+
+def fill_board(heights: list, rng: random.Random, special=None):
+    """Stacks heights[x] ColoredBalls on column x. Colors never score or combine. The top
+    Ball of the lighter side of each seesaw gets heavier until both sides weigh the same,
+    so nothing tilts. special(x, y) may return a Ball that replaces the ColoredBall there."""
+    the_playfield = game.playfield
+    colors = []
+    stacks = []
+    for x, height in enumerate(heights):
+        column = []
+        stack = []
+        for y in range(height):
+            color = quiet_color(colors, x, column, rng)
+            column.append(color)
+            ball = special(x, y) if special is not None else None
+            if ball is None:
+                ball = balls.ColoredBall(color, rng.randint(1, game.level))
+            stack.append(ball)
+        colors.append(column)
+        stacks.append(stack)
+
+    for left, right in zip(stacks[0::2], stacks[1::2]):
+        difference = sum(b.getweight() for b in left) - sum(b.getweight() for b in right)
+        lighter = right if difference > 0 else left
+        colored = [b for b in lighter if isinstance(b, balls.ColoredBall)]
+        if difference and colored:
+            colored[-1].setweight(colored[-1].getweight() + abs(difference))
+
+    for x, stack in enumerate(stacks):
+        for ball in stack:
+            the_playfield.add_on_top(ball, x)
+    the_playfield.changed()
+
+
+def empty(seed: int):
+    """Empty board at game start, the first Ball of the Crane is falling"""
+    start(seed)
+    game.drop_ball()
+
+
+def near_full(seed: int):
+    """Late level, every column one Ball short of losing, the next Ball is falling"""
+    start(seed, level=8)
+    rng = random.Random(seed)
+    fill_board([game.playfield.rows - 2] * game.playfield.columns, rng)
+    game.drop_ball()
+
+
+def bomb_chain(seed: int):
+    """Half-full board with a zigzag line of Bombs through all columns, just below the top.
+    A Bomb falls onto the first column and sets off the whole line"""
+    start(seed)
+    rng = random.Random(seed)
+    height = game.playfield.rows // 2
+
+    def bombs_in_line(x, y):
+        return balls.Bomb() if y == height - 1 - x % 2 else None
+
+    fill_board([height] * game.playfield.columns, rng, bombs_in_line)
+    ongoing.add_event(ongoing.FallingBall(balls.Bomb(), 0))
+
+
+def flyout(seed: int):
+    """Low stacks, a Ball is thrown from the right seesaw around the board several times"""
+    start(seed)
+    rng = random.Random(seed)
+    fill_board([2] * game.playfield.columns, rng)
+    columns = game.playfield.columns
+    ongoing.throw_ball(balls.ColoredBall(1, 1), (columns - 2, 3), 3 * columns + 5)
+
+
+def large_scoring(seed: int):
+    """Every column holds four Balls of the same color. A Scoring starts in the lowest row
+    and takes all of them"""
+    start(seed)
+    rng = random.Random(seed)
+    for x in range(0, game.playfield.columns, 2):
+        # same weights on both sides of the seesaw
+        for _ in range(constants.combining_minimum - 1):
+            weight = rng.randint(1, game.level)
+            game.playfield.add_on_top(balls.ColoredBall(1, weight), x)
+            game.playfield.add_on_top(balls.ColoredBall(1, weight), x + 1)
+    game.playfield.changed()
+    game.playfield.refresh_status()
+
+
+SCENARIOS = {
+    "empty": empty,
+    "near_full": near_full,
+    "bomb_chain": bomb_chain,
+    "flyout": flyout,
+    "large_scoring": large_scoring,
+}
@@ -0,0 +1,186 @@
+# times the hot paths of engine and renderer in the scenarios of benchmarks.scenarios.
+# Every sample starts from a freshly set up scenario, so samples are independent of each
+# other and of the order they are taken in. Only the operation itself is timed.
+
+# shorts:
+# - OPERATIONS maps operation names to prepare functions. prepare() is called on a fresh
+#   scenario and returns the function to time, or None if the operation does not apply there
+# - run_suite(...) returns all results as a dict that can be dumped as JSON
+# - summarize(samples) min, mean, percentiles and max of a list of durations
+
+import datetime
+import gc
+import math
+import platform
+import statistics
+import time
+
+import pygame
+
+import constants
+import game
+import ongoing
+from benchmarks.scenarios import SCENARIOS
+
+# game.tick() is timed in batches of this many ticks, the sample is the time per tick
+TICKS_PER_SAMPLE = 100
+
+
+def prepare_tick():
+    def run():
+        for _ in range(TICKS_PER_SAMPLE):
+            game.tick()
+    return run
+
+
+def prepare_refresh_status():
+    return game.playfield.refresh_status
+
+
+def prepare_check_scoring_full():
+    return game.playfield.check_Scoring_full
+
+
+def prepare_scoring_expand():
+    """The full expansion of the oldest Scoring, started first if the board has a Three"""
+    if not ongoing.event_type_exists(ongoing.Scoring):
+        game.playfield.check_Scoring_full()
+    if not ongoing.event_type_exists(ongoing.Scoring):
+        return None
+    scoring = ongoing.get_event_of_type(ongoing.Scoring)
+
+    def run():
+        while scoring.expand():
+            pass
+    return run
+
+
+def prepare_playfield_draw():
+    return game.playfield.draw
+
+
+def prepare_frame():
+    """Everything the main loop draws in one frame, onto a screen-sized Surface"""
+    screen = pygame.Surface(constants.screensize)
+    parts = (game.depot, game.crane, game.playfield, game.score_area)
+
+    def run():
+        for part in parts:
+            part.changed()
+            part.draw_if_changed(screen)
+    return run
+
+
+OPERATIONS = {
+    "tick": prepare_tick,
+    "refresh_status": prepare_refresh_status,
+    "check_Scoring_full": prepare_check_scoring_full,
+    "Scoring.expand": prepare_scoring_expand,
+    "Playfield.draw": prepare_playfield_draw,
+    "frame": prepare_frame,
+}
+
+# how many calls one sample of an operation covers
+CALLS_PER_SAMPLE = {"tick": TICKS_PER_SAMPLE}
+
+
+def percentile(ordered: list, p: float):
+    """p-th percentile (0..100) of an ascending list, linear interpolation between ranks"""
+    position = (len(ordered) - 1) * p / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: list):
+    """Statistics of a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        "min": ordered[0],
+        "mean": statistics.fmean(ordered),
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def take_sample(scenario, operation, seed: int):
+    """Sets up the scenario, prepares the operation and times one run of it. Returns the
+    duration per call in seconds, or None if the operation does not apply"""
+    scenario(seed)
+    func = OPERATIONS[operation]()
+    if func is None:
+        return None
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        begin = time.perf_counter()
+        func()
+        duration = time.perf_counter() - begin
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return duration / CALLS_PER_SAMPLE.get(operation, 1)
+
+
+def measure(scenario, operation, seed: int, warmup: int, repetitions: int):
+    """Samples of one operation in one scenario, after warmup untimed runs. Returns None if
+    the operation does not apply to the scenario"""
+    for _ in range(warmup):
+        if take_sample(scenario, operation, seed) is None:
+            return None
+    samples = []
+    for _ in range(repetitions):
+        sample = take_sample(scenario, operation, seed)
+        if sample is None:
+            return None
+        samples.append(sample)
+    return samples
+
+
+def run_suite(scenarios=None, operations=None, seed: int = 1, warmup: int = 3,
+              repetitions: int = 30):
+    """Runs every operation in every scenario (default: all of them). Returns a dict with the
+    settings under "meta" and results[scenario][operation] with the statistics and the raw
+    samples, all in seconds per call. Operations that do not apply to a scenario are left out.
+    The game is reset afterwards."""
+    scenarios = list(SCENARIOS) if scenarios is None else list(scenarios)
+    operations = list(OPERATIONS) if operations is None else list(operations)
+    for name in scenarios:
+        if name not in SCENARIOS:
+            raise ValueError("Unknown scenario {}, known are {}".format(name, ", ".join(SCENARIOS)))
+    for name in operations:
+        if name not in OPERATIONS:
+            raise ValueError("Unknown operation {}, known are {}".format(name, ", ".join(OPERATIONS)))
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            results[scenario] = {}
+            for operation in operations:
+                samples = measure(SCENARIOS[scenario], operation, seed, warmup, repetitions)
+                if samples is None:
+                    continue
+                entry = summarize(samples)
+                entry["samples"] = samples
+                results[scenario][operation] = entry
+    finally:
+        game.reset()
+
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "machine": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "seed": seed,
+            "warmup": warmup,
+            "repetitions": repetitions,
+            "ticks_per_sample": TICKS_PER_SAMPLE,
+            "seesaws": game.playfield.seesaws,
+            "rows": game.playfield.rows,
+            "unit": "seconds per call",
+        },
+        "results": results,
+    }
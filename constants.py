@@ -3,13 +3,46 @@
 # - Where is the depot/playfield/etc drawn.
 # - Where in the depot area is the first/second/nth column drawn?
 
+import math
+import os
+from fractions import Fraction
+
+
+def ratio(value):
+    """Exact Fraction of a value written in decimal notation, e.g. 9.8 becomes 49/5"""
+    return Fraction(str(value))
+
+
+def round_half_up(value) -> int:
+    """Rounds a Fraction (or int) to the nearest int, halves are rounded up.
+    Unlike round(), this does not depend on the parity of the result."""
+    return math.floor(value + Fraction(1, 2))
+
+
+# size of the board: number of seesaws (two columns each) and number of visible rows.
+# Can be changed with the environment variables SWING_SEESAWS and SWING_ROWS, e.g. for
+# a wide mode. The Ball size on screen shrinks to fit.
+board_seesaws = int(os.environ.get("SWING_SEESAWS", 4))
+board_rows = int(os.environ.get("SWING_ROWS", 8))
+board_columns = 2 * board_seesaws
+if board_seesaws < 1 or board_rows < 3:
+    raise ValueError("Board needs at least one seesaw and three rows.")
+
+
+# All timelines of the game logic are integer step counters with exact rational speeds,
+# so the same inputs lead to the same state on every platform. Floats are only derived
+# for drawing.
+
 # (max) number of ticks to be calculated per second
 max_FPS = 50
 
 # speed of falling Balls, in tiles/sec
 falling_speed = 3.0
 # same in tiles/tick
-falling_per_tick = falling_speed / max_FPS
+falling_per_tick = ratio(falling_speed) / max_FPS
+# heights of FallingBalls are counted in steps, this many per tile and per tick
+falling_steps_per_tile = falling_per_tick.denominator
+falling_steps_per_tick = falling_per_tick.numerator
 
 # Stop if falling Speed is higher than one tile per tick. This could break the FallingBall mechanic
 if falling_per_tick > 1.0:
@@ -18,35 +51,47 @@ if falling_per_tick > 1.0:
 # speed of tilting Seesaws, in 1/sec. For example 4.0 means 0.25sec to tilt to final position
 tilting_speed = 2.0
 # same in tilts/tick
-tilting_per_tick = tilting_speed / max_FPS
+tilting_per_tick = ratio(tilting_speed) / max_FPS
+# tilt of a Seesaw is counted in steps, this many from balanced to fully tilted, and per tick
+tilting_steps_per_unit = tilting_per_tick.denominator
+tilting_steps_per_tick = tilting_per_tick.numerator
 
 
 # total time it takes for a thrown Ball to travel, in seconds
 # (in case of [multiple times?] sideway fly-out, this is for each round)
 thrown_ball_totaltime = 2.0
 # trajectory parameter t goes from -1 to +1, increase this much in each tick
-thrown_ball_dt = 2./ (max_FPS * thrown_ball_totaltime)
-# thrown ball trajectory: y-value of highest point
-thrown_ball_maxheight = 9.8
-# if ball is thrown off the field, this position is their destination
-thrown_ball_flyover_height = 7.0
-# if ball is targeting a column, this is the height where they convert to a FallingBall. 
-# Trajectory looks strange if this is smaller than thrown_ball_maxheight :-)
-thrown_ball_dropheight = 9.5
+thrown_ball_dt = 2 / (max_FPS * ratio(thrown_ball_totaltime))
+# The heights of a thrown ball depend on the number of rows of the Playfield it flies over
+def thrown_ball_maxheight(rows: int):
+    """thrown ball trajectory: y-value of highest point"""
+    return rows + ratio(1.8)
+
+def thrown_ball_flyover_height(rows: int):
+    """if ball is thrown off the field, this position is their destination"""
+    return rows - 1
+
+def thrown_ball_dropheight(rows: int):
+    """if ball is targeting a column, this is the height where they convert to a FallingBall.
+    Trajectory looks strange if this is smaller than thrown_ball_maxheight :-)"""
+    return rows + ratio(1.5)
 
 # speed of Scoring. How fast does ball-removing travel (in Balls/sec)
 scoring_speed = 5.0
 # delay in ticks until next stage of scoring
 scoring_delay = int(max_FPS / scoring_speed)
 
+# at least this many same-colored Balls on top of each other combine into one
+combining_minimum = 5
 # speed of Combining. How long does it take to Combine a vertical Five, in seconds
 combining_totaltime = 1.0
+combining_numticks = round_half_up(max_FPS * ratio(combining_totaltime))
 # parameter t goes from 0.0 to 1.0, how much to add per tick
-combining_dt = 1./ (max_FPS * combining_totaltime)
+combining_dt = Fraction(1, combining_numticks)
 
 # time an Explosion is shown, in seconds
 explosion_totaltime = 1.5
-explosion_numticks = explosion_totaltime * max_FPS
+explosion_numticks = round_half_up(max_FPS * ratio(explosion_totaltime))
 
 
 
@@ -59,9 +104,6 @@ screensize = (screen_width, screen_height)
 global_xmargin = 10
 global_ymargin = 10
 
-# size of a Ball, in px
-ball_size = (60, 40)
-
 # horizontal space between columns in Playfield/Depot
 column_spacing = 5
 # vertical space between two stacked Balls
@@ -69,6 +111,21 @@ rowspacing = 5
 
 # Size of area for the depot, relative to screensize
 depot_width_fraction, depot_height_fraction = (0.7, 0.2)
+# Size of area where the playfield is, including falling Balls, blocked tiles from the seesaws, weightdisplay
+playfieldsize_fraction = (0.7, 0.6)
+# bottom of playfield area has some space for displaying the current weight of that stack.
+weightdisplayheight = 40
+
+# size of a Ball, in px. At most 60x40, smaller if the board would not fit on the screen
+# otherwise. Columns have to fit into the Depot, rows into the Playfield.
+max_ball_size = (60, 40)
+ball_size = (
+    min(max_ball_size[0], (int(screen_width * depot_width_fraction)
+                           - (board_columns - 1) * column_spacing) // board_columns),
+    min(max_ball_size[1], (int(screen_height * playfieldsize_fraction[1]) - weightdisplayheight
+                           - (board_rows - 1) * rowspacing) // board_rows),
+)
+
 depotsize = (int(screen_width * depot_width_fraction), int(screen_height * depot_height_fraction))
 # Pixel coordinates of the top-left corner of the Depot. 
 depot_position_y = global_ymargin
@@ -77,8 +134,8 @@ depot_position = (depot_position_x, depot_position_y)
 
 # Calculate Pixel coords of the (top-left corner of the) first Ball in the depot, and 
 # distance to second-to-left Ball in the depot.
-# 8 cols of Balls use 8*ballsize[0] px plus 7*colspacing
-px_used = 8 * ball_size[0] + 7 * column_spacing
+# n cols of Balls use n*ballsize[0] px plus (n-1)*colspacing
+px_used = board_columns * ball_size[0] + (board_columns - 1) * column_spacing
 # Rest of the px is divided equally left and right
 if px_used > depotsize[0]:
     raise ValueError("Depot not wide enough.")
@@ -108,7 +165,7 @@ crane_position_y = depot_position_y + depotsize[1] + 3
 cranearea_position = (crane_position_x, crane_position_y)
 
 # Calculate pixel coords of the leftmost position where the Crane can be. And spacing to the second-to-left position etc
-px_used = 8 * ball_size[0] + 7 * column_spacing
+px_used = board_columns * ball_size[0] + (board_columns - 1) * column_spacing
 if px_used > craneareasize[0]:
     raise ValueError("Crane Area not wide enough.")
 cranearea_xleft = int(0.5*(craneareasize[0] - px_used))
@@ -123,20 +180,15 @@ cranearea_ballcoord = [cranearea_xleft, cranearea_ytop]
 cranearea_ballspacing = [0, cranearea_x_perCol]
 
 
-# Size of area where the playfield is, including falling Balls, blocked tiles from the seesaws, weightdisplay
-playfieldsize_fraction = (0.7, 0.6)
 playfieldsize = (int(screen_width*playfieldsize_fraction[0]), int(screen_height*playfieldsize_fraction[1]))
 # Pixel coords of the top-left corner of the playfield area. For now, just 3 px below the crane area
 playfield_position_x = crane_position_x
 playfield_position_y = crane_position_y + craneareasize[1] + 3
 playfield_position = (playfield_position_x, playfield_position_y)
 
-# bottom of playfield area has some space for displaying the current weight of that stack.
-weightdisplayheight = 40
-
 # Calculate px coords of the top-left Ball in the playfield
 # x direction. The index in theplayfield.content[.][] counts from 1 instead of 0, to make the "dummy row" possible.
-px_used = 8 * ball_size[0] + 7 * column_spacing
+px_used = board_columns * ball_size[0] + (board_columns - 1) * column_spacing
 if px_used > playfieldsize[0]:
     raise ValueError("Playfield not wide enough.")
 playfield_ballcoord_x = int(0.5*(playfieldsize[0] - px_used))
@@ -144,29 +196,31 @@ playfield_ballcoord_perCol = ball_size[0] + column_spacing
 # => x-coord of Ball in playfield col i is playfield_ballcoord_x + (i-1)*playfield_ballcoord_perCol
 
 # y direction. The index in theplayfield.content[][.] counts up from bottom instead of down.
-px_used = 8 * ball_size[1] + 7 * rowspacing + weightdisplayheight
+px_used = board_rows * ball_size[1] + (board_rows - 1) * rowspacing + weightdisplayheight
 if px_used > playfieldsize[1]:
     raise ValueError("Playfield not high enough.")
 playfield_ballcoord_y = int(0.5*(playfieldsize[1] - px_used))
 playfield_ballcoord_perRow = ball_size[1] + column_spacing
-# => y-coord of Ball in playfield row j is playfield_ballcoord_y + (7-j)*playfield_ballcoord_perRow
+# => y-coord of Ball in playfield row j is playfield_ballcoord_y + (board_rows-1-j)*playfield_ballcoord_perRow
 playfield_ballcoord = [playfield_ballcoord_x, playfield_ballcoord_y]
 playfield_ballspacing = [playfield_ballcoord_perCol, playfield_ballcoord_perRow]
 
 from typing import Tuple
 def pixel_coord_in_playfield(playfield_coords: Tuple[int]):
-    """Takes playfield-coordinate (x,y), usually 0..7 (but
+    """Takes playfield-coordinate (x,y), usually 0..board_columns-1 and 0..board_rows-1 (but
     values outside are allowed), returns pixel coordinate of the 
-    top-left corner of that position in playfield."""
+    top-left corner of that position in playfield.
+    The whole screen layout is computed for the board of SWING_SEESAWS and SWING_ROWS, only
+    a Playfield of that size can be drawn (see Playfield.draw())."""
     playfield_x, playfield_y = playfield_coords
     px_x = playfield_ballcoord[0] + playfield_x * playfield_ballspacing[0]
-    px_y = playfield_ballcoord[1] + (7. - playfield_y) * playfield_ballspacing[1]
+    px_y = playfield_ballcoord[1] + (board_rows - 1. - playfield_y) * playfield_ballspacing[1]
 
     return [px_x, px_y]
 
 
 # px position of weightdisplay
-weightdisplay_y = playfield_ballcoord_y + 8 * ball_size[1] + 8 * rowspacing
+weightdisplay_y = playfield_ballcoord_y + board_rows * (ball_size[1] + rowspacing)
 weightdisplay_x = playfield_ballcoord_x + int(0.4 * ball_size[0])
 weightdisplay_x_per_column = ball_size[0] + column_spacing
 weightdisplay_coords = [weightdisplay_x, weightdisplay_y]
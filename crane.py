@@ -1,4 +1,5 @@
-# provides the Crane class. The Crane always holds a Ball and has a position (int, 0 to 7).
+# provides the Crane class. The Crane always holds a Ball and has a position (int, 0 to the
+# number of columns of game.playfield - 1).
 
 # from Balls import *
 from typing import Tuple
@@ -14,7 +15,7 @@ import balls
 
 
 class Crane:
-    """Information about the Crane. Has x (int, 0 <= x <= 7) and current_Ball (Ball).
+    """Information about the Crane. Has x (int, 0 <= x < columns of game.playfield) and current_Ball (Ball).
     Also holds a local var surf, surface to draw on, returned when draw() is called on it.
     Constructor expects size of that surface.
 
@@ -22,7 +23,7 @@ class Crane:
         drop_ball(), drops ball at the current position, gets a new one from the depot
         move_left()
         move_right(), these two respect boundaries
-        getx(), current position 0..7
+        getx(), current position 0..columns-1
         getball(), returns the current ball"""
 
     def __init__(self, size: Tuple[int]):
@@ -71,21 +72,23 @@ class Crane:
 
     def move_right(self):
         """moves the Crane one position to the right. Does nothing if already in the rightmost position."""
+        import game
         self.x += 1
-        if self.x > 7:
-            self.x = 7
+        if self.x > game.playfield.columns - 1:
+            self.x = game.playfield.columns - 1
         self.changed()
 
     def move_to_column(self, col: int) -> None:
-        if col < 0 or col > 7:
+        import game
+        if col < 0 or col >= game.playfield.columns:
             raise ValueError(
-                f"Crane column must be 0..7, attempted to move it to column {col}"
+                f"Crane column must be 0..{game.playfield.columns - 1}, attempted to move it to column {col}"
             )
         self.x = col
         self.changed()
 
     def getx(self):
-        """position of the crane. Always returns an int, possible values are 0..7"""
+        """position of the crane. Always returns an int, possible values are 0..columns-1"""
         return self.x
 
     def getball(self):
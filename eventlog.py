@@ -0,0 +1,167 @@
+# provides the structured log of game events (throw, fly_out, score, explosion, tilt, death).
+# The engine calls eventlog.info("throw", range=3, ...) and the like. Records are dicts with
+# the tick, the severity (name of the log level), the event name and the fields, handed to
+# the configured sink.
+# Logging functions below the configured level are replaced by an empty function, so a
+# filtered call costs no more than calling that. Its arguments are still evaluated though:
+# call sites in the engine check enabled(level) first, so nothing is built while logging is
+# off. Call sites must use eventlog.info(...), not a from-import, to see the replacement.
+# Default: nothing is logged. SWING_LOG=<file.jsonl> and SWING_LOG_LEVEL=DEBUG/INFO/WARNING
+# configure a JSONL file at import.
+
+# shorts:
+# - configure(sink, level) sets where records go and from which level on
+# - debug(event, **fields) / info(...) / warning(...) log one record
+# - NullSink, RingSink(capacity), JsonlSink(path), StreamSink(stream) are the sinks
+
+import atexit
+import collections
+import json
+import os
+import sys
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+level_names = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING"}
+
+
+class NullSink:
+    """Drops every record. Constructor: NullSink()"""
+
+    __slots__ = ()
+
+    def write(self, record: dict):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RingSink:
+    """Keeps the last capacity records in memory, in records (deque, oldest first).
+    Constructor: RingSink(capacity=10000)"""
+
+    __slots__ = ("records",)
+
+    def __init__(self, capacity: int = 10000):
+        self.records = collections.deque(maxlen=capacity)
+
+    def write(self, record: dict):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """Writes one JSON object per line to a file. Lines are collected and written in blocks
+    of buffer_records. Constructor: JsonlSink(path, buffer_records=1000). close() at the end,
+    or the last block is lost."""
+
+    __slots__ = ("file", "lines", "buffer_records")
+
+    def __init__(self, path: str, buffer_records: int = 1000):
+        self.file = open(path, "a")
+        self.lines = []
+        self.buffer_records = buffer_records
+
+    def write(self, record: dict):
+        self.lines.append(json.dumps(record, separators=(",", ":")))
+        if len(self.lines) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        if self.file.closed:
+            return
+        if self.lines:
+            self.file.write("\n".join(self.lines) + "\n")
+            self.lines = []
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class StreamSink:
+    """Writes every record as a readable line to a text stream, for debugging.
+    Constructor: StreamSink(stream=sys.stdout)"""
+
+    __slots__ = ("stream",)
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+
+    def write(self, record: dict):
+        fields = " ".join("{}={}".format(key, value) for key, value in record.items()
+                          if key not in ("tick", "severity", "event"))
+        self.stream.write("[{}] {} {} {}\n".format(record["tick"], record["severity"],
+                                                    record["event"], fields))
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+def _no_clock():
+    return None
+
+
+# returns the current tick for the records. ongoing sets it to ongoing.current_tick
+clock = _no_clock
+sink = NullSink()
+level = OFF
+
+
+def _noop(event, **fields):
+    pass
+
+
+def _emitter(level_number: int):
+    name = level_names[level_number]
+
+    def emit(event: str, **fields):
+        record = {"tick": clock(), "severity": name, "event": event}
+        record.update(fields)
+        sink.write(record)
+
+    return emit
+
+
+_emitters = {number: _emitter(number) for number in level_names}
+debug = info = warning = _noop
+
+
+def configure(new_sink=None, new_level: int = INFO):
+    """Sends records of new_level and above to new_sink (default: NullSink). Records below
+    new_level are not even created. The previous sink is flushed, not closed."""
+    global sink, level, debug, info, warning
+    sink.flush()
+    sink = new_sink if new_sink is not None else NullSink()
+    level = new_level
+    debug = _emitters[DEBUG] if level <= DEBUG else _noop
+    info = _emitters[INFO] if level <= INFO else _noop
+    warning = _emitters[WARNING] if level <= WARNING else _noop
+
+
+def enabled(level_number: int):
+    """True if records of that level are logged. Use it to skip building expensive fields"""
+    return level <= level_number
+
+
+if os.environ.get("SWING_LOG"):
+    configure(JsonlSink(os.environ["SWING_LOG"]),
+              {name: number for number, name in level_names.items()}[
+                  os.environ.get("SWING_LOG_LEVEL", "INFO").upper()])
+    atexit.register(lambda: sink.close())
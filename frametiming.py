@@ -0,0 +1,170 @@
+# provides timing of the stages of the main loop and an overlay that shows it.
+# The main loop calls frame_timer.begin_frame() at the start of each frame and
+# frame_timer.mark(stage) after each stage. Every stage keeps its durations of the last
+# frames, the overlay shows their percentiles. While the timer is disabled, begin_frame()
+# and mark() are empty methods, so instrumentation costs one call per stage.
+
+# shorts:
+# - frame_timer is the FrameTimer of the main loop, disabled unless SWING_FRAMETIMING is set
+# - FrameTimer.enable() / disable() / toggle() switch collecting on and off
+# - FrameTimer.percentiles(stage) (p50, p95, p99) of the recent durations, in seconds
+# - FrameOverlay draws the table of all stages onto the screen
+
+import collections
+import math
+import os
+import time
+from typing import Tuple
+
+import pygame
+
+from constants import max_FPS
+
+pygame.font.init()
+
+# every frame should be done within this many seconds to keep up with max_FPS
+frame_budget = 1.0 / max_FPS
+# number of frames the percentiles are computed from
+window_frames = 250
+
+
+def _noop(*args):
+    pass
+
+
+class FrameTimer:
+    """Durations of the stages of the main loop, over the last window frames. Vars:
+        enabled (bool), True while collecting
+        window (int), number of frames kept per stage
+        stages (dict str -> deque of float), durations in seconds, in the order of first use.
+            The stage "frame" holds the sum of all stages of a frame
+    Constructor: FrameTimer(window=window_frames, enabled=False)
+    Methods:
+        begin_frame(), mark(stage), call begin_frame at the start of each frame and mark
+            after each stage. Time between marks is attributed to the stage
+        percentiles(stage), (p50, p95, p99) in seconds
+        slowest_stage(), the stage with the highest p99, besides "frame"
+    """
+
+    __slots__ = ("enabled", "window", "stages", "last", "frame_start", "begin_frame", "mark")
+
+    def __init__(self, window: int = window_frames, enabled: bool = False):
+        self.window = window
+        self.stages = {}
+        self.last = None
+        self.frame_start = None
+        self.enabled = False
+        self.begin_frame = _noop
+        self.mark = _noop
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        self.enabled = True
+        self.last = None
+        self.begin_frame = self._begin_frame
+        self.mark = self._mark
+
+    def disable(self):
+        self.enabled = False
+        self.begin_frame = _noop
+        self.mark = _noop
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def reset(self):
+        """forgets all collected durations"""
+        self.stages = {}
+        self.last = None
+
+    def _record(self, stage: str, duration: float):
+        samples = self.stages.get(stage)
+        if samples is None:
+            samples = self.stages[stage] = collections.deque(maxlen=self.window)
+        samples.append(duration)
+
+    def _begin_frame(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            self._record("frame", self.last - self.frame_start)
+        self.frame_start = now
+        self.last = now
+
+    def _mark(self, stage: str):
+        now = time.perf_counter()
+        if self.last is None:
+            # first frame after enabling, nothing to attribute yet
+            self.frame_start = self.last = now
+            return
+        self._record(stage, now - self.last)
+        self.last = now
+
+    def percentiles(self, stage: str):
+        """(p50, p95, p99) of the recent durations of the stage, in seconds. Nearest rank.
+        Raises KeyError if the stage was never marked"""
+        ordered = sorted(self.stages[stage])
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, math.ceil(p / 100 * len(ordered)) - 1)] for p in (50, 95, 99))
+
+    def slowest_stage(self):
+        """Name of the stage with the highest p99, None if nothing was recorded"""
+        stages = [stage for stage in self.stages if stage != "frame"]
+        if not stages:
+            return None
+        return max(stages, key=lambda stage: self.percentiles(stage)[2])
+
+
+frame_timer = FrameTimer(enabled=bool(os.environ.get("SWING_FRAMETIMING")))
+
+
+class FrameOverlay:
+    """Table of p50/p95/p99 per stage of a FrameTimer and the length of the eventQueue,
+    drawn in the top left corner of the screen. The text is rendered only every
+    refresh_frames frames, in between the last rendering is blitted again.
+    Constructor: FrameOverlay(timer, refresh_frames=25)
+    Methods:
+        draw(screen, number_of_events)
+    """
+
+    __slots__ = ("timer", "refresh_frames", "frames", "surf", "font")
+
+    def __init__(self, timer: FrameTimer, refresh_frames: int = 25):
+        self.timer = timer
+        self.refresh_frames = refresh_frames
+        self.frames = 0
+        self.surf = None
+        self.font = None
+
+    def lines(self, number_of_events: int):
+        """The text lines of the table, with a flag for lines over the frame budget"""
+        ret = [("{:<16}{:>7}{:>7}{:>7}".format("stage [ms]", "p50", "p95", "p99"), False)]
+        for stage in self.timer.stages:
+            p50, p95, p99 = self.timer.percentiles(stage)
+            ret.append(("{:<16}{:>7.2f}{:>7.2f}{:>7.2f}".format(
+                stage, p50 * 1000, p95 * 1000, p99 * 1000), p99 > frame_budget))
+        ret.append(("events: {}".format(number_of_events), False))
+        return ret
+
+    def render(self, number_of_events: int):
+        if self.font is None:
+            self.font = pygame.font.SysFont("Courier New", 12)
+        rendered = [self.font.render(text, True, (255, 80, 80) if over else (255, 255, 255))
+                    for text, over in self.lines(number_of_events)]
+        width = max(line.get_width() for line in rendered) + 8
+        height = sum(line.get_height() for line in rendered) + 8
+        self.surf = pygame.Surface((width, height))
+        self.surf.fill((0, 0, 0))
+        y = 4
+        for line in rendered:
+            self.surf.blit(line, (4, y))
+            y += line.get_height()
+
+    def draw(self, screen: pygame.Surface, number_of_events: int, position: Tuple[int] = (0, 0)):
+        if self.surf is None or self.frames % self.refresh_frames == 0:
+            self.render(number_of_events)
+        self.frames += 1
+        screen.blit(self.surf, position)
@@ -0,0 +1,397 @@
+# provides a randomized game driver that plays headless games with random crane inputs and
+# forced specials, and checks invariants of the game state while it plays. A game is fully
+# given by its seed and its list of moves (the input log): the seed decides the Balls the game
+# generates, the moves what the player does. A failing input log is shrunk to a minimal one
+# that still breaks the same invariant, and can be replayed from its JSON file.
+# Run python fuzzing.py --minutes 60 from the main folder, see --help.
+
+# shorts:
+# - INVARIANTS maps invariant names to check functions, they return None or a message
+# - fuzz(...) plays random games until the budget is used up, returns the Failures and statistics
+# - replay(seed, moves) plays one input log with checks after every move, returns a Failure or None
+# - shrink(failure) the smallest input log found that fails the same invariant
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter
+from typing import NamedTuple
+
+sys.path.append("S:/SwingSelfmade/")
+
+import balls
+import game
+import ongoing
+
+# forced specials of a move, by the letters of balls.force_special(). None: the Ball of the Crane
+SPECIALS = {"B": balls.Bomb, "C": balls.Cutter, "H": balls.Heart}
+
+# specials forced by default
+DEFAULT_SPECIALS = "BCH"
+
+# a move that does not wait for the game to settle waits this many ticks at most
+MAX_WAIT = 60
+SETTLE_TICKS = 100000
+
+
+class Move(NamedTuple):
+    """One input of the player: move the Crane to column and drop. special is a letter of
+    SPECIALS or None, wait the number of ticks until the next move, None to wait until the
+    game settled"""
+
+    column: int
+    special: str = None
+    wait: int = None
+
+
+class Failure(NamedTuple):
+    """A broken invariant. move is the index of the move after which it was found, the input
+    log is seed and moves"""
+
+    invariant: str
+    message: str
+    seed: int
+    moves: tuple
+    move: int
+
+    def to_json(self):
+        return {"invariant": self.invariant, "message": self.message, "seed": self.seed,
+                "move": self.move, "moves": [list(move) for move in self.moves]}
+
+    @classmethod
+    def from_json(cls, data: dict):
+        return cls(data["invariant"], data["message"], data["seed"],
+                   tuple(Move(*move) for move in data["moves"]), data["move"])
+
+
+def signature(failure: Failure):
+    """Invariant and message of failure, with numbers like columns and heights replaced by #.
+    Failures of the same bug mostly share their signature"""
+    return "{}: {}".format(failure.invariant, re.sub(r"\d+", "#", failure.message))
+
+
+def _all_seesaws():
+    return enumerate(game.playfield.stacks)
+
+
+def check_scoring_thrown():
+    """No Ball in flight is marked for scoring, see the known bug in NOTES.txt"""
+    for event in ongoing.eventQueue:
+        if isinstance(event, ongoing.ThrownBall):
+            in_flight = [event.getball()]
+        elif isinstance(event, ongoing.FallingBall):
+            in_flight = event.getballs()
+        else:
+            continue
+        for ball in in_flight:
+            if ball.is_scoring():
+                return "{} in {} is marked for scoring".format(type(ball).__name__,
+                                                                 type(event).__name__)
+    return None
+
+
+def check_scoring_leftover():
+    """Without a running Scoring, no Ball on the board is marked for scoring"""
+    if ongoing.event_type_exists(ongoing.Scoring):
+        return None
+    for i, sesa in _all_seesaws():
+        for ball in sesa.stackleft + sesa.stackright:
+            if ball.is_scoring():
+                return "seesaw {} holds a scoring Ball, but no Scoring is running".format(i)
+    return None
+
+
+def check_weights():
+    """The stored weights of every resting seesaw are the sums over its stacks"""
+    for i, sesa in _all_seesaws():
+        if sesa.ismoving():
+            continue
+        left = sum(ball.getweight() for ball in sesa.stackleft)
+        right = sum(ball.getweight() for ball in sesa.stackright)
+        if (left, right) != (sesa.weightleft, sesa.weightright):
+            return "seesaw {} stores weights {}, its stacks weigh {}".format(
+                i, (sesa.weightleft, sesa.weightright), (left, right))
+    return None
+
+
+def check_event_queue():
+    """Every event is in the eventQueue once, and every one of them is scheduled once"""
+    ids = Counter(id(event) for event in ongoing.eventQueue)
+    duplicates = [event for event in ongoing.eventQueue if ids[id(event)] > 1]
+    if duplicates:
+        return "{} is in the eventQueue {} times".format(type(duplicates[0]).__name__,
+                                                         ids[id(duplicates[0])])
+    if len(ongoing.wheel) != len(ongoing.eventQueue):
+        return "{} events in the eventQueue, {} scheduled".format(len(ongoing.eventQueue),
+                                                                  len(ongoing.wheel))
+    return None
+
+
+def check_tilt():
+    """Every tilt is in [-1, 1], a resting seesaw is tilted towards its heavier side"""
+    for i, sesa in _all_seesaws():
+        tilt = sesa.gettilt()
+        if not -1 <= tilt <= 1:
+            return "seesaw {} has tilt {}".format(i, tilt)
+        if sesa.ismoving():
+            continue
+        expected = (sesa.weightright > sesa.weightleft) - (sesa.weightright < sesa.weightleft)
+        if tilt != expected:
+            return "seesaw {} rests at tilt {} with weights {}".format(
+                i, tilt, (sesa.weightleft, sesa.weightright))
+    return None
+
+
+def check_alive():
+    """check_alive() agrees with the stack heights and the allowed heights of the tilts"""
+    alive = True
+    for sesa in game.playfield.stacks:
+        maxleft, maxright = sesa.max_stack_heights()
+        if not sesa.ismoving() and (len(sesa.stackleft) > maxleft
+                                    or len(sesa.stackright) > maxright):
+            alive = False
+    if game.playfield.check_alive() != alive:
+        return "check_alive() is {}, the stack heights say {}".format(
+            game.playfield.check_alive(), alive)
+    return None
+
+
+INVARIANTS = {
+    "scoring_thrown": check_scoring_thrown,
+    "scoring_leftover": check_scoring_leftover,
+    "weights": check_weights,
+    "event_queue": check_event_queue,
+    "tilt": check_tilt,
+    "alive": check_alive,
+}
+
+# invariants that only hold once nothing moves any more
+SETTLED_ONLY = {"scoring_leftover", "weights", "tilt", "alive"}
+
+
+def check_invariants(invariants=None):
+    """Runs the invariants (default: all of them) on the current game. Those of SETTLED_ONLY
+    are skipped while the game is not settled. Returns (name, message) of the first broken
+    one, or None"""
+    settled = game.is_settled()
+    for name in invariants or INVARIANTS:
+        if not settled and name in SETTLED_ONLY:
+            continue
+        message = INVARIANTS[name]()
+        if message is not None:
+            return name, message
+    return None
+
+
+def random_move(rng: random.Random, special_rate: float = 0.05, settle_rate: float = 0.7,
+                specials: str = DEFAULT_SPECIALS):
+    """A random Move: any column, one of the forced specials with special_rate, waiting for
+    the game to settle with settle_rate"""
+    column = rng.randrange(game.playfield.columns)
+    special = None
+    if specials and rng.random() < special_rate:
+        special = rng.choice(specials)
+    wait = None if rng.random() < settle_rate else rng.randint(1, MAX_WAIT)
+    return Move(column, special, wait)
+
+
+def start_game(seed: int):
+    """Resets the game headless, the Balls it generates are decided by seed"""
+    ongoing.headless = True
+    random.seed(seed)
+    game.reset()
+    balls.regenerate_nextspecial()
+
+
+def play_move(move: Move):
+    """Moves the Crane, drops its Ball (or the forced special) and waits as the move says,
+    jumping over idle ticks. Raises RuntimeError if the game does not settle"""
+    game.crane.move_to_column(move.column)
+    if move.special is not None:
+        game.crane.current_Ball = SPECIALS[move.special]()
+    game.drop_ball()
+    if move.wait is None:
+        game.run_until_settled(SETTLE_TICKS, skip_idle=True)
+    else:
+        game.run_ticks(move.wait, skip_idle=True)
+
+
+def _play(seed: int, moves, check_every: int, invariants=None):
+    """Plays the moves from a fresh game, checks the invariants after every check_every-th
+    move and after the last. Exceptions count as broken invariants. Returns
+    (Failure or None, number of moves played)"""
+    start_game(seed)
+    moves = tuple(moves)
+    for i, move in enumerate(moves):
+        try:
+            play_move(move)
+            if i % check_every == 0 or i == len(moves) - 1 or not game.playfield.alive:
+                broken = check_invariants(invariants)
+            else:
+                broken = None
+        except Exception as e:
+            broken = "exception", "{}: {}".format(type(e).__name__, e)
+        if broken is not None:
+            return Failure(broken[0], broken[1], seed, moves[:i + 1], i), i + 1
+        if not game.playfield.alive:
+            return None, i + 1
+    return None, len(moves)
+
+
+def replay(seed: int, moves, invariants=None):
+    """Plays an input log with all checks after every move. Returns the Failure or None.
+    The game is left in the state in which the Failure was found"""
+    return _play(seed, moves, 1, invariants)[0]
+
+
+def play_random_game(seed: int, max_moves: int = 500, check_every: int = 10,
+                     invariants=None, special_rate: float = 0.05, settle_rate: float = 0.7,
+                     specials: str = DEFAULT_SPECIALS):
+    """Plays random moves until the game is lost or max_moves were played. Checks the
+    invariants after every check_every-th move. Returns (Failure or None, moves played)"""
+    rng = random.Random(seed)
+    moves = []
+    for _ in range(max_moves):
+        moves.append(random_move(rng, special_rate, settle_rate, specials))
+    # generating the moves up front keeps them independent of the game, so the input log
+    # replays the same game
+    return _play(seed, moves, check_every, invariants)
+
+
+def _simpler_moves(moves: tuple):
+    """Variants of moves with one Move made simpler: no forced special, or waiting until settled"""
+    for i, move in enumerate(moves):
+        if move.special is not None:
+            yield moves[:i] + (move._replace(special=None),) + moves[i + 1:]
+        if move.wait is not None:
+            yield moves[:i] + (move._replace(wait=None),) + moves[i + 1:]
+
+
+def shrink(failure: Failure, max_replays: int = 2000, invariants=None):
+    """Smallest input log found that still fails with the signature of failure: leaves out blocks
+    of moves, halving the block size down to single moves, then simplifies single moves.
+    Stops after max_replays replays. Returns the Failure of the smallest log"""
+    best = failure
+    replays = 0
+
+    def attempt(moves):
+        nonlocal best, replays
+        replays += 1
+        result = replay(best.seed, moves, invariants)
+        if result is not None and signature(result) == signature(best):
+            best = result
+            return True
+        return False
+
+    block = max(len(best.moves) // 2, 1)
+    while block >= 1 and replays < max_replays:
+        start = 0
+        while start < len(best.moves) and replays < max_replays:
+            if not attempt(best.moves[:start] + best.moves[start + block:]):
+                start += block
+        block //= 2
+
+    improved = True
+    while improved and replays < max_replays:
+        improved = False
+        for candidate in _simpler_moves(best.moves):
+            if replays >= max_replays:
+                break
+            if attempt(candidate):
+                improved = True
+                break
+    return best
+
+
+def fuzz(seconds: float = 60, first_seed: int = 0, max_moves: int = 500, check_every: int = 10,
+         max_failures: int = 10, invariants=None, do_shrink: bool = True,
+         specials: str = DEFAULT_SPECIALS):
+    """Plays random games with the seeds first_seed, first_seed+1, ... until seconds passed or
+    max_failures different ones were found. specials are the letters of the specials to force.
+    Returns (list of Failures, one per signature(), statistics dict with the number of games
+    failing per signature). The game is reset and headless mode switched off
+    afterwards."""
+    failures = []
+    seen = set()
+    stats = {"games": 0, "moves": 0, "seconds": 0.0, "failures": Counter()}
+    begin = time.perf_counter()
+    seed = first_seed
+    try:
+        while time.perf_counter() - begin < seconds and len(failures) < max_failures:
+            failure, played = play_random_game(seed, max_moves, check_every, invariants,
+                                               specials=specials)
+            stats["games"] += 1
+            stats["moves"] += played
+            if failure is not None:
+                key = signature(failure)
+                stats["failures"][key] += 1
+                # one input log per signature is enough, later games with the same bug are
+                # only counted
+                if key not in seen:
+                    seen.add(key)
+                    failures.append(shrink(failure, invariants=invariants)
+                                    if do_shrink else failure)
+            seed += 1
+    finally:
+        ongoing.headless = False
+        game.reset()
+    stats["seconds"] = time.perf_counter() - begin
+    stats["moves_per_hour"] = stats["moves"] / stats["seconds"] * 3600 if stats["seconds"] else 0
+    stats["failures"] = dict(stats["failures"])
+    return failures, stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python fuzzing.py",
+                                     description="Plays random headless games and checks invariants.")
+    parser.add_argument("--minutes", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-moves", type=int, default=500, help="moves per game at most")
+    parser.add_argument("--check-every", type=int, default=10,
+                        help="check the invariants after every n-th move (and at game end)")
+    parser.add_argument("--invariant", action="append", choices=list(INVARIANTS),
+                        help="invariant to check, can be repeated. Default: all")
+    parser.add_argument("--specials", default=DEFAULT_SPECIALS,
+                        help="letters of the specials to force (B, C, H), empty for none. "
+                             "Default: BCH")
+    parser.add_argument("--max-failures", type=int, default=10)
+    parser.add_argument("--no-shrink", action="store_true", help="keep failing logs as found")
+    parser.add_argument("--output", help="write the failing input logs as JSON to this file")
+    parser.add_argument("--replay", help="replay the input logs of a JSON file written by --output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.replay:
+        with open(args.replay) as f:
+            logged = [Failure.from_json(data) for data in json.load(f)]
+        exit_code = 0
+        for failure in logged:
+            result = replay(failure.seed, failure.moves, args.invariant)
+            if result is None:
+                print("seed {}: no failure".format(failure.seed))
+            else:
+                exit_code = 1
+                print("seed {}: {} after move {}: {}".format(
+                    result.seed, result.invariant, result.move, result.message))
+        ongoing.headless = False
+        return exit_code
+
+    failures, stats = fuzz(args.minutes * 60, args.seed, args.max_moves, args.check_every,
+                           args.max_failures, args.invariant, not args.no_shrink, args.specials)
+    print(json.dumps(stats))
+    for failure in failures:
+        print("{} after {} moves (seed {}): {}".format(failure.invariant, len(failure.moves),
+                                                       failure.seed, failure.message))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([failure.to_json() for failure in failures], f, indent=1)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
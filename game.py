@@ -2,7 +2,9 @@
 # and the bigger objects (Playfield, Depot etc) also
 
 
-import depot, crane, playfield, scoreArea, ongoing
+import time
+
+import depot, crane, playfield, scoreArea, ongoing, metrics
 from constants import depotsize, craneareasize, playfieldsize, scoredisplayarea_size
 
 depot = depot.Depot(depotsize)
@@ -29,6 +31,7 @@ def reset():
     balls_dropped = 0
     score = 0
     global_scorefactor = 1.0
+    metrics.games_started.inc()
 
 def drop_ball():
     """drops current ball from the Crane, puts next ball into Crane, generates new ball in the depot.
@@ -37,6 +40,7 @@ def drop_ball():
     crane.drop_ball()
     
     balls_dropped += 1
+    metrics.balls_dropped.inc()
     if balls_dropped % 50 == 0:
         level += 1
         score_area.update_level()
@@ -56,11 +60,79 @@ def addscore(a):
     score += a
     return score
 
-def tick():
-    """performs update of the game state, called periodically as time passes."""
+def tick(marker=None):
+    """performs update of the game state, called periodically as time passes.
+    marker(stage) is called after each stage, "playfield.tick" and "ongoing.tick", e.g.
+    FrameTimer.mark of the main loop."""
+    begin = time.perf_counter()
     playfield.tick()
+    if marker is not None:
+        marker("playfield.tick")
     ongoing.tick()
-    
+    if marker is not None:
+        marker("ongoing.tick")
+    metrics.tick_seconds.observe(time.perf_counter() - begin)
+
+def is_settled():
+    """True if nothing is moving: no ongoing events and no tilting seesaws."""
+    return ongoing.get_number_of_events() == 0 and not playfield.any_seesaw_is_moving()
+
+def idle_ticks(limit: int):
+    """Number of ticks from now, at most limit, in which nothing happens but Balls falling
+    and seesaws tilting: no Ball lands, no seesaw comes to rest, no other event acts."""
+    horizon = limit + 1
+    tilting_columns = set()
+    for sesa in playfield.stacks:
+        if sesa.ismoving():
+            horizon = min(horizon, sesa.ticks_until_rest())
+            tilting_columns.update((sesa.xleft, sesa.xleft + 1))
+    due = ongoing.next_wakeup(ignore=ongoing.FallingBall)
+    if due is not None:
+        horizon = min(horizon, due - ongoing.current_tick())
+    for event in ongoing.eventQueue:
+        if isinstance(event, ongoing.FallingBall):
+            # the landing height of a tilting seesaw changes every tick
+            if event.getcolumn() in tilting_columns:
+                return 0
+            horizon = min(horizon, event.ticks_until_landing())
+    return max(horizon - 1, 0)
+
+def fast_forward(limit: int):
+    """Jumps over the idle_ticks(limit) ahead, to just before the next state change. The
+    game ends up exactly as if tick() was called that often. Returns the number of ticks
+    skipped"""
+    ticks = idle_ticks(limit)
+    if ticks == 0:
+        return 0
+    for sesa in playfield.stacks:
+        if sesa.ismoving():
+            sesa.skip_tilting(ticks)
+    ongoing.skip(ticks)
+    return ticks
+
+def run_ticks(ticks: int, skip_idle: bool = False):
+    """performs ticks tick()s. With skip_idle, idle stretches are jumped over with fast_forward()"""
+    end = ongoing.current_tick() + ticks
+    while ongoing.current_tick() < end:
+        if skip_idle:
+            fast_forward(end - ongoing.current_tick() - 1)
+        tick()
+
+def run_until_settled(maxticks: int, skip_idle: bool = False):
+    """performs tick()s until is_settled(). Returns the number of ticks needed.
+    With skip_idle, idle stretches are jumped over with fast_forward(), they count as
+    ticks all the same. Raises RuntimeError if the game did not settle within maxticks."""
+    begin = ongoing.current_tick()
+    while True:
+        elapsed = ongoing.current_tick() - begin
+        if is_settled():
+            return elapsed
+        if elapsed >= maxticks:
+            raise RuntimeError("Game did not settle within {} ticks".format(maxticks))
+        if skip_idle:
+            fast_forward(maxticks - elapsed - 1)
+        tick()
+
 def getscore():
     return score
 
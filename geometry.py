@@ -0,0 +1,90 @@
+# provides static neighbourhood tables of the board, computed once per board size.
+# Cells are numbered x*height + y, the same as the index in Playfield.get_grid(), and that
+# number is also the bit of the cell in a bitmask. Area effects (Scoring, Explosions and
+# later Specials like Diagonal Cutter, Zap Horizontal or Flash Triangle) look their area
+# up instead of building coordinate lists with bounds checks.
+
+# shorts:
+# - board(width, height) returns the shared Tables of a board of that size
+# - column_bits(mask, x, height) bits of one column of a board mask, bit y for row y
+# - cells_of_mask(mask) the cell numbers of all set bits
+
+import functools
+
+
+class Tables:
+    """Neighbourhoods of every cell of a board with width columns and height rows. Every
+    table is a tuple indexed by cell number. Entries are tuples of cell numbers, only cells
+    inside the board. The *_masks tables hold the same cells as bitmasks. Vars:
+        coords: (x,y) of each cell
+        neighbours, neighbour_masks: the up to 4 direct neighbours
+        blasts, blast_masks: the 3x3 area around the cell, including the cell itself
+        diagonals, diagonal_masks: all cells diagonal from the cell, in all four directions
+        rows, row_masks: all cells in the row of the cell, including the cell itself
+        triangles, triangle_masks: the triangle below the cell, one column wider to each
+            side per row further down. Not including the cell itself
+    Constructor: Tables(width, height). Use board() to get the shared Tables of a size.
+    """
+
+    __slots__ = ("width", "height", "coords", "neighbours", "neighbour_masks", "blasts",
+                 "blast_masks", "diagonals", "diagonal_masks", "rows", "row_masks",
+                 "triangles", "triangle_masks")
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.coords = tuple((x, y) for x in range(width) for y in range(height))
+
+        self.neighbours, self.neighbour_masks = self._table(
+            lambda x, y: [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)])
+        self.blasts, self.blast_masks = self._table(
+            lambda x, y: [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        self.diagonals, self.diagonal_masks = self._table(
+            lambda x, y: [(x + sx * d, y + sy * d) for sx in (-1, 1) for sy in (-1, 1)
+                          for d in range(1, max(width, height))])
+        self.rows, self.row_masks = self._table(
+            lambda x, y: [(x2, y) for x2 in range(width)])
+        self.triangles, self.triangle_masks = self._table(
+            lambda x, y: [(x + dx, y - d) for d in range(1, y + 1) for dx in range(-d, d + 1)])
+
+    def _table(self, area):
+        """Builds the tuple table and the mask table of an area function (x,y) -> list of (x,y)"""
+        cells = []
+        masks = []
+        for x, y in self.coords:
+            inside = tuple(self.cell(x2, y2) for x2, y2 in area(x, y)
+                           if 0 <= x2 < self.width and 0 <= y2 < self.height)
+            cells.append(inside)
+            mask = 0
+            for cell in inside:
+                mask |= 1 << cell
+            masks.append(mask)
+        return tuple(cells), tuple(masks)
+
+    def cell(self, x: int, y: int):
+        """Cell number of (x,y). Raises IndexError if it is not on the board"""
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            raise IndexError("Cell ({},{}) is not on a {}x{} board".format(
+                x, y, self.width, self.height))
+        return x * self.height + y
+
+
+@functools.lru_cache(maxsize=None)
+def board(width: int, height: int):
+    """The Tables of a board of that size, computed on first use"""
+    return Tables(width, height)
+
+
+def column_bits(mask: int, x: int, height: int):
+    """Bits of column x of a board mask, bit y for row y"""
+    return (mask >> (x * height)) & ((1 << height) - 1)
+
+
+def cells_of_mask(mask: int):
+    """Cell numbers of all set bits of mask, lowest first"""
+    cells = []
+    while mask:
+        lowest = mask & -mask
+        cells.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return cells
@@ -0,0 +1,199 @@
+# provides a memory profiling mode for long sessions. A MemoryMonitor samples the memory
+# every interval seconds: tracemalloc totals and the allocation sites that grew most since the
+# last sample, the number of live Balls and ongoing events by type, and the pygame Surfaces
+# by kind (loaded images, component surfaces, others like font renders). Every sample is one
+# line of a JSONL time series. Series that grew in each of the last samples are flagged.
+# Set SWING_MEMPROFILE=<file.jsonl> (and SWING_MEMPROFILE_INTERVAL=<seconds>) to monitor a
+# game started with SelfSwing_main.py.
+
+# shorts:
+# - MemoryMonitor(path, interval) start() it, call maybe_sample() once per frame, stop() at the end
+# - count_objects() live instances of all Ball and Ongoing classes, by class name
+# - surface_memory() count and bytes of the reachable pygame Surfaces, by kind
+
+import collections
+import gc
+import json
+import time
+import tracemalloc
+
+import pygame
+
+import balls
+import eventlog
+import game
+import ongoing
+
+
+def _subclasses(cls):
+    pending = [cls]
+    while pending:
+        cls = pending.pop()
+        yield cls
+        pending.extend(cls.__subclasses__())
+
+
+def tracked_types():
+    """All Ball and Ongoing classes, including the specials and placeholders"""
+    return set(_subclasses(balls.Ball)) | set(_subclasses(ongoing.Ongoing))
+
+
+def count_objects(objects=None):
+    """Number of live instances of every Ball and Ongoing class, by class name.
+    objects defaults to gc.get_objects()"""
+    if objects is None:
+        objects = gc.get_objects()
+    types = tracked_types()
+    counts = collections.Counter(type(obj).__name__ for obj in objects if type(obj) in types)
+    return dict(counts)
+
+
+def surface_bytes(surface: pygame.Surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def surface_memory(objects=None):
+    """Count and bytes of pygame Surfaces referenced by any object the garbage collector
+    knows, by kind: "images" (balls.load_image cache), "components" (the drawing surfaces of
+    Depot, Crane, Playfield and ScoreArea) and "other" (font renders, sprites, ...).
+    Surfaces only referenced from local variables of running functions, or from dicts that
+    hold nothing but atomic values and Surfaces (the collector does not track those), are not
+    seen. The image cache is such a dict, it is looked at directly."""
+    if objects is None:
+        objects = gc.get_objects()
+    image_cache = list(balls._image_cache.values())
+    component_surfaces = [part.surf for part in (game.depot, game.crane, game.playfield,
+                                                  game.score_area)]
+    surfaces = {id(surface): surface for surface in image_cache + component_surfaces}
+    for obj in objects:
+        for referent in gc.get_referents(obj):
+            if type(referent) is pygame.Surface:
+                surfaces[id(referent)] = referent
+    images = {id(surface) for surface in image_cache}
+    components = {id(surface) for surface in component_surfaces}
+
+    ret = {kind: {"count": 0, "bytes": 0} for kind in ("images", "components", "other")}
+    for key, surface in surfaces.items():
+        if key in images:
+            kind = "images"
+        elif key in components:
+            kind = "components"
+        else:
+            kind = "other"
+        ret[kind]["count"] += 1
+        ret[kind]["bytes"] += surface_bytes(surface)
+    return ret
+
+
+def growing_series(history: dict, window: int):
+    """Names of the series in history (name -> list of values) whose last window values
+    each grew over the one before"""
+    ret = []
+    for name, values in history.items():
+        recent = values[-window:]
+        if len(recent) == window and all(a < b for a, b in zip(recent, recent[1:])):
+            ret.append(name)
+    return sorted(ret)
+
+
+class MemoryMonitor:
+    """Samples the memory usage every interval seconds and writes a JSONL time series. Vars:
+        path (str), the JSONL file
+        interval (float), seconds between samples of maybe_sample()
+        window (int), a series is flagged as growing if it grew in each of the last window
+            samples (window-1 increases in a row)
+        top (int), number of allocation sites with the biggest growth per sample
+        history (dict str -> list), all sampled values per series
+        growing (list of str), series flagged in the last sample
+    Constructor: MemoryMonitor(path, interval=60.0, window=5, top=10, frames=1). frames is
+        the depth of the tracebacks tracemalloc records.
+    """
+
+    __slots__ = ("path", "interval", "window", "top", "frames", "history", "growing", "file",
+                 "started_tracing", "begin", "last_sample", "last_snapshot")
+
+    def __init__(self, path: str, interval: float = 60.0, window: int = 5, top: int = 10,
+                 frames: int = 1):
+        self.path = path
+        self.interval = interval
+        self.window = window
+        self.top = top
+        self.frames = frames
+        self.history = collections.defaultdict(list)
+        self.growing = []
+        self.file = None
+        self.started_tracing = False
+        self.begin = None
+        self.last_sample = None
+        self.last_snapshot = None
+
+    def start(self):
+        """Starts tracemalloc if it is not running yet, opens the file and takes a first sample"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_tracing = True
+        self.file = open(self.path, "a")
+        self.begin = time.perf_counter()
+        self.sample()
+
+    def maybe_sample(self):
+        """Takes a sample if interval seconds passed since the last one. Returns it, else None"""
+        if time.perf_counter() - self.last_sample >= self.interval:
+            return self.sample()
+        return None
+
+    def _series(self, record: dict):
+        yield "traced_current", record["traced_current"]
+        for name, count in record["objects"].items():
+            yield "objects." + name, count
+        for kind, usage in record["surfaces"].items():
+            yield "surfaces.{}.bytes".format(kind), usage["bytes"]
+
+    def sample(self):
+        """Takes a sample, writes it to the file and returns it as a dict"""
+        self.last_sample = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        top_growth = []
+        if self.last_snapshot is not None:
+            for stat in snapshot.compare_to(self.last_snapshot, "lineno")[:self.top]:
+                frame = stat.traceback[0]
+                top_growth.append({"where": "{}:{}".format(frame.filename, frame.lineno),
+                                   "size_diff": stat.size_diff, "count_diff": stat.count_diff})
+        self.last_snapshot = snapshot
+
+        objects = gc.get_objects()
+        current, peak = tracemalloc.get_traced_memory()
+        record = {
+            "time": self.last_sample - self.begin,
+            "tick": ongoing.current_tick(),
+            "traced_current": current,
+            "traced_peak": peak,
+            "objects": count_objects(objects),
+            "surfaces": surface_memory(objects),
+            "top_growth": top_growth,
+        }
+        del objects
+
+        # a type that is gone counts as 0, so it does not keep an old growing streak
+        for name, values in self.history.items():
+            if name.startswith("objects.") and name[len("objects."):] not in record["objects"]:
+                values.append(0)
+        for name, value in self._series(record):
+            self.history[name].append(value)
+        self.growing = growing_series(self.history, self.window)
+        record["growing"] = self.growing
+        if self.growing:
+            eventlog.warning("memory_growth", series=self.growing)
+
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        return record
+
+    def stop(self):
+        """Closes the file, stops tracemalloc if start() started it"""
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
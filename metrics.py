@@ -0,0 +1,216 @@
+# provides counters, gauges and histograms of the engine, and a local HTTP endpoint that
+# serves them in the Prometheus text format. The engine updates them directly, an update
+# is a dict operation. Gauges of the current state (eventQueue depth, level, score) are
+# read only when the metrics are rendered.
+
+# shorts:
+# - the metrics of the engine are module variables of this file, e.g. metrics.throw_range
+# - registry.render() all metrics in Prometheus text format
+# - serve(port) serves them on http://127.0.0.1:port/metrics from a daemon thread
+
+import bisect
+import http.server
+import threading
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """All metrics, rendered in the order of registration.
+    Constructor: Registry()"""
+
+    __slots__ = ("metrics",)
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        """Adds metric. Raises ValueError if there is one of the same name already"""
+        if metric.name in self.metrics:
+            raise ValueError("Metric {} is registered already".format(metric.name))
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in Prometheus text format"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append("# HELP {} {}".format(metric.name, metric.help))
+            lines.append("# TYPE {} {}".format(metric.name, metric.kind))
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Counter:
+    """Monotonic count, optionally split by labels. Constructor:
+    Counter(name, help, labelnames=(), registry=registry)"""
+
+    __slots__ = ("name", "help", "labelnames", "values")
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=(), registry: Registry = registry):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {} if self.labelnames else {(): 0}
+        if registry is not None:
+            registry.register(self)
+
+    def inc(self, *labelvalues, amount=1):
+        """Adds amount. One value per label name must be given"""
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError("{} needs the labels {}".format(self.name, self.labelnames))
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues):
+        return self.values.get(labelvalues, 0)
+
+    def samples(self):
+        return ["{}{} {}".format(self.name, _labels(self.labelnames, key), _number(value))
+                for key, value in list(self.values.items())]
+
+
+class Gauge:
+    """Current value. Either set() by the engine, or read from function when rendered.
+    Constructor: Gauge(name, help, function=None, registry=registry)"""
+
+    __slots__ = ("name", "help", "function", "value")
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, function=None, registry: Registry = registry):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.value = 0
+        if registry is not None:
+            registry.register(self)
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        if self.function is not None:
+            return self.function()
+        return self.value
+
+    def samples(self):
+        return ["{} {}".format(self.name, _number(self.get()))]
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, given by their upper bounds.
+    Constructor: Histogram(name, help, buckets, registry=registry)"""
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets, registry: Registry = registry):
+        self.name = name
+        self.help = help
+        self.bounds = sorted(buckets)
+        # one more for the values above the highest bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0
+        self.count = 0
+        if registry is not None:
+            registry.register(self)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        ret = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + [float("inf")], list(self.counts)):
+            cumulative += count
+            ret.append("{}_bucket{{le=\"{}\"}} {}".format(self.name, _number(bound), cumulative))
+        ret.append("{}_sum {}".format(self.name, _number(self.sum)))
+        ret.append("{}_count {}".format(self.name, self.count))
+        return ret
+
+
+def _event_queue_depth():
+    import ongoing
+    return ongoing.get_number_of_events()
+
+
+def _level():
+    import game
+    return game.level
+
+
+def _score():
+    import game
+    return game.score
+
+
+# metrics of the engine
+games_started = Counter("swing_games_started_total", "Games started, counted at game.reset()")
+games_lost = Counter("swing_games_lost_total", "Games lost because a stack grew too high")
+balls_dropped = Counter("swing_balls_dropped_total", "Balls dropped from the Crane")
+specials_spawned = Counter("swing_specials_spawned_total", "Special Balls generated, by type",
+                           ["type"])
+throw_range = Histogram("swing_throw_range", "Throws, by absolute throwing range",
+                        [1, 2, 3, 4, 6, 8, 12, 16, 24, 32])
+fly_outs = Counter("swing_fly_outs_total", "Thrown Balls that flew out sideways, by side",
+                   ["side"])
+scoring_size = Histogram("swing_scoring_size", "Finished Scorings, by number of Balls scored",
+                         [3, 4, 5, 6, 8, 10, 15, 20, 30, 50])
+explosions = Counter("swing_explosions_total", "Explosions, one per exploding Bomb or landing Bomb")
+tick_seconds = Histogram("swing_tick_seconds", "Duration of game.tick()",
+                         [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.05])
+event_queue_depth = Gauge("swing_event_queue_depth", "Number of ongoing events",
+                          _event_queue_depth)
+level = Gauge("swing_level", "Level of the current game", _level)
+score = Gauge("swing_score", "Score of the current game", _score)
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Answers GET /metrics with the rendered registry"""
+
+    registry = registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # no access log on stderr
+        pass
+
+
+def serve(port: int = 9464, host: str = "127.0.0.1"):
+    """Serves the metrics on http://host:port/metrics from a daemon thread. Port 0 picks a free
+    port, see server.server_address. Returns the server, call shutdown() on it to stop"""
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
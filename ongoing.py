@@ -3,20 +3,29 @@
 # - SeesawTilting. One of the four seesaws shifts position because weights have changed recently
 # - Scoring. 3 horizontal are expanding, then remove the Balls and score points.
 
-# all must have a .draw(surf) and a .tick(playfield) method.
+# all must have a .draw(surf) and a .run() method. run() is a generator: it yields the number
+# of ticks until it wants to be resumed, and returns when the event is over. A timer wheel
+# resumes the events, an event that waits costs nothing per tick.
 
 # shorts:
 # - drop_ball(ball, column) to drop a ball from crane-height
 # - tilt_seesaw(seesaw, before, after) to move a seesaw from a position to another
 # - throw_ball(ball, origin_coords, throwing_range) to throw a ball. Positive throwing_range indicates
 # throwing to the right, to higher x-values / columns
+# - add_event(event) to start any event, next_wakeup() for the next tick in which an event acts
+# - skip(ticks) jumps over ticks in which only Balls fall, see game.fast_forward()
 
 from abc import abstractmethod
+from fractions import Fraction
 from typing import Tuple
+import functools
+import math
 import balls
 
 import pygame
+import eventlog
 import game
+import metrics
 
 from constants import (
     ball_size,
@@ -25,8 +34,8 @@ from constants import (
     playfield_ballspacing,
     rowspacing,
 )
-from constants import falling_per_tick
-from constants import thrown_ball_dropheight
+from constants import falling_steps_per_tick, falling_steps_per_tile, round_half_up
+from constants import thrown_ball_dropheight, thrown_ball_flyover_height, thrown_ball_maxheight
 
 import constants
 
@@ -34,17 +43,172 @@ import constants
 # can use and modify this. Their local name is ongoing.eventQueue
 eventQueue = []
 
+# in headless mode, nothing is drawn. Thrown Balls skip their flight and fall into
+# their landing column right away
+headless = False
+
+
+class TimerWheel:
+    """Hierarchical timer wheel. Items are scheduled a number of ticks ahead and are handed
+    out again by advance() in the tick they are due. Level 0 has one slot per tick, every
+    further level has slots spanning a whole turn of the level below. Items of a higher level
+    are moved down (cascaded) when the level below wraps around, so every item is moved at most
+    once per level. Items due in the same tick come out in the order they were scheduled.
+    Vars:
+        now (int), current tick, starts at 0
+        wheels (list of lists of lists), wheels[level][slot] holds (due tick, item) pairs
+    Constructor: TimerWheel(slotbits=6, levels=4). Delays up to 2**(slotbits*levels)-1 ticks.
+    """
+
+    __slots__ = ("now", "bits", "mask", "levels", "wheels", "count")
+
+    def __init__(self, slotbits: int = 6, levels: int = 4):
+        self.now = 0
+        self.bits = slotbits
+        self.mask = (1 << slotbits) - 1
+        self.levels = levels
+        self.wheels = [[[] for _ in range(1 << slotbits)] for _ in range(levels)]
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, item, delay: int):
+        """item is handed out by advance() in delay ticks. delay must be at least 1"""
+        delay = int(delay)
+        if delay < 1:
+            raise ValueError("TimerWheel can only schedule into the future, got delay", delay)
+        if delay >> (self.bits * self.levels):
+            raise ValueError("Delay of", delay, "ticks is too long for this TimerWheel")
+        self._place(self.now + delay, item)
+        self.count += 1
+
+    def _place(self, due: int, item):
+        # lowest level whose turn covers the remaining delay
+        level = 0
+        while level < self.levels - 1 and (due - self.now) >> (self.bits * (level + 1)):
+            level += 1
+        self.wheels[level][(due >> (self.bits * level)) & self.mask].append((due, item))
+
+    def advance(self):
+        """Moves on by one tick, returns the list of items due in the new tick"""
+        self.now += 1
+        # every level that wrapped around pulls its next slot one level down, highest first
+        level = 1
+        while level < self.levels and not self.now & ((1 << (self.bits * level)) - 1):
+            level += 1
+        for higher in range(level - 1, 0, -1):
+            index = (self.now >> (self.bits * higher)) & self.mask
+            entries = self.wheels[higher][index]
+            self.wheels[higher][index] = []
+            for due, item in entries:
+                self._place(due, item)
+
+        index = self.now & self.mask
+        due_now = self.wheels[0][index]
+        if not due_now:
+            return []
+        self.wheels[0][index] = []
+        self.count -= len(due_now)
+        return [item for _, item in due_now]
+
+    def next_wakeup(self):
+        """Tick in which the next item is due, None if nothing is scheduled"""
+        if self.count == 0:
+            return None
+        return min(due for wheel in self.wheels for slot in wheel for due, _ in slot)
+
+    def entries(self):
+        """All scheduled (due tick, item) pairs, in no particular order"""
+        return [entry for wheel in self.wheels for slot in wheel for entry in slot]
+
+    def jump(self, ticks: int):
+        """Moves on by ticks without handing anything out. Items that are due in the skipped
+        ticks are scheduled again for the next tick, in the order they come out, just like
+        items that are resumed and wait one tick. So they are handed out in the tick after the
+        jump, behind the items that were due then already"""
+        # only items due in the next tick are in its slot of level 0
+        slot = self.wheels[0][(self.now + 1) & self.mask]
+        waiting = [item for _, item in slot]
+        slot.clear()
+        level0 = self.wheels[0]
+        for _ in range(ticks):
+            following = (self.now + 1) & self.mask
+            if following and not level0[following]:
+                # no level wraps around and nothing is due, advance() would only count
+                self.now += 1
+                continue
+            due_now = self.advance()
+            self.count += len(due_now)
+            waiting.extend(due_now)
+        self.wheels[0][(self.now + 1) & self.mask].extend((self.now + 1, item) for item in waiting)
+
+
+wheel = TimerWheel()
+
 
 def tick():
-    """perform update of all ongoing events. Called periodically as time passes."""
+    """perform update of all ongoing events. Called periodically as time passes.
+    Only the events that are due in this tick are resumed."""
+    for event, routine in wheel.advance():
+        resume(event, routine)
+
+
+def add_event(event):
+    """Starts an ongoing event. Its run() is first resumed in the next tick"""
+    eventQueue.append(event)
+    wheel.schedule((event, event.run()), 1)
+
+
+def resume(event, routine):
+    """Runs the coroutine of event until it waits again or is finished"""
+    try:
+        delay = next(routine)
+    except StopIteration:
+        finish(event)
+        return
+    wheel.schedule((event, routine), delay)
+
+
+def finish(event):
+    """Removes event from the eventQueue, if it is still there"""
+    if event in eventQueue:
+        eventQueue.remove(event)
+
+
+def current_tick():
+    """Number of ticks since the last reset"""
+    return wheel.now
+
+
+eventlog.clock = current_tick
+
+
+def next_wakeup(ignore=()):
+    """Tick in which the next ongoing event acts, None if there are no events.
+    Events of the types in ignore (a type or tuple of types) are left out.
+    Compare with current_tick()"""
+    if not ignore:
+        return wheel.next_wakeup()
+    return min((due for due, (event, _) in wheel.entries() if not isinstance(event, ignore)),
+               default=None)
+
+
+def skip(ticks: int):
+    """Jumps over ticks in which only FallingBalls act: they fall as far as they would in
+    these ticks and are resumed in the tick after. See game.fast_forward(), which knows
+    how many ticks can be skipped"""
     for event in eventQueue:
-        event.tick()
+        if isinstance(event, FallingBall):
+            event.skip(ticks)
+    wheel.jump(ticks)
 
 
 def reset():
     """empties eventQueue. This sets up the ongoing-module to the state of the game start"""
-    global eventQueue
+    global eventQueue, wheel
     eventQueue = []
+    wheel = TimerWheel()
 
 
 def get_number_of_events():
@@ -64,11 +228,15 @@ def get_newest_event():
 
 class Ongoing:
     """abstract Parent class, should not be instanciated.
-    Any child class must have a tick(self, playfield) method and a draw(self,surf) method.
+    Any child class must have a run(self) generator and a draw(self,surf) method. run() yields
+    the number of ticks to wait before it is resumed, and returns when the event is over.
+    Child classes list their variables in __slots__.
     """
 
+    __slots__ = ()
+
     @abstractmethod
-    def tick(self):
+    def run(self):
         pass
 
     @abstractmethod
@@ -98,80 +266,222 @@ def get_event_of_type(eventType):
 class FallingBall(Ongoing):
     """a Ball that is being dropped, falling after being thrown, or the Ball below it vanished somehow. Vars:
     ball (Colored_Ball or Special_Ball)
-    column (int, 0..7)
-    height (float, allowed range 8.0 >= height >= highest filled position in Playfield.content in respective column)
-
-    Constructor: FallingBall(ball, col, starting_height=8.0). The starting height is optional, only to be used
-        if the Ball drops from Playfield instead of Crane/Thrown
+    column (int, 0..columns-1)
+    steps (int), height counted in steps of 1/falling_steps_per_tile. getheight() is the exact height,
+        allowed range rows >= height >= highest filled position in Playfield.content in respective column
+    above (list of Balls), further Balls falling together with this one, directly stacked on top of it.
+        Lowest first. Empty for a single falling Ball.
+    ticks_to_landing (int), predicted number of ticks until the lowest Ball lands. Only recalculated
+        if the seesaw of the column changed, landing_version is the seesaw version it was calculated for.
+
+    Constructor: FallingBall(ball, col, starting_height=None, above=()). The starting height is optional, only to be used
+        if the Ball drops from Playfield instead of Crane/Thrown. Default is the top row of the Playfield
     """
 
     from balls import Ball
 
-    def __init__(self, ball: Ball, column: int, starting_height=8.0):
+    __slots__ = ("ball", "column", "steps", "above", "ticks_to_landing", "landing_version")
+
+    def __init__(self, ball: Ball, column: int, starting_height=None, above=()):
+        if starting_height is None:
+            starting_height = game.playfield.rows
         self.ball = ball
         self.column = column
-        self.height = starting_height
+        self.steps = round_half_up(Fraction(starting_height) * falling_steps_per_tile)
+        self.above = list(above)
+        self.ticks_to_landing = 0
+        self.landing_version = -1
 
     def draw(self, surf: pygame.Surface):
-        x, y = pixel_coord_in_playfield((self.column, self.height))
+        height = self.steps / falling_steps_per_tile
+        x, y = pixel_coord_in_playfield((self.column, height))
         self.ball.draw(surf, (x, y))
+        for i, ball in enumerate(self.above):
+            x, y = pixel_coord_in_playfield((self.column, height + 1 + i))
+            ball.draw(surf, (x, y))
+
+    def predict_landing(self):
+        """Calculates ticks_to_landing from the current landing height of the column"""
+        sesa = game.playfield.stacks[self.column // 2]
+        landing_steps = sesa.landing_height(self.column % 2 == 0) * falling_steps_per_tile
+        if self.steps < landing_steps:
+            self.ticks_to_landing = 0
+        else:
+            self.ticks_to_landing = math.floor((self.steps - landing_steps) / falling_steps_per_tick) + 1
+        self.landing_version = sesa.version
+
+    def ticks_until_landing(self):
+        """Predicted number of ticks until the lowest Ball lands, if nothing changes in its column"""
+        if game.playfield.stacks[self.column // 2].version != self.landing_version:
+            self.predict_landing()
+        return self.ticks_to_landing
+
+    def run(self):
+        while not self.tick():
+            yield 1
 
     def tick(self):
-        self.height -= falling_per_tick
-        if self.height < game.playfield.landing_height_of_column(self.column):
+        """Falls by one tick. Returns True once the last Ball of the segment landed"""
+        self.steps -= falling_steps_per_tick
+        if game.playfield.stacks[self.column // 2].version != self.landing_version:
+            self.predict_landing()
+        else:
+            self.ticks_to_landing -= 1
+        if self.ticks_to_landing > 0:
+            return False
+
+        # the lowest Ball lands, the next one of the segment is right above it and
+        # might land in the same tick. Heights are exact, the comparison is too
+        while self.getheight() < game.playfield.landing_height_of_column(self.column):
             ball_below = game.playfield.get_top_ball(self.column)
             if isinstance(ball_below, balls.Ball):
-                self.ball.lands_on_ball((self.column, self.height), ball_below)
+                self.ball.lands_on_ball((self.column, self.getheight()), ball_below)
             else:
-                self.ball.lands_on_empty((self.column, self.height))
-            eventQueue.remove(self)
+                self.ball.lands_on_empty((self.column, self.getheight()))
+            if not self.above:
+                finish(self)
+                game.playfield.refresh_status()
+                return True
             game.playfield.refresh_status()
+            self.ball = self.above.pop(0)
+            self.steps += falling_steps_per_tile
+        return False
+
+    def skip(self, ticks: int):
+        """Falls for ticks without landing, like that many tick()s. ticks must be less than
+        ticks_until_landing() and the column must not change meanwhile"""
+        self.ticks_until_landing()
+        self.steps -= ticks * falling_steps_per_tick
+        self.ticks_to_landing -= ticks
 
     def getheight(self):
-        return self.height
+        """Exact height of the lowest Ball, as a Fraction"""
+        return Fraction(self.steps, falling_steps_per_tile)
 
     def getball(self):
+        """Returns the lowest falling Ball"""
         return self.ball
 
+    def getballs(self):
+        """Returns all Balls falling together, lowest first"""
+        return [self.ball] + self.above
+
     def getcolumn(self):
         return self.column
 
 
 def drop_ball_in_column(ball, column: int):
-    eventQueue.append(FallingBall(ball, column))
+    add_event(FallingBall(ball, column))
 
 
 def ball_falls_from_height(ball, column: int, height: int):
-    eventQueue.append(FallingBall(ball, column, starting_height=height))
+    add_event(FallingBall(ball, column, starting_height=height))
+
+
+def segment_falls_from_height(segment: list, column: int, height: float):
+    """Lets a segment of stacked Balls (lowest first) fall together, the lowest one starting at height"""
+    add_event(FallingBall(segment[0], column, starting_height=height, above=segment[1:]))
+
+
+def convert_on_flyout(ball_type):
+    """Type of Ball that a Ball of ball_type becomes when flying out sideways.
+    Bombs become Hearts, other Special Balls become Bombs, ColoredBalls become Hearts."""
+    if issubclass(ball_type, balls.SpecialBall) and ball_type is not balls.Bomb:
+        return balls.Bomb
+    return balls.Heart
+
+
+def plan_throw(origin_x: int, throwing_range: int, ball_type=balls.ColoredBall,
+               columns: int = constants.board_columns):
+    """Closed form of a throw from column origin_x. Returns (landing, laps, landing_type):
+    the column where the Ball finally lands, the number of sideway fly-outs and the type
+    of Ball that lands (it is converted at every fly-out, see convert_on_flyout()).
+    Every fly-out continues on the other side of the columns, so the landing column is
+    simply (origin_x + throwing_range) mod columns."""
+    destination_raw = origin_x + throwing_range
+    landing = destination_raw % columns
+    laps = abs(destination_raw // columns)
+    landing_type = ball_type
+    if laps > 0:
+        first = convert_on_flyout(ball_type)
+        # conversions alternate between Heart and Bomb after the first one
+        landing_type = first if laps % 2 == 1 else convert_on_flyout(first)
+    return landing, laps, landing_type
+
+
+@functools.lru_cache(maxsize=None)
+def trajectory(origin: Tuple[float], destination: int, rows: int):
+    """Positions (x,y) of a thrown Ball for each tick of its flight from origin to
+    destination over a Playfield of that many rows, computed once per
+    (origin, destination, rows).
+    The trajectory is a standard parabola -t**2, with t going from -1 to +1. The t<0 side is for
+    origin to max, t>0 arm for max to destination. t=-1 is origin, t=0 is max, t=1 is destination.
+    max is always at x=(origin+destination)/2, y=thrown_ball_maxheight.
+    (That implies that the derivative is not smooth at the max. So be it.)
+    Past the max, t increases faster by (dy_origin)/(dy_destination).
+    The Ball reaches its destination one tick after the last position.
+    t is stepped exactly, so the number of ticks never depends on float rounding. The
+    positions are floats, they are only used for drawing."""
+    from constants import thrown_ball_dt
+
+    origin_x, origin_y = Fraction(origin[0]), Fraction(origin[1])
+    maxx = (origin_x + destination) / 2
+    maxy = thrown_ball_maxheight(rows)
+    dropheight = thrown_ball_dropheight(rows)
+    speedup_pastmax = (maxy - origin_y) / (maxy - dropheight)
+
+    path = []
+    t = Fraction(-1)
+    while True:
+        if t < 0:
+            t += thrown_ball_dt
+        else:
+            t += thrown_ball_dt * speedup_pastmax
+        if t > 1:
+            return tuple(path)
+        if t < 0:
+            # t<0 origin side: t=0 is (maxx, maxy), t=-1 is origin
+            x, y = maxx + t * (maxx - origin_x), maxy - t**2 * (maxy - origin_y)
+        else:
+            # t>0 destination side: Same thing with destination instead of origin
+            x, y = maxx - t * (maxx - destination), maxy - t**2 * (maxy - dropheight)
+        path.append((float(x), float(y)))
 
 
 class ThrownBall(Ongoing):
     """A ball that was thrown by a seesaw. Follows a certain trajectory
-    (see comment in tick() for details), then becomes a FallingBall. Vars:
+    (see trajectory() for details), then becomes a FallingBall. Vars:
     ball (Colored_Ball or Special_Ball).
-    destination (int), allowed range -1..8. Values 0..7 indicate landing in that column,
-        Values -1 or 8 indicate flying out sideway. Destination height is always 8.2
-    origin (int,int tuple), x and y coordinate of the spot from where it was launched. x=0..7, or
-        -1 resp 8 if flying in from the side.
-    x (float, not int), allowed range 1.0 <= column <= 8.0. Current position.
-    y (float), allowed range 1.0 <= height <= 9.0. Current position.
+    columns (int) and rows (int), size of the Playfield, 8 and 8 unless the board size was changed
+    destination (int), allowed range -1..columns. Values 0..columns-1 indicate landing in that column,
+        Values -1 or columns indicate flying out sideway. Destination height is always thrown_ball_dropheight
+    origin (int,int tuple), x and y coordinate of the spot from where it was launched. x=0..columns-1, or
+        -1 resp columns if flying in from the side.
+    x (float, not int), allowed range -1.0 <= column <= columns. Current position.
+    y (float), allowed range 1.0 <= height <= thrown_ball_maxheight. Current position.
     remaining_range (int), all values possible. Value is 0 except when it will be thrown out sideway,
         in which case it is the remaining number of columns to be thrown. Not to be confused with the
         constructor argument throwing_range. This is the remaining number of columns after the next fly-out,
         the constructor argument is the total number of columns to fly. Negative if flying to the left
-    t (float), running parameter for the trajectory. Values -1 <= t <= +1
-    speedup_pastmax (float), factor to the t increase per tick once t>0. Is calculated as (dy_origin)/(dy_destination).
-
+    landing (int, 0..columns-1), laps (int) and landing_type: final column, number of fly-outs and type of the
+        Ball that lands, all known from the start. See plan_throw()
+    lap (int), number of fly-outs so far
+    path (tuple of (x,y)), positions of the current flight from origin to destination, step is the
+        index of the next one.
 
     Constructor: ThrownBall(ball, (x,y), throwing_range), x and y and throwing_range should all be ints.
     Positive throwing_range indicates throwing to the right, negative to the left
     """
 
-    def __init__(self, ball, coords: Tuple[int], throwing_range: int):
-        from constants import thrown_ball_maxheight
+    __slots__ = ("ball", "columns", "rows", "origin", "x", "y", "destination", "remaining_range",
+                 "landing", "laps", "landing_type", "lap", "path", "step", "destination_raw",
+                 "total_ticks")
 
+    def __init__(self, ball, coords: Tuple[int], throwing_range: int):
         self.ball = ball
-        self.origin = coords
+        self.columns = game.playfield.columns
+        self.rows = game.playfield.rows
+        self.origin = tuple(coords)
         self.x = float(coords[0])
         self.y = float(coords[1])
         if throwing_range == 0:
@@ -183,42 +493,31 @@ class ThrownBall(Ongoing):
                 " with range zero.",
             )
 
-        # calculate destination. Three possible cases: Flying out left, landing in-bound, flying out right.
-        destination_raw = coords[0] + throwing_range
-        if destination_raw < 0:  # fly out left
-            self.destination = -1
-            self.remaining_range = destination_raw + 1
-        elif destination_raw > 8:  # fly out right
-            self.destination = 8
-            self.remaining_range = destination_raw - 8
-        else:  # stay in-bound
-            self.destination = destination_raw
-            self.remaining_range = 0
-
-        # the trajectory is parametrized with t going from -1 to +1
-        self.t = -1.0
-
-        self.speedup_pastmax = (thrown_ball_maxheight - self.origin[1]) / (
-            thrown_ball_maxheight - thrown_ball_dropheight
+        self.landing, self.laps, self.landing_type = plan_throw(
+            coords[0], throwing_range, type(ball), self.columns
         )
-
-        print(
-            "Throwing ball ",
-            ball,
-            " from position ",
-            coords,
-            " with range ",
-            throwing_range,
-            ". Destination is ",
-            self.destination,
-            ", remaining is ",
-            self.remaining_range,
-        )
-
-        # Maybe generate the trajectory here, as a local lambda(t)?
+        self.destination_raw = coords[0] + throwing_range
+        self.lap = 0
+        self.set_leg_destination()
+        self.path = trajectory(self.origin, self.destination, self.rows)
+        self.step = 0
+        self.total_ticks = self.count_total_ticks()
+
+    def set_leg_destination(self):
+        """sets destination and remaining_range of the current flight, from the number of
+        fly-outs so far. Three possible cases: Flying out left, landing in-bound, flying out right."""
+        if self.lap == self.laps:  # stay in-bound
+            self.destination = self.landing
+            self.remaining_range = 0
+        elif self.destination_raw < 0:  # fly out left
+            self.destination = -1
+            self.remaining_range = self.destination_raw + 1 + self.columns * self.lap
+        else:  # fly out right
+            self.destination = self.columns
+            self.remaining_range = self.destination_raw - self.columns * (self.lap + 1)
 
     def getx(self) -> float:
-        """Possible values are 0.0 to 7.0"""
+        """Possible values are -1.0 to columns"""
         return self.x
 
     def gety(self) -> float:
@@ -226,10 +525,14 @@ class ThrownBall(Ongoing):
 
     def getdestination(self):
         """Returns the destination of this ball-throwing event. Only x-coordinate.
-        Possible values are -1 .. 8. -1 for fly-out left, 0..7 for landing, 8 for fly-out right
+        Possible values are -1 .. columns. -1 for fly-out left, 0..columns-1 for landing, columns for fly-out right
         """
         return self.destination
 
+    def getlanding(self):
+        """Returns the column where the Ball will finally land, after all fly-outs"""
+        return self.landing
+
     def getball(self):
         """Returns the ball thrown"""
         return self.ball
@@ -239,111 +542,89 @@ class ThrownBall(Ongoing):
         positive if going to fly-out to the right"""
         return self.remaining_range
 
+    def get_total_ticks(self):
+        """Total number of ticks from the throw until the Ball becomes a FallingBall"""
+        return self.total_ticks
+
+    def count_total_ticks(self):
+        """Flight duration in ticks, from the lengths of the trajectories. Must be called
+        before the first fly-out."""
+        first_leg = len(self.path) + 1
+        if self.laps == 0:
+            return first_leg
+        side_x = self.columns if self.destination_raw < 0 else -1
+        side = (side_x, thrown_ball_flyover_height(self.rows))
+        flyover = len(trajectory(side, -1 if self.destination_raw < 0 else self.columns,
+                                 self.rows)) + 1
+        last_leg = len(trajectory(side, self.landing, self.rows)) + 1
+        return first_leg + (self.laps - 1) * flyover + last_leg
+
     def draw(self, surf):
         # identical to FallingBall.draw() so far
-        x = playfield_ballcoord[0] + (self.x) * playfield_ballspacing[0]
-        y = playfield_ballcoord[0] + (7.0 - self.y) * playfield_ballspacing[1]
-        self.ball.draw(surf, (x, y))
+        self.ball.draw(surf, pixel_coord_in_playfield((self.x, self.y)))
 
-    def tick(self):
-        # increase t. If destination was reached (t>1), convert into a FallingBall or perform the fly-out.
-        # If not, calculate new position x,y from the trajectory.
-        from constants import thrown_ball_dt, thrown_ball_maxheight
-
-        if self.t < 0:
-            self.t += thrown_ball_dt
-        else:
-            self.t += thrown_ball_dt * self.speedup_pastmax
-        game.playfield.changed()
-
-        # is the destination reached? If yes, it can become a FallingBall or it can fly out
-        if self.t > 1.0:
-            if self.destination == -1 or self.destination == 8:
+    def run(self):
+        # move to the next position on the trajectory every tick. If destination was reached,
+        # perform the fly-out, or convert into a FallingBall at the end.
+        while True:
+            game.playfield.changed()
+            if self.step < len(self.path):
+                self.x, self.y = self.path[self.step]
+                self.step += 1
+            elif self.lap < self.laps:
                 self.fly_out(self.destination == -1)
             else:
-                eventQueue.append(
-                    FallingBall(
-                        self.ball,
-                        self.destination,
-                        starting_height=thrown_ball_dropheight - 2.0,
-                    )
-                )
-                eventQueue.remove(self)
-        else:
-            # Ball has not reached its destination yet. Update x and y of the trajectory.
-            # The trajectory is a standard parabola -t**2. The t<0 side is for origin to max,
-            # t>0 arm for max to destination. t=-1 is origin, t=0 is max, t=1 is destination.
-            # max is always at x=(origin+destination)/2, y=thrown_ball_maxheight
-            # (That implies that the derivative is not smooth at the max. So be it.)
-            maxx = (self.origin[0] + self.destination) / 2
-            maxy = thrown_ball_maxheight
-
-            if self.t < 0.0:
-                # t<0 origin side: t=0 is (maxx, maxy), t=-1 is origin
-                self.x = maxx + self.t * (maxx - self.origin[0])
-                self.y = maxy - self.t**2 * (maxy - self.origin[1])
-            else:
-                # t>0 destination side: Same thing with destination instead of origin
-                self.x = maxx - self.t * (maxx - self.destination)
-                self.y = maxy - self.t**2 * (maxy - thrown_ball_dropheight)
+                break
+            yield 1
+        finish(self)
+        add_event(
+            FallingBall(
+                self.ball,
+                self.destination,
+                starting_height=thrown_ball_dropheight(self.rows) - 2,
+            )
+        )
 
     def fly_out(self, left: bool):
         """Ball flew out to the left or right (indicated by argument). Insert it at the
-        very right/left, set new origin, calculate and set new destination
+        very right/left, set new origin, and the new destination from the precomputed plan
         """
         # convert into Heart or Bomb
-        if isinstance(self.ball, balls.SpecialBall) and not isinstance(
-            self.ball, balls.Bomb
-        ):
-            self.ball = balls.Bomb()
-        else:
-            self.ball = balls.Heart()
-
-        from constants import thrown_ball_flyover_height, thrown_ball_maxheight
-
-        self.t = -1.0
-        self.y = thrown_ball_flyover_height
-        if left:
-            self.x = 8.0
-        else:
-            self.x = -1.0
-        self.origin = (self.x, self.y)
-        # calculate new destination. It can be another fly-out (if remaining_range is high enough) or a column.
-        # Didn't find a way to make this shorter without losing readability...
-        if left:
-            if self.remaining_range < -8:
-                self.destination = -1
-                self.remaining_range += 8
-            else:  # in-bound
-                self.destination = (
-                    7 + self.remaining_range
-                )  # self.remaining is negative
-                self.remaining_range = 0
-        else:
-            if self.remaining_range > 7:
-                self.destination = 8
-                self.remaining_range -= 8
-            else:
-                self.destination = self.remaining_range
-                self.remaining_range = 0
-
-        self.speedup_pastmax = (thrown_ball_maxheight - self.origin[1]) / (
-            thrown_ball_maxheight - thrown_ball_dropheight
-        )
-        print(
-            "Ball flying out, left=",
-            left,
-            ", new remaining_range=",
-            self.remaining_range,
-            " and destination=",
-            self.destination,
-        )
+        self.ball = convert_on_flyout(type(self.ball))()
+
+        self.lap += 1
+        metrics.fly_outs.inc("left" if left else "right")
+        self.origin = (self.columns if left else -1, thrown_ball_flyover_height(self.rows))
+        self.x = float(self.origin[0])
+        self.y = float(self.origin[1])
+        self.set_leg_destination()
+        self.path = trajectory(self.origin, self.destination, self.rows)
+        self.step = 0
+        if eventlog.enabled(eventlog.INFO):
+            eventlog.info("fly_out", side="left" if left else "right", lap=self.lap,
+                          ball=type(self.ball).__name__, destination=self.destination,
+                          remaining_range=self.remaining_range)
 
 
 def throw_ball(ball, origin_coords: Tuple[int], throwing_range: int):
-    """Throws ball from coords with specified range. origin_coords[0] = 0..7"""
-    eventQueue.append(ThrownBall(ball, origin_coords, throwing_range))
-    # print("throwing Ball, ", ball, origin_coords, throwing_range)
+    """Throws ball from coords with specified range. origin_coords[0] = 0..columns-1
+    In headless mode, the flight is skipped: the Ball becomes a FallingBall
+    above its landing column right away, converted as if it had flown."""
+    metrics.throw_range.observe(abs(throwing_range))
+    if eventlog.enabled(eventlog.INFO):
+        eventlog.info("throw", ball=type(ball).__name__, color=ball.getcolor(),
+                      weight=ball.getweight(), origin=list(origin_coords), range=throwing_range)
+    if headless:
+        landing, laps, landing_type = plan_throw(origin_coords[0], throwing_range, type(ball),
+                                                 game.playfield.columns)
+        if laps > 0:
+            ball = landing_type()
+            side = "left" if throwing_range < 0 else "right"
+            metrics.fly_outs.inc(side, amount=laps)
+        add_event(FallingBall(ball, landing,
+                              starting_height=thrown_ball_dropheight(game.playfield.rows) - 2))
+        return
+    add_event(ThrownBall(ball, origin_coords, throwing_range))
 
 
 class Scoring(Ongoing):
@@ -352,10 +633,11 @@ class Scoring(Ongoing):
     Constructor: Scoring((x,y), ball)
     """
 
+    __slots__ = ("past", "next", "weight_so_far", "ball")
+
     def __init__(self, coords: Tuple[int], ball: balls.Ball):
         self.past = []  # list of ScoringColoredBalls
-        self.next = [coords]  # list of (int,int) coords in the playfield
-        self.delay = constants.scoring_delay
+        self.next = [game.playfield.tables.cell(*coords)]  # cell numbers, see geometry
         self.weight_so_far = 0
         self.ball = ball  # this is used to match colors when deciding
         # whether to expand. Should be a ColoredBall or Heart
@@ -369,36 +651,37 @@ class Scoring(Ongoing):
         #    xcoord, ycoord = pixel_coord_in_playfield((x,y))
         #    pygame.draw.rect(surf, nextcolor, pygame.Rect((xcoord,ycoord), ball_size), width=3)
 
-    def tick(self):
-        """called once per tick. Counts down delay, expands if zero was reached, and reset delay.
-        If no expansion, removes this from the eventQueue
+    def run(self):
+        """Expands every scoring_delay+1 ticks. If there was no expansion, scores the points,
+        removes the Balls and this from the eventQueue
         """
-
-        import game
-
-        self.delay -= 1
-        if self.delay < 0:
-            if self.expand():
-                self.delay = constants.scoring_delay
-            else:
-                if isinstance(self.ball, balls.ColoredBall):
-                    # Formula for Scores: Total weight x number of balls x level
-                    score_from_this = (
-                        self.weight_so_far
-                        * len(self.past)
-                        * game.level
-                        * game.getscorefactor()
-                    )
-                    print("Score from this: ", game.addscore(score_from_this))
-                    print("Total score: ", game.getscore())
-                elif isinstance(self.ball, balls.Heart):
-                    game.increase_score_factor(len(self.past))
-                    print("Global score factor is now ", game.getscorefactor())
-                game.playfield.finalize_scoring(self.past)
-                game.score_area.changed()
-                eventQueue.remove(self)
-                game.playfield.refresh_status()
-                # TODO score and display
+        yield constants.scoring_delay
+        while self.expand():
+            yield constants.scoring_delay + 1
+        metrics.scoring_size.observe(len(self.past))
+
+        if isinstance(self.ball, balls.ColoredBall):
+            # Formula for Scores: Total weight x number of balls x level
+            score_from_this = (
+                self.weight_so_far
+                * len(self.past)
+                * game.level
+                * game.getscorefactor()
+            )
+            game.addscore(score_from_this)
+            if eventlog.enabled(eventlog.INFO):
+                eventlog.info("score", ball="ColoredBall", balls=len(self.past),
+                              weight=self.weight_so_far, points=score_from_this,
+                              total=game.getscore())
+        elif isinstance(self.ball, balls.Heart):
+            game.increase_score_factor(len(self.past))
+            if eventlog.enabled(eventlog.INFO):
+                eventlog.info("score", ball="Heart", balls=len(self.past),
+                              scorefactor=game.getscorefactor())
+        game.playfield.finalize_scoring(self.past)
+        game.score_area.changed()
+        finish(self)
+        game.playfield.refresh_status()
 
     def expand(self):
         """checks if neighboring balls are same color, removes them and saves their coords in
@@ -407,8 +690,10 @@ class Scoring(Ongoing):
 
         now = self.next
         self.next = []
-        for coords in now:
-            new_ball = game.playfield.get_ball_at(coords)
+        grid = game.playfield.get_grid()
+        neighbours = game.playfield.tables.neighbours
+        for cell in now:
+            new_ball = grid[cell]
             # do not expand to a position that already has a scoring Ball,
             # and not to a position that does not match colors
             if new_ball.is_scoring() or not new_ball.matches_color(self.ball):
@@ -417,16 +702,8 @@ class Scoring(Ongoing):
             new_ball.mark_for_scoring()
             self.weight_so_far += new_ball.getweight()
             self.past.append(new_ball)
+            self.next.extend(neighbours[cell])
 
-            x, y = coords
-            coords_to_check = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
-            # remove out-of-bounds from this list
-            for x2, y2 in coords_to_check:
-                if x2 < 0 or x2 > 7 or y2 < 0 or y2 > 8:
-                    continue
-                self.next.append((x2, y2))
-
-        # print("more matching Balls found: next=",self.next)
         game.playfield.changed()
         return len(self.next) > 0
 
@@ -434,50 +711,52 @@ class Scoring(Ongoing):
 def start_score(coords):
     # first_ball = game.playfield.mark_position_for_scoring(coords)
     first_ball = game.playfield.get_ball_at(coords)
-    eventQueue.append(Scoring(coords, first_ball))
+    add_event(Scoring(coords, first_ball))
 
 
 class Combining(Ongoing):
-    """Balls from a vertical Five that combine into one ball with the total weight.
-    Once an animation is added to this, this class will make sense. For now, it only serves
-    as a placeholder. Counts down for a few ticks, then dies. Drawing is just 'do nothing'. Vars:
+    """Balls from a vertical run (Five or more) that combine into one ball with the total weight.
+    The Playfield already holds the resulting ball, this animates the run contracting onto it
+    for combining_numticks, then dies. Vars:
         coords (tuple int,int), bottom coordinate where the resulting ball is placed.
-        t (float), parameter that counts up from 0.0 to 1.0, tracks progress of the animation
+        start (int), tick in which the animation started, see current_tick()
         color (int), color of the resulting ball, as defined in the Colorscheme
         weight (int), weight of the resulting ball
-    Constructor: Combining(coords, color, weight), coords is (int,int)
+        length (int), number of Balls that combined
+    Constructor: Combining(coords, color, weight, length=5), coords is (int,int)
     """
 
-    def __init__(self, coords: Tuple[int], color: int, weight: int):
+    __slots__ = ("coords", "color", "weight", "length", "start")
+
+    def __init__(self, coords: Tuple[int], color: int, weight: int, length: int = 5):
         self.coords = coords
         self.color = color
         self.weight = weight
-        self.t = 0.0
+        self.length = length
+        self.start = current_tick()
 
-    def tick(self):
-        from constants import combining_dt
+    def run(self):
+        yield constants.combining_numticks
+        finish(self)
+        game.playfield.changed()
 
-        self.t += combining_dt
-        if self.t > 1.0:
-            eventQueue.remove(self)
-            game.playfield.changed()
+    def progress(self):
+        """Progress of the animation, counts up from 0.0 to 1.0"""
+        return min(1.0, (current_tick() - self.start) / constants.combining_numticks)
 
     def draw(self, surf):
         # draw an ellipse that contracts in y-direction over time
         from colorschemes import simple_standard_ball_colors
 
         the_color = simple_standard_ball_colors[self.color]
-        starting_ysize = 5 * ball_size[1] + 4 * rowspacing
+        t = self.progress()
+        starting_ysize = self.length * ball_size[1] + (self.length - 1) * rowspacing
         final_ysize = ball_size[1]
-        current_ysize = starting_ysize + self.t * (final_ysize - starting_ysize)
+        current_ysize = starting_ysize + t * (final_ysize - starting_ysize)
         xcoord = playfield_ballcoord[0] + self.coords[0] * playfield_ballspacing[0]
-        ycoord_final = (
-            playfield_ballcoord[1] + (7 - self.coords[1]) * playfield_ballspacing[1]
-        )
-        ycoord_start = (
-            playfield_ballcoord[1] + (7 - self.coords[1] - 4) * playfield_ballspacing[1]
-        )
-        ycoord_now = ycoord_start + self.t * (ycoord_final - ycoord_start)
+        ycoord_final = pixel_coord_in_playfield(self.coords)[1]
+        ycoord_start = pixel_coord_in_playfield((self.coords[0], self.coords[1] + self.length - 1))[1]
+        ycoord_now = ycoord_start + t * (ycoord_final - ycoord_start)
 
         px_coords = (xcoord, ycoord_now)
         pygame.draw.ellipse(
@@ -489,25 +768,30 @@ class Combining(Ongoing):
         return self.coords
 
 
+def start_combining(coords, color: int, weight: int, length: int = 5):
+    add_event(Combining(coords, color, weight, length))
+
+
 class Explosion(Ongoing):
-    """A Bomb has recently exploded here, the sprite is drawn for a few frames."""
+    """A Bomb has recently exploded here, the sprite is drawn for a few frames.
+    All Explosions share the same image."""
+
+    __slots__ = ("coords",)
+    imagefile = "specials/explosion_zugeschnitten.png"
 
     def __init__(self, coords: Tuple[int]):
         x, y = coords
         self.coords = (x - 1, y + 1)
-        self.progress = 0.0
-        self.image = pygame.image.load("specials/explosion_zugeschnitten.png")
 
-    def tick(self):
-        self.progress += 1.0 / constants.explosion_numticks
-        if self.progress > 1.0:
-            eventQueue.remove(self)
-            game.playfield.changed()
+    def run(self):
+        yield constants.explosion_numticks
+        finish(self)
+        game.playfield.changed()
 
     def draw(self, surf: pygame.Surface):
         drawpos = pixel_coord_in_playfield(self.coords)
-        surf.blit(self.image, drawpos)
+        surf.blit(balls.load_image(self.imagefile), drawpos)
 
 
 def draw_explosion(coords):
-    eventQueue.append(Explosion(coords))
+    add_event(Explosion(coords))
@@ -0,0 +1,119 @@
+# provides a compact packed encoding of Balls, stacks and the whole Playfield.
+# A cell is one unsigned int: the lowest four bits (one nibble) hold the kind and color,
+# the rest holds the weight. Nibble values:
+# - 0 EmptySpace (also used for BlockedSpace, stacks never contain those)
+# - 1 Bomb, 2 Cutter, 3 Heart
+# - 4 and above: ColoredBall, color is (nibble - 4). That leaves room for 12 colors.
+# A stack is an array('I') of cells, lowest Ball first. The Playfield is encoded as bytes,
+# per seesaw its tilt steps and the lengths of both stacks followed by the cells (little-endian).
+# The scoring mark of a Ball is not encoded, this is meant for settled states.
+
+from array import array
+from fractions import Fraction
+import struct
+import sys
+
+import balls
+import constants
+
+EMPTY = 0
+BOMB = 1
+CUTTER = 2
+HEART = 3
+COLOR_OFFSET = 4
+
+KIND_BITS = 4
+KIND_MASK = (1 << KIND_BITS) - 1
+MAX_COLOR = KIND_MASK - COLOR_OFFSET
+MAX_WEIGHT = (1 << (32 - KIND_BITS)) - 1
+
+_special_codes = {balls.Bomb: BOMB, balls.Cutter: CUTTER, balls.Heart: HEART}
+_special_classes = {code: special for special, code in _special_codes.items()}
+
+# per seesaw: tilt in steps (see Seesaw.tilt_steps), number of Balls left, number of Balls right
+_seesaw_header = struct.Struct("<hHH")
+
+
+def encode_ball(ball: balls.PlayfieldSpace):
+    """Returns the packed int of a Ball. EmptySpace and BlockedSpace are encoded as 0"""
+    if isinstance(ball, balls.ColoredBall):
+        color = ball.getcolor()
+        weight = ball.getweight()
+        if color < 0 or color > MAX_COLOR:
+            raise ValueError("Can not pack color {}, only 0..{} possible".format(color, MAX_COLOR))
+        if weight < 0 or weight > MAX_WEIGHT:
+            raise ValueError("Can not pack weight {}".format(weight))
+        return (weight << KIND_BITS) | (color + COLOR_OFFSET)
+    if isinstance(ball, balls.EmptySpace):
+        return EMPTY
+    try:
+        return _special_codes[type(ball)]
+    except KeyError:
+        raise ValueError("Can not pack {}".format(ball)) from None
+
+
+def decode_ball(code: int):
+    """Inverse of encode_ball(). Returns a new Ball, or an EmptySpace for 0"""
+    nibble = code & KIND_MASK
+    if nibble >= COLOR_OFFSET:
+        return balls.ColoredBall(nibble - COLOR_OFFSET, code >> KIND_BITS)
+    if nibble == EMPTY:
+        return balls.EmptySpace()
+    return _special_classes[nibble]()
+
+
+def kind_of(code: int):
+    """The kind/color nibble of a packed cell"""
+    return code & KIND_MASK
+
+
+def weight_of(code: int):
+    """The weight of a packed cell"""
+    return code >> KIND_BITS
+
+
+def encode_stack(stack: list):
+    """Packs a list of Balls (lowest first) into an array('I')"""
+    return array("I", [encode_ball(ball) for ball in stack])
+
+
+def decode_stack(packed):
+    """Inverse of encode_stack(), returns a list of new Balls"""
+    return [decode_ball(code) for code in packed]
+
+
+def _stack_bytes(stack: list):
+    packed = encode_stack(stack)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def encode_board(the_playfield):
+    """Packs tilts and stacks of all seesaws of a Playfield into bytes"""
+    chunks = []
+    for sesa in the_playfield.stacks:
+        chunks.append(_seesaw_header.pack(sesa.tilt_steps, len(sesa.stackleft), len(sesa.stackright)))
+        chunks.append(_stack_bytes(sesa.stackleft))
+        chunks.append(_stack_bytes(sesa.stackright))
+    return b"".join(chunks)
+
+
+def decode_board(data: bytes):
+    """Inverse of encode_board(). Returns a list with a (tilt, leftstack, rightstack)
+    tuple per seesaw, the tilt being an exact Fraction and the stacks array('I')"""
+    ret = []
+    offset = 0
+    while offset < len(data):
+        steps, nleft, nright = _seesaw_header.unpack_from(data, offset)
+        offset += _seesaw_header.size
+        stacks = []
+        for n in (nleft, nright):
+            packed = array("I")
+            packed.frombytes(data[offset:offset + n * packed.itemsize])
+            if sys.byteorder == "big":
+                packed.byteswap()
+            offset += n * packed.itemsize
+            stacks.append(packed)
+        ret.append((Fraction(steps, constants.tilting_steps_per_unit), stacks[0], stacks[1]))
+    return ret
@@ -1,10 +1,12 @@
-# provides the Playfield class. The playfield has 8 stacks of Balls 
+# provides the Playfield class. The playfield has 8 stacks of Balls (2 per seesaw, the number
+# of seesaws and rows is configurable, see constants.board_seesaws)
 # (lowest 0-2 are blocked, depending on seesaw state). An empty space in the playfield 
 # is represented as None, same for a blocked space at the bottom.
 
 
 debugprints = False
 
+from fractions import Fraction
 from typing import Tuple
 #from pygame import Rect, Surface, font
 import pygame
@@ -13,9 +15,13 @@ import balls, game
 #from balls import BlockedSpace, EmptySpace, ColoredBall, SpecialBall
 #from game import GameStateError
 
+import eventlog
+import geometry
+import metrics
 import ongoing
+import packing
 #from constants import playfield_ballcoord, playfield_ballspacing 
-from constants import pixel_coord_in_playfield
+from constants import pixel_coord_in_playfield, round_half_up
 from constants import weightdisplay_coords, weightdisplay_x_per_column
 from constants import playfield_position
 import constants
@@ -25,11 +31,34 @@ weightdisplayfont = pygame.font.SysFont("Arial", 12)
 
 class Playfield:
     """Information about the current Playfield. 
-    Constructor takes size in pixels as (width,height) tuple."""
-
-    def __init__(self, size: Tuple[int]):
-
-        self.stacks = [Seesaw(0), Seesaw(2), Seesaw(4), Seesaw(6)]
+    Constructor takes size in pixels as (width,height) tuple, and optionally the number
+    of seesaws and visible rows (default from constants).
+    The game logic follows the seesaws and rows of the Playfield. The screen layout does not,
+    it is computed once for constants.board_seesaws and board_rows: a board of another size
+    for the game window is configured with SWING_SEESAWS and SWING_ROWS. Other sizes can
+    only run without drawing (tests, benchmarks, headless fuzzing)."""
+
+    def __init__(self, size: Tuple[int], seesaws: int = constants.board_seesaws,
+                 rows: int = constants.board_rows):
+
+        self.seesaws = seesaws
+        self.columns = 2 * seesaws
+        self.rows = rows
+        # number of rows in the cell grid. The two rows above the visible area
+        # can be reached by a too-high stack before the game is lost
+        self.grid_height = rows + 2
+
+        self.colorindex = ColorIndex(self.columns)
+        self.headroom = Headroom(self.columns, rows)
+        self.stacks = [Seesaw(x, self.colorindex, self.headroom, rows)
+                       for x in range(0, self.columns, 2)]
+
+        # flat grid of all cells, position (x,y) is at index x*grid_height + y. The two
+        # columns of a seesaw are rebuilt when its version differs from grid_versions
+        self.grid = [balls.empty_space] * (self.columns * self.grid_height)
+        self.grid_versions = [-1] * len(self.stacks)
+        # neighbourhoods of all cells of the grid, as tuples and bitmasks
+        self.tables = geometry.board(self.columns, self.grid_height)
 
         self.size = size
         self.surf = pygame.Surface(size)
@@ -37,15 +66,11 @@ class Playfield:
         self.alive = True
     
     def print_tilts(self):
-        tilt1 = self.stacks[0].gettilt()
-        tilt2 = self.stacks[1].gettilt()
-        tilt3 = self.stacks[2].gettilt()
-        tilt4 = self.stacks[3].gettilt()
-        print(tilt1, tilt2, tilt3, tilt4)
+        print(*[sesa.gettilt() for sesa in self.stacks])
     
     def print_seesaw_states(self):
         cols = []
-        for i in range(8):
+        for i in range(self.columns):
             cols.append(self.get_seesaw_state(i))
         print(cols)
 
@@ -54,7 +79,7 @@ class Playfield:
             sesa.tick()
 
     def reset(self):
-        self.__init__(self.size)
+        self.__init__(self.size, self.seesaws, self.rows)
     
     def changed(self):
         """trigger a redraw"""
@@ -79,10 +104,15 @@ class Playfield:
 
     def draw(self):
         """draws the Playfield including all Balls. Returns surface."""
+        if (self.seesaws, self.rows) != (constants.board_seesaws, constants.board_rows):
+            raise ValueError("The screen layout is made for {}x{}, can not draw a Playfield of {} "
+                             "seesaws and {} rows. Set SWING_SEESAWS and SWING_ROWS instead".format(
+                                 constants.board_seesaws, constants.board_rows,
+                                 self.seesaws, self.rows))
         self.surf.fill((127,127,127))
         
-        for x in range(4):
-            self.stacks[x].draw(self.surf)
+        for sesa in self.stacks:
+            sesa.draw(self.surf)
         #self.stacks[0].draw(self.surf)
 
         # draw weightdisplay
@@ -96,32 +126,55 @@ class Playfield:
 
     def get_ball_at(self, coords: Tuple[int]):
         """Returns ball at position, or EmptySpace/Blocked if there is no ball at that position. Coords must 
-        be (x,y) with x=0..7 and y=0..7
+        be ints (x,y) with x=0..columns-1 and y=0..rows+1
         Blocked is returned if that position is blocked by the seesaw state, only possible for y=0 or y=1"""
         x,y = coords
-        if x<0 or x>7 or y<0 or y>7:
+        if x<0 or x>=self.columns or y<0 or y>=self.grid_height:
             raise IndexError("can't get Ball from position ({},{})".format(x,y))
 
-        return self.stacks[x//2].get_ball_at_height(y, x%2==0)
+        sesa_index = x >> 1
+        if self.stacks[sesa_index].version != self.grid_versions[sesa_index]:
+            self.refresh_grid(sesa_index)
+        return self.grid[x*self.grid_height + y]
+
+    def get_grid(self):
+        """Returns the up-to-date flat grid of all cells, position (x,y) is at
+        index x*grid_height + y. Read-only, do not modify it."""
+        for sesa_index, sesa in enumerate(self.stacks):
+            if sesa.version != self.grid_versions[sesa_index]:
+                self.refresh_grid(sesa_index)
+        return self.grid
+
+    def refresh_grid(self, sesa_index: int):
+        """Rebuilds the grid cells of both columns of a seesaw"""
+        sesa = self.stacks[sesa_index]
+        grid_height = self.grid_height
+        for x, stack, left in ((sesa.xleft, sesa.stackleft, True),
+                               (sesa.xleft+1, sesa.stackright, False)):
+            blockedheight = round_half_up(sesa.get_blocked_height(left))
+            emptyheight = grid_height - blockedheight - len(stack)
+            column = [balls.blocked_space] * blockedheight + stack + [balls.empty_space] * emptyheight
+            self.grid[x*grid_height:(x+1)*grid_height] = column[:grid_height]
+        self.grid_versions[sesa_index] = sesa.version
 
     def column_is_empty(self, column:int):
-        if column<0 or column>7:
+        if column<0 or column>=self.columns:
             raise ValueError(   "Trying to get empty-status of column{}, "
-                                "only 0..7 possible".format(column))
+                                "only 0..{} possible".format(column, self.columns-1))
         sesa = column//2
         return self.stacks[sesa].isempty(column%2==0)
     
     def add_on_top(self, ball, column):
         """add a Ball on top of a stack, do not trigger anything"""
-        if column<0 or column>7:
+        if column<0 or column>=self.columns:
             raise ValueError("Wrong column {}".format(column))
         self.stacks[column//2].add_on_top(ball, column%2==0)
 
     def get_weight_of_column(self, column:int):
-        """Returns total weight of the stack in given column 0..7."""
-        if column<0 or column>7:
+        """Returns total weight of the stack in given column."""
+        if column<0 or column>=self.columns:
             raise ValueError("Trying to get weight of column {}, "
-                             "only 0..7 possible".format(column))
+                             "only 0..{} possible".format(column, self.columns-1))
         
         x = column//2 # 0..3 possible
         sesa = self.stacks[x]
@@ -129,48 +182,59 @@ class Playfield:
         return sesa.getweight(x%2==0)
 
     def check_alive(self):
-        """False if any stack is too high. Max 6-8 balls per stack are allowed,
-        depending on seesaw tilt position. Moving seesaws never trigger a loss"""
-        for sesa in self.stacks:
-            if not sesa.check_alive():
-                return False
-        return True
+        """False if any stack is too high. Max rows-2 to rows balls per stack are allowed,
+        depending on seesaw tilt position. Moving seesaws never trigger a loss.
+        Constant time, the seesaws keep the headroom up to date"""
+        return not self.headroom.overfull
     
     def land_ball(self, ball: balls.Ball, coords: Tuple[int]):
-        """Land a ball at coords. Triggers a status update. x=0..7"""
+        """Land a ball at coords. Triggers a status update. x=0..columns-1"""
         x = coords[0]
         sesa = self.stacks[x//2]
         sesa.land_ball(x%2==0, ball)
         
     def land_ball_in_column(self, ball: balls.Ball, x: int):
-        """Land a ball in specified column on top of the stack. x=0..7. 
+        """Land a ball in specified column on top of the stack. x=0..columns-1. 
         Does not trigger on-land effects."""
         self.stacks[x//2].add_on_top(ball, x%2==0)
         self.refresh_status()
 
     def trigger_explosion(self, coords: Tuple[int]):
-        """Trigger an explosion centered at given position."""
-        ongoing.draw_explosion(coords)
+        """Trigger an explosion centered at given position. Bombs in the 3x3 area explode
+        as well, and so on. The full blast area is collected first, then all Balls in it are
+        removed at once. Balls above the blast fall down as one FallingBall per segment.
+        Does not refresh the status."""
         x,y = coords
-        x = round(x)
-        y = round(y)
-        self.remove_ball_at((x,y))
-        # area of the explosion, respect boundaries
-        coords_to_blowup = []
-        for x2 in range(x-1,x+2):
-            if x2<0 or x2>7:
-                continue
-            for y2 in range(y+1,y-2,-1):
-                if y2<0 or y2>7:
-                    continue
-                coords_to_blowup.append([x2,y2])
-        
-        for position in coords_to_blowup:
-            ball_there = self.get_ball_at(position)
-            if isinstance(ball_there, balls.Bomb):
-                self.trigger_explosion(position)
-            self.remove_ball_at(position)
-        
+        tables = self.tables
+        grid = self.get_grid()
+        start = tables.cell(round_half_up(x), round_half_up(y))
+        exploding = [start]
+        exploded = 1 << start
+        blast = 1 << start
+        # worklist of Bombs that still have to explode. Each cell explodes only once
+        while exploding:
+            cell = exploding.pop()
+            ongoing.draw_explosion(tables.coords[cell])
+            metrics.explosions.inc()
+            blast |= tables.blast_masks[cell]
+            for other in tables.blasts[cell]:
+                if not (exploded >> other) & 1 and isinstance(grid[other], balls.Bomb):
+                    exploded |= 1 << other
+                    exploding.append(other)
+
+        if eventlog.enabled(eventlog.INFO):
+            eventlog.info("explosion", x=tables.coords[start][0], y=tables.coords[start][1],
+                          bombs=bin(exploded).count("1"),
+                          cells=bin(blast).count("1"))
+
+        # one batched removal per seesaw, cells without a Ball are ignored by remove_balls
+        for sesa in self.stacks:
+            leftmask = geometry.column_bits(blast, sesa.xleft, self.grid_height)
+            rightmask = geometry.column_bits(blast, sesa.xleft+1, self.grid_height)
+            if leftmask or rightmask:
+                drop_segments(sesa.remove_balls(leftmask=leftmask, rightmask=rightmask))
+        self.changed()
+
     
     def refresh_status(self):
         """Checks if anything needs to start now. Performs weight-check, 
@@ -182,6 +246,12 @@ class Playfield:
                 self.check_combining()
         
         if not self.check_alive():
+            if self.alive:
+                metrics.games_lost.inc()
+                if eventlog.enabled(eventlog.WARNING):
+                    eventlog.warning("death", score=game.score, level=game.level,
+                                     balls_dropped=game.balls_dropped,
+                                     columns=sorted(self.headroom.overfull))
             self.alive = False
 
     def update_weights(self):
@@ -217,67 +287,46 @@ class Playfield:
         Checks bottom-up, only the lowest row with a horizontal-three is checked, only the leftmost Three is found.
         """
 
+        grid = self.get_grid()
+        grid_height = self.grid_height
         # lowest row can never Score. Start at height 1
-        for y in range(1,8):
-            for x in range(1,7): # x=1..6 makes sure that (x +/- 1) stays in-bound 0..7
-                the_ball = self.get_ball_at((x,y))
+        for y in range(1, self.rows):
+            for x in range(1, self.columns-1): # makes sure that (x +/- 1) stays in-bound
+                the_ball = grid[x*grid_height + y]
                 if not isinstance(the_ball, balls.Ball):
                     continue
                 
                 # TODO check Joker, Heart, Star
 
-                left_neighbor = self.get_ball_at((x-1,y))
+                left_neighbor = grid[(x-1)*grid_height + y]
                 if not left_neighbor.matches_color(the_ball):
                     continue
-                right_neighbor = self.get_ball_at((x+1,y))
+                right_neighbor = grid[(x+1)*grid_height + y]
                 if right_neighbor.matches_color(the_ball):
                     ongoing.start_score((x,y))
                     return True
         return False
 
     def check_combining(self):
-        """Checks the full gameboard for vertical Fives. Only one per stack is possible. 
-        Combines if one is found, and creates an Ongoing.Combining. Returns True if any are found"""
-        return False
-        # obsolete code below
-        #print("Entering full Combining check")
-        for x in range(8):
-            for y in range(0, 4):
-                this_color = self.content[x][y].getcolor()
-                if this_color == -1:
-                    continue
-                # if this point is reached, the current ball is a Colored_Ball. All others have the 
-                # attribute color==-1
-                total_weight = self.content[x][y].getweight()
-                
-                # five balls are needed: y, y+1, ..., y+4. If this loop reaches y+5, do not check 
-                # the (y+5)-position, but Combine instead
-                for check_height in range(y+1, y+6):
-                    if check_height == y+5:
-                        ret = True
-                        self.content[x][y] = ColoredBall(this_color, total_weight)
-                        ongoing.eventQueue.append(ongoing.Combining((x,y), this_color, total_weight))
-                        self.content[x][y+1] = EmptySpace()
-                        self.content[x][y+2] = EmptySpace()
-                        self.content[x][y+3] = EmptySpace()
-                        self.content[x][y+4] = EmptySpace()
-                        break
-                    
-                    if self.content[x][check_height].getcolor() != this_color:
-                        break 
-                    
-                    total_weight += self.content[x][check_height].getweight()
-        
+        """Checks for vertical runs of constants.combining_minimum (or more) Balls of the same
+        color. Each run combines into its lowest Ball, which gets the total weight, and an
+        ongoing.Combining is created. Only the columns flagged by the colorindex are looked at.
+        Returns True if any are found"""
+        ret = False
+        for column in self.colorindex.take_combinable():
+            if self.stacks[column//2].combine_runs(column%2 == 0):
+                ret = True
+
         if ret:
-            self.check_hanging_balls()
             self.changed()
-        
+            self.refresh_status()
         return ret
     
     def finalize_scoring(self, balls: list):
-        """Remove all the (marked) balls supplied"""
+        """Remove all the (marked) balls supplied, in one pass per seesaw"""
+        to_remove = {id(ball) for ball in balls}
         for sesa in self.stacks:
-            sesa.remove_scored_balls(balls)
+            drop_segments(sesa.remove_balls(to_remove))
 
     
     def get_number_of_balls(self):
@@ -288,56 +337,263 @@ class Playfield:
             ret += sesa.get_number_of_balls()
 
         return ret
-    
+
+    def snapshot(self):
+        """Returns the state of the Playfield as packed bytes, see packing.encode_board().
+        Only meaningful while nothing is moving. Can be handed to restore()."""
+        return packing.encode_board(self)
+
+    def restore(self, state: bytes):
+        """Puts the Playfield into a state previously returned by snapshot()."""
+        for sesa, sesa_state in zip(self.stacks, packing.decode_board(state)):
+            sesa.restore(sesa_state)
+        self.alive = self.check_alive()
+        self.changed()
+
+    def columns_at_risk(self, margin: int = 0):
+        """Returns the columns whose stack can take at most margin more Balls before the
+        game is lost, lowest column first. Overfull columns of a moving seesaw are included."""
+        return [column for column, free in enumerate(self.headroom.free) if free <= margin]
+
+    def positions_of_color(self, color: int):
+        """Returns the coords (x,y) of all ColoredBalls of that color lying in the Playfield.
+        Costs O(number of matches), no scan of the stacks."""
+        ret = []
+        for column, index in self.colorindex.get_positions(color):
+            sesa = self.stacks[column//2]
+            ret.append((column, index + round_half_up(sesa.get_blocked_height(column%2==0))))
+        return ret
+
+    def recolor_ball_at(self, coords: Tuple[int], color: int):
+        """Sets the color of the ColoredBall at coords. Balls lying in the Playfield must
+        be re-colored with this (or apply_to_color), so that the color index stays correct."""
+        ball = self.get_ball_at(coords)
+        if not isinstance(ball, balls.ColoredBall):
+            raise ValueError("No ColoredBall to re-color at {}".format(coords))
+        sesa = self.stacks[coords[0]//2]
+        index = coords[1] - round_half_up(sesa.get_blocked_height(coords[0]%2==0))
+        self.colorindex.recolor(coords[0], index, color)
+        ball.setcolor(color)
+        sesa.mutated()
+        self.changed()
+
+    def apply_to_color(self, color: int, effect):
+        """Calls effect(ball, coords) for every ColoredBall of that color, then refreshes the
+        status once. The effect may change color and weight of the ball, but not add or remove
+        balls. Meant for color-wide Specials like Zap or Color Joker. Returns the number of balls."""
+        positions = self.positions_of_color(color)
+        touched_columns = set()
+        for coords in positions:
+            effect(self.get_ball_at(coords), coords)
+            touched_columns.add(coords[0])
+        for column in touched_columns:
+            sesa = self.stacks[column//2]
+            left = column%2 == 0
+            self.colorindex.reindex_column(column, sesa.stackleft if left else sesa.stackright)
+            sesa.mutated()
+        if positions:
+            self.changed()
+            self.refresh_status()
+        return len(positions)
+
+    def remove_color(self, color: int):
+        """Removes all ColoredBalls of that color in one go, balls above them start falling.
+        Refreshes the status once. Returns the number of removed balls."""
+        to_remove = [self.get_ball_at(coords) for coords in self.positions_of_color(color)]
+        if to_remove:
+            self.finalize_scoring(to_remove)
+            self.changed()
+            self.refresh_status()
+        return len(to_remove)
+
     def get_seesaw_state(self, column: int):
-        """Returns current tilt status of column (0..7) as int. -1, 0 or +1 for
+        """Returns current tilt status of column as int. -1, 0 or +1 for
         low, balanced, high. If moving, rounded towards nearest position."""
         sesa = self.stacks[column//2]
         raw_tilt = sesa.gettilt()
         left = column%2 == 0
         # tilt is -1 for heavier left and +1 for heavier right. Right is negative raw_tilt
         if left:
-            return round(raw_tilt)
+            return round_half_up(raw_tilt)
         else:
-            return round(-raw_tilt)
+            return round_half_up(-raw_tilt)
     
     def remove_ball_at(self, coords:Tuple[int]):
         """remove a ball from specified position. If there is already no ball, do nothing. If the position
         is Blocked, raises GameStateError"""
         x,y = coords
-        if x<0 or x>7 or y<0:
-            raise ValueError("Trying to remove ball from position "+coords+", that is out of bounds")
+        if x<0 or x>=self.columns or y<0:
+            raise ValueError("Trying to remove ball from position {}, that is out of bounds".format(coords))
 
         sesa = self.stacks[x//2]
         sesa.remove_ball_at(coords)
 
     def landing_height_of_column(self, column: int):
-        """Returns the height of the lowest EmptySpace position of a column. Possible values are 1..8"""
+        """Returns the height of the lowest EmptySpace position of a column. Possible values are 1..rows"""
         sesa = self.stacks[column//2]
         return sesa.landing_height(column%2==0)
 
     def get_top_ball(self, column: int):
         """returns highest ball in the stack, or BlockedSpace if the stack is empty"""
-        if column<0 or column>7:
+        if column<0 or column>=self.columns:
             raise ValueError("Can not get top of ball of stack {},"
-                             "only 0..7 possible".format(column))
+                             "only 0..{} possible".format(column, self.columns-1))
         if self.column_is_empty(column):
-            return balls.BlockedSpace()
+            return balls.blocked_space
         else:
             return self.stacks[column//2].get_top_ball(column%2==0)
 
+    def top_ball_height(self, column: int):
+        """Returns the height of the highest ball in the stack, the one a falling Ball lands on.
+        The falling Ball can be below the landing height by up to a tile (more while the seesaw
+        tilts up), so its own height-1 can be out of bounds. Call only on a stack with balls"""
+        return round_half_up(self.landing_height_of_column(column)) - 1
+
+class ColorIndex:
+    """Index from color to the positions of all ColoredBalls of that color. Positions are
+    (column, index in the stack), independent of the tilt. Kept up to date by the Seesaws.
+    Also tracks the length of same-color runs in each column, and flags the columns
+    where a run reached constants.combining_minimum.
+    Constructor: ColorIndex(number_of_columns)"""
+
+    def __init__(self, columns: int):
+        self.positions = {}  # color -> set of (column, index)
+        self.columns = [[] for _ in range(columns)] # color per stack index, -1 for non-ColoredBalls
+        # per stack index the length of the same-color run ending there, 0 for non-ColoredBalls
+        self.runs = [[] for _ in range(columns)]
+        self.combinable = set() # columns that might hold a run long enough to combine
+
+    def get_positions(self, color: int):
+        return self.positions.get(color, ())
+
+    def append(self, column: int, ball: balls.Ball):
+        """a ball was put on top of the stack in column"""
+        colors = self.columns[column]
+        color = ball.getcolor() if isinstance(ball, balls.ColoredBall) else -1
+        if color >= 0:
+            self.positions.setdefault(color, set()).add((column, len(colors)))
+        colors.append(color)
+        self.runs[column].append(0)
+        self.update_runs(column, len(colors) - 1)
+
+    def pop(self, column: int):
+        """the top ball of the stack in column was removed"""
+        colors = self.columns[column]
+        color = colors.pop()
+        self.runs[column].pop()
+        if color >= 0:
+            self.positions[color].discard((column, len(colors)))
+
+    def recolor(self, column: int, index: int, newcolor: int):
+        colors = self.columns[column]
+        oldcolor = colors[index]
+        if oldcolor >= 0:
+            self.positions[oldcolor].discard((column, index))
+        self.positions.setdefault(newcolor, set()).add((column, index))
+        colors[index] = newcolor
+        self.update_runs(column, index)
+
+    def update_runs(self, column: int, start: int):
+        """recalculates the run lengths of column from stack index start upwards"""
+        colors = self.columns[column]
+        runs = self.runs[column]
+        for index in range(start, len(colors)):
+            color = colors[index]
+            if color < 0:
+                runs[index] = 0
+                continue
+            if index > 0 and colors[index-1] == color:
+                runs[index] = runs[index-1] + 1
+            else:
+                runs[index] = 1
+            if runs[index] >= constants.combining_minimum:
+                self.combinable.add(column)
+
+    def long_runs(self, column: int):
+        """Returns (start index, length) of every run in column that is long enough to combine"""
+        runs = self.runs[column]
+        ret = []
+        for index, run in enumerate(runs):
+            run_ends = index + 1 == len(runs) or runs[index+1] <= run
+            if run >= constants.combining_minimum and run_ends:
+                ret.append((index - run + 1, run))
+        return ret
+
+    def take_combinable(self):
+        """Returns the flagged columns, lowest first, and clears the flags"""
+        ret = sorted(self.combinable)
+        self.combinable.clear()
+        return ret
+
+    def reindex_column(self, column: int, stack: list):
+        """the stack in column was changed in some other way, re-index all of it"""
+        while self.columns[column]:
+            self.pop(column)
+        for ball in stack:
+            self.append(column, ball)
+
+
+class Headroom:
+    """Number of Balls each column can still take before the game is lost, and the set of
+    overfull columns of resting seesaws. Kept up to date by the Seesaws.
+    Constructor: Headroom(number_of_columns, rows=constants.board_rows)"""
+
+    def __init__(self, columns: int, rows: int = constants.board_rows):
+        self.free = [rows - 1] * columns
+        self.overfull = set()
+
+    def update(self, column: int, free: int, resting: bool):
+        self.free[column] = free
+        if free < 0 and resting:
+            self.overfull.add(column)
+        else:
+            self.overfull.discard(column)
+
+
 class Seesaw:
-    """A pair of two connected stacks in the playfield."""
-    def __init__(self, xleft):
-        self.tilt = 0.0 # 0 for balanced, #-1 for heavier left
-                        # side, +1 for heavier right side
+    """A pair of two connected stacks in the playfield. The colorindex and the headroom
+    are updated whenever the stacks change. The tilt is counted in integer steps, see
+    constants.tilting_steps_per_unit"""
+    def __init__(self, xleft, colorindex: ColorIndex = None, headroom: Headroom = None,
+                 rows: int = constants.board_rows):
+        self.tilt_steps = 0 # 0 for balanced, -tilting_steps_per_unit for heavier left
+                            # side, +tilting_steps_per_unit for heavier right side
         self.weightleft = 0
         self.weightright = 0
         self.stackleft = [] # first is lowest, last is highest Ball
         self.stackright = [] # first is lowest, last is highest Ball
         self.moving = False
         self.xleft = xleft
+        self.rows = rows
+        self.version = 0    # increased on every change of stacks or tilt
+        if colorindex is None:
+            colorindex = ColorIndex(xleft + 2)
+        self.colorindex = colorindex
+        if headroom is None:
+            headroom = Headroom(xleft + 2, rows)
+        self.headroom = headroom
     
+    def mutated(self):
+        """Call after changing stacks or tilt, invalidates cached views like the Playfield grid"""
+        self.version += 1
+        self.update_headroom()
+
+    def max_stack_heights(self):
+        """Allowed number of Balls (left, right) for the current tilt: as many as there are
+        rows on the lower side, two less on the higher side, one less each if balanced"""
+        rows = self.rows
+        if self.tilt_steps == -constants.tilting_steps_per_unit:
+            return rows, rows - 2
+        elif self.tilt_steps == 0:
+            return rows - 1, rows - 1
+        else:
+            return rows - 2, rows
+
+    def update_headroom(self):
+        maxleft, maxright = self.max_stack_heights()
+        self.headroom.update(self.xleft, maxleft - len(self.stackleft), not self.moving)
+        self.headroom.update(self.xleft+1, maxright - len(self.stackright), not self.moving)
+
     def ismoving(self):
         return self.moving
     
@@ -364,10 +620,15 @@ class Seesaw:
             stack = self.stackleft
         else:
             stack = self.stackright
-        blockedheight = self.get_blocked_height(left)
-        for y,ball in enumerate(stack):
-            if isinstance(ball, balls.Bomb):
-                ball.explode((self.xleft+(1-left), y+blockedheight))
+        x = self.xleft+(1-left)
+        blockedheight = round_half_up(self.get_blocked_height(left))
+        bomb_heights = [y+blockedheight for y,ball in enumerate(stack) if isinstance(ball, balls.Bomb)]
+        # an earlier explosion may already have taken a later Bomb with it
+        for y in bomb_heights:
+            if isinstance(game.playfield.get_ball_at((x,y)), balls.Bomb):
+                game.playfield.trigger_explosion((x,y))
+        if bomb_heights:
+            game.playfield.refresh_status()
         
     def check_gravity(self):
         """Sets state to moving if weights dont fit 
@@ -377,14 +638,18 @@ class Seesaw:
             return False
         
         if self.weightleft > self.weightright:
-            target_tilt = -1.0
+            target_tilt = -1
         elif self.weightleft == self.weightright:
-            target_tilt = 0.0
+            target_tilt = 0
         else:
-            target_tilt = 1.0
+            target_tilt = 1
         
-        if target_tilt != self.tilt:
+        if target_tilt * constants.tilting_steps_per_unit != self.tilt_steps:
             self.moving = True
+            if eventlog.enabled(eventlog.DEBUG):
+                eventlog.debug("tilt", seesaw=self.xleft // 2, target=target_tilt,
+                               left=self.weightleft, right=self.weightright)
+            self.update_headroom()
         
         return self.moving
 
@@ -397,15 +662,30 @@ class Seesaw:
     
     def gettilt(self):
         """-1 for heavier left, 0 for balanced, 
-        +1 for heavier right. Can have any float value 
-        between -1.0 and +1.0."""
+        +1 for heavier right. Can have any value 
+        between -1 and +1, as an exact Fraction."""
         return self.tilt
+
+    @property
+    def tilt(self):
+        return Fraction(self.tilt_steps, constants.tilting_steps_per_unit)
+
+    @tilt.setter
+    def tilt(self, value):
+        self.tilt_steps = round_half_up(Fraction(value) * constants.tilting_steps_per_unit)
     
     def add_on_top(self, ball: balls.Ball, left: bool):
         if left:
             self.stackleft.append(ball)
         else:
             self.stackright.append(ball)
+        self.colorindex.append(self.xleft + (not left), ball)
+        self.mutated()
+
+    def reindex(self):
+        """re-index both stacks in the colorindex, after changing them in bulk"""
+        self.colorindex.reindex_column(self.xleft, self.stackleft)
+        self.colorindex.reindex_column(self.xleft+1, self.stackright)
     
     def get_top_ball(self, left: bool):
         if left:
@@ -420,23 +700,23 @@ class Seesaw:
             stack = self.stackleft
         else:
             stack = self.stackright
-        blockedheight = round(self.get_blocked_height(left))
-        height = round(height)
+        blockedheight = round_half_up(self.get_blocked_height(left))
+        height = round_half_up(height)
         if height < blockedheight:
-            return balls.BlockedSpace()
+            return balls.blocked_space
         elif height >= blockedheight + len(stack):
-            return balls.EmptySpace()
+            return balls.empty_space
         else:
             return stack[height-blockedheight]
     
     
     def get_blocked_height(self, left: bool):
-        """Returns the number of blocked space at the bottom as float. 
-        Must be round()'ed to get integer 0,1,2"""
+        """Returns the number of blocked space at the bottom as exact Fraction. 
+        Must be round_half_up()'ed to get integer 0,1,2"""
         if left:
-            return 1.0 + self.tilt
+            return 1 + self.tilt
         else:
-            return 1.0 - self.tilt
+            return 1 - self.tilt
 
     def update_weight(self):
         """calculates total weight of both sides, 
@@ -454,40 +734,63 @@ class Seesaw:
             return
         
         game.playfield.changed()
+        self.mutated()
+        step = constants.tilting_steps_per_tick
+        full = constants.tilting_steps_per_unit
         # if left is heavier, reduce tilt
         if self.weightleft > self.weightright:
-            self.tilt -= constants.tilting_per_tick
-            if self.tilt <= -1.0:
-                self.tilt = -1.0
+            self.tilt_steps -= step
+            if self.tilt_steps <= -full:
+                self.tilt_steps = -full
                 self.finalize_tilting()
         # if weights are equal, move tilt towards zero
         elif self.weightleft == self.weightright:
-            if self.tilt > 0.0:
-                self.tilt -= constants.tilting_per_tick
-                if self.tilt <= 0.0:
-                    self.tilt = 0.0
+            if self.tilt_steps > 0:
+                self.tilt_steps -= step
+                if self.tilt_steps <= 0:
+                    self.tilt_steps = 0
                     self.finalize_tilting()
             else:    
-                self.tilt += constants.tilting_per_tick
-                if self.tilt >= 0.0:
-                    self.tilt = 0.0
+                self.tilt_steps += step
+                if self.tilt_steps >= 0:
+                    self.tilt_steps = 0
                     self.finalize_tilting()
         # if right is heavier, increase tilt
         else:
-            self.tilt += constants.tilting_per_tick
+            self.tilt_steps += step
             # check if finished tilting to the right
-            if self.tilt >= 1.0:
-                self.tilt = 1.0
+            if self.tilt_steps >= full:
+                self.tilt_steps = full
                 self.finalize_tilting()
 
+    def ticks_until_rest(self):
+        """Number of tick()s until the moving seesaw reaches its final tilt, the last one
+        included. Weights are expected not to change meanwhile"""
+        target = constants.tilting_steps_per_unit * (
+            (self.weightright > self.weightleft) - (self.weightright < self.weightleft))
+        distance = abs(target - self.tilt_steps)
+        return max(1, -(-distance // constants.tilting_steps_per_tick))
+
+    def skip_tilting(self, ticks: int):
+        """Tilts on for ticks, like that many tick()s. ticks must be less than
+        ticks_until_rest()"""
+        target = constants.tilting_steps_per_unit * (
+            (self.weightright > self.weightleft) - (self.weightright < self.weightleft))
+        direction = (target > self.tilt_steps) - (target < self.tilt_steps)
+        self.tilt_steps += direction * ticks * constants.tilting_steps_per_tick
+        game.playfield.changed()
+        self.mutated()
+
     def finalize_tilting(self):
         self.moving = False
+        self.update_headroom()
         game.playfield.refresh_status()
     
     def draw(self, surf: pygame.Surface):
         """Draw the two stacks onto surf"""
         
-        blocked_height_left = 1.0 + self.tilt
+        tilt = float(self.tilt)
+        blocked_height_left = 1.0 + tilt
         blockedcolor = (0,0,0)
 
         #print("tilt:", self.tilt)
@@ -506,10 +809,10 @@ class Seesaw:
         pygame.draw.rect(surf, blockedcolor, pygame.Rect(blocked_topleft, (width, height)))
         # left stack of balls
         for y,ball in enumerate(self.stackleft):
-            coords = pixel_coord_in_playfield((self.xleft, 1+self.tilt+y))
+            coords = pixel_coord_in_playfield((self.xleft, 1+tilt+y))
             ball.draw(surf, coords)
         
-        blocked_height_right = 1.0 - self.tilt
+        blocked_height_right = 1.0 - tilt
         blocked_topleft = pixel_coord_in_playfield((self.xleft+1, blocked_height_right-1.0))
         blocked_botright = pixel_coord_in_playfield((self.xleft+1, 0))
 
@@ -522,22 +825,14 @@ class Seesaw:
         pygame.draw.rect(surf, blockedcolor, pygame.Rect(blocked_topleft, (width,height)))
         # right stack of balls
         for y,ball in enumerate(self.stackright):
-            coords = pixel_coord_in_playfield((self.xleft+1, 1-self.tilt+y))
+            coords = pixel_coord_in_playfield((self.xleft+1, 1-tilt+y))
             ball.draw(surf, coords)
 
     def check_alive(self):
         """False if a stack is high enough to trigger a game loss.
-        Max allowed stack height depends on tilt: 6-8."""
-        if self.ismoving():
-            return True
-        stackheight_left = len(self.stackleft)
-        stackheight_right= len(self.stackright)
-        if self.tilt == -1.0:
-            return stackheight_left <= 8 and stackheight_right <= 6
-        elif self.tilt == 0.0:
-            return stackheight_left <= 7 and stackheight_right <= 7
-        else:
-            return stackheight_left <= 6 and stackheight_right <= 8
+        Max allowed stack height depends on tilt, see max_stack_heights()."""
+        overfull = self.headroom.overfull
+        return self.xleft not in overfull and self.xleft+1 not in overfull
     
     def throw_top_ball(self):
         """if weights differ, throw top ball of lighter side.
@@ -548,21 +843,93 @@ class Seesaw:
         if weightdiff > 0:
             lightstack = self.stackleft
             origin_x = self.xleft
-            origin_y = round(self.landing_height(True)) - 1
+            origin_y = round_half_up(self.landing_height(True)) - 1
         else:
             lightstack = self.stackright
             origin_x = self.xleft + 1
-            origin_y = round(self.landing_height(False)) - 1
+            origin_y = round_half_up(self.landing_height(False)) - 1
         if 0 == len(lightstack):
             return
         
-        ongoing.throw_ball(lightstack.pop(), (origin_x, origin_y), weightdiff)
+        thrown = lightstack.pop()
+        self.colorindex.pop(origin_x)
+        self.mutated()
+        ongoing.throw_ball(thrown, (origin_x, origin_y), weightdiff)
         
     def get_number_of_balls(self):
         """Returns total number of balls on both sides of the seesaw. Not 
         counting falling Balls."""
         return len(self.stackleft) + len(self.stackright)
-    
+
+    def restore(self, state):
+        """Takes (tilt, leftstack, rightstack) as decoded by packing.decode_board(). Creates
+        new Balls, the seesaw is not moving afterwards."""
+        tilt, left, right = state
+        self.tilt = tilt
+        self.stackleft = packing.decode_stack(left)
+        self.stackright = packing.decode_stack(right)
+        self.moving = False
+        self.update_weight()
+        self.reindex()
+        self.mutated()
+
+    def remove_balls(self, to_remove=(), leftmask: int = 0, rightmask: int = 0):
+        """Removes Balls from both stacks, each stack is rebuilt in one pass. A Ball is removed
+        if its id() is in to_remove (a set), or if the bit of its height is set in the
+        mask of its side (bit y for position y in the Playfield).
+        Balls above a removed one are taken out as well, they are returned as falling
+        segments: a list of (column, starting_height, balls), one entry per run of Balls
+        without a gap. Lowest Ball first. Spawning FallingBalls is up to the caller,
+        see drop_segments()."""
+        segments = []
+        for left, mask in ((True, leftmask), (False, rightmask)):
+            stack = self.stackleft if left else self.stackright
+            column = self.xleft if left else self.xleft+1
+            blocked_height = self.get_blocked_height(left)
+            mask >>= round_half_up(blocked_height)  # now bit i is stack index i
+            kept = []
+            segment = None
+            removed_any = False
+            for index, ball in enumerate(stack):
+                if (mask >> index) & 1 or id(ball) in to_remove:
+                    removed_any = True
+                    segment = None
+                elif not removed_any:
+                    kept.append(ball)
+                else:
+                    if segment is None:
+                        segment = (column, blocked_height + index, [])
+                        segments.append(segment)
+                    segment[2].append(ball)
+            if removed_any:
+                stack[:] = kept
+                self.colorindex.reindex_column(column, stack)
+        self.mutated()
+        return segments
+
+    def combine_runs(self, left: bool):
+        """Combines every long run of same-colored Balls in one stack into the lowest Ball of
+        the run. The rest of the runs is removed in one pass, Balls above fall down.
+        Runs that are still part of a Scoring are left alone. Returns True if anything combined"""
+        stack = self.stackleft if left else self.stackright
+        column = self.xleft if left else self.xleft+1
+        blocked_height = round_half_up(self.get_blocked_height(left))
+        to_remove = set()
+        for start, length in self.colorindex.long_runs(column):
+            run = stack[start:start+length]
+            if any(ball.is_scoring() for ball in run):
+                self.colorindex.combinable.add(column)
+                continue
+            total_weight = sum(ball.getweight() for ball in run)
+            run[0].setweight(total_weight)
+            to_remove.update(id(ball) for ball in run[1:])
+            ongoing.start_combining((column, blocked_height + start), run[0].getcolor(),
+                                    total_weight, length)
+        if not to_remove:
+            return False
+        drop_segments(self.remove_balls(to_remove))
+        return True
+
     def remove_ball_at(self, coords: Tuple[int,int]):
         """Remove a ball from specified position. Balls above the removed
         one are converted into FallingBalls.
@@ -570,75 +937,25 @@ class Seesaw:
         x,y = coords
         # x should be either self.xleft or self.xleft+1. If not, 
         # this was called on the wrong seesaw.
-        if x == self.xleft:
-            stack = self.stackleft
-            left = True
-        elif x == self.xleft + 1:
-            stack = self.stackright
-            left = False
-        else:
+        if x != self.xleft and x != self.xleft + 1:
             raise ValueError("remove_ball_at called on wrong seesaw")
-        if y < 0 or y > 9:
+        if y < 0 or y > self.rows + 1:
             raise ValueError("Can not remove Ball from that height."
-                             "coords="+coords)
+                             "coords={}".format(coords))
         
-        blocked_height = self.get_blocked_height(left)
-        #y -= blockedheight
-        height_to_remove = round(y - blocked_height)
-        
-        if height_to_remove < 0 or height_to_remove >= len(stack):
-            return
-        
-        # if not moving, this removes just one ball from the list. 
-        # Convert any above the removed one into FallingBalls
-    
-        stack.pop(height_to_remove)
-        for height,ball in enumerate(stack[height_to_remove-1:]):# this iterates over a copy
-                                                # so modifying is ok
-            stack.remove(ball)
-            ongoing.ball_falls_from_height(ball, x, height+blocked_height+1)
-        # if moving, do nothing for now.
+        # if moving, the position is rounded to the nearest one
+        y = round_half_up(y)
+        if x == self.xleft:
+            drop_segments(self.remove_balls(leftmask=1 << y))
         else:
-            pass
+            drop_segments(self.remove_balls(rightmask=1 << y))
 
     def remove_scored_balls(self, list_to_remove: list):
         """Remove marked balls that are in the list, drop hanging balls"""
-        # left
-        blocked_height = self.get_blocked_height(True)
-        # bottom-up
-        extra_height = 0
-        for y,ball in enumerate(self.stackleft[:]): # iterate over a copy
-                                                    # so modifying is ok
-            if ball in list_to_remove:
-                self.stackleft.remove(ball)
-                extra_height += 1
-            elif extra_height > 0:  # once something was removed, all above
-                                    # must fall if not removed
-                self.stackleft.remove(ball)
-                ongoing.ball_falls_from_height(ball, self.xleft, 
-                                blocked_height + y + extra_height)
-        
-        # right
-        blocked_height = self.get_blocked_height(False)
-        # bottom-up
-        extra_height = 0
-        for y,ball in enumerate(self.stackright[:]): # iterate over a copy
-            if ball in list_to_remove:
-                self.stackright.remove(ball)
-                extra_height += 1
-            elif extra_height > 0:
-                self.stackright.remove(ball)
-                ongoing.ball_falls_from_height(ball, self.xleft+1,
-                                blocked_height + y + extra_height)
+        drop_segments(self.remove_balls({id(ball) for ball in list_to_remove}))
 
 
-        
-        # right
-        blocked_height = self.get_blocked_height(False)
-        # bottom-up
-        for ball in self.stackright:
-            if ball in list_to_remove:
-                self.stackright.remove(ball)
-        
-
-                
\ No newline at end of file
+def drop_segments(segments: list):
+    """Lets falling segments as returned by Seesaw.remove_balls() fall"""
+    for column, height, segment in segments:
+        ongoing.segment_falls_from_height(segment, column, height)
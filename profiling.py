@@ -0,0 +1,169 @@
+# provides runtime profiling for the main loop: a cProfile capture that is started and
+# stopped with a key, and a watchdog for frames that take longer than a budget. For every
+# slow frame the watchdog writes a report with the game state and a sample of the Python
+# stack, taken by a background thread while the frame was still running.
+# Files go to the folder in SWING_PROFILE_DIR, default "profiles".
+
+# shorts:
+# - ProfileCapture.toggle() starts profiling, or stops it and writes a .pstats file
+# - SlowFrameWatchdog(budget) call frame_started() / frame_finished() around every frame
+# - capture_state() the game state as a dict that can be dumped as JSON
+
+import collections
+import cProfile
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+import balls
+import game
+import ongoing
+
+profile_folder = os.environ.get("SWING_PROFILE_DIR", "profiles")
+
+
+def _timestamp():
+    return datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+
+def describe_ball(ball):
+    if isinstance(ball, balls.ColoredBall):
+        return "ColoredBall({},{})".format(ball.getcolor(), ball.getweight())
+    return type(ball).__name__
+
+
+def capture_state():
+    """The state of the game: level, score, the stacks of all seesaws, the ongoing events
+    by type, and the Playfield snapshot (see Playfield.restore()) as hex, None if the
+    Playfield can not be packed right now"""
+    seesaws = []
+    for sesa in game.playfield.stacks:
+        seesaws.append({
+            "xleft": sesa.xleft,
+            "tilt": float(sesa.gettilt()),
+            "moving": sesa.ismoving(),
+            "left": [describe_ball(ball) for ball in sesa.stackleft],
+            "right": [describe_ball(ball) for ball in sesa.stackright],
+        })
+    try:
+        snapshot = game.playfield.snapshot().hex()
+    except ValueError:
+        snapshot = None
+    events = collections.Counter(type(event).__name__ for event in ongoing.eventQueue)
+    return {
+        "level": game.level,
+        "score": game.score,
+        "balls_dropped": game.balls_dropped,
+        "tick": ongoing.current_tick(),
+        "seesaws": seesaws,
+        "events": dict(events),
+        "number_of_events": ongoing.get_number_of_events(),
+        "snapshot": snapshot,
+    }
+
+
+class ProfileCapture:
+    """cProfile of the running game, switched on and off with toggle(). Vars:
+        folder (str), where the .pstats files are written
+        profile (cProfile.Profile), None while not profiling
+    Constructor: ProfileCapture(folder=profile_folder)
+    """
+
+    __slots__ = ("folder", "profile")
+
+    def __init__(self, folder: str = profile_folder):
+        self.folder = folder
+        self.profile = None
+
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        """Stops profiling, writes the statistics and returns the path of the .pstats file"""
+        self.profile.disable()
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, "profile-{}.pstats".format(_timestamp()))
+        self.profile.dump_stats(path)
+        self.profile = None
+        return path
+
+    def toggle(self):
+        """Starts profiling, or stops it. Returns the .pstats path when stopping, else None"""
+        if self.running():
+            return self.stop()
+        self.start()
+        return None
+
+
+class SlowFrameWatchdog:
+    """Reports frames that take longer than budget seconds. A background thread looks at the
+    running frame every poll seconds and takes a stack sample of the main thread once the
+    budget is exceeded. When the frame finishes, the report is written as JSON. Vars:
+        budget (float), seconds per frame
+        folder (str), where the reports are written
+        max_reports (int), no reports after this many, to keep the disk from filling up
+        reports (list of str), paths of the reports written so far
+    Constructor: SlowFrameWatchdog(budget, folder=profile_folder, max_reports=20). Must be
+        created in the thread that runs the frames. Call stop() at the end.
+    """
+
+    __slots__ = ("budget", "folder", "max_reports", "reports", "poll", "main_thread",
+                 "frame_start", "stack_sample", "stop_event", "thread")
+
+    def __init__(self, budget: float, folder: str = profile_folder, max_reports: int = 20):
+        self.budget = budget
+        self.folder = folder
+        self.max_reports = max_reports
+        self.reports = []
+        self.poll = budget / 4
+        self.main_thread = threading.get_ident()
+        self.frame_start = None
+        self.stack_sample = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._watch, name="frame-watchdog", daemon=True)
+        self.thread.start()
+
+    def _watch(self):
+        while not self.stop_event.wait(self.poll):
+            start = self.frame_start
+            if start is None or self.stack_sample is not None:
+                continue
+            if time.perf_counter() - start > self.budget:
+                frame = sys._current_frames().get(self.main_thread)
+                if frame is not None:
+                    self.stack_sample = traceback.format_stack(frame)
+
+    def frame_started(self):
+        self.stack_sample = None
+        self.frame_start = time.perf_counter()
+
+    def frame_finished(self):
+        """Writes a report if the frame took longer than the budget. Returns its path, else None"""
+        duration = time.perf_counter() - self.frame_start
+        self.frame_start = None
+        if duration <= self.budget or len(self.reports) >= self.max_reports:
+            return None
+        report = {
+            "duration": duration,
+            "budget": self.budget,
+            "stack_sample": self.stack_sample,
+            "state": capture_state(),
+        }
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, "slowframe-{}.json".format(_timestamp()))
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+        self.reports.append(path)
+        return path
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
@@ -0,0 +1,186 @@
+# provides a memoization cache for settled outcomes. Dropping a Ball into a settled Playfield
+# always leads to the same settled Playfield, so bots and rollouts can look the outcome up
+# instead of ticking through every falling and tilting frame again.
+
+# shorts:
+# - resolve_drop(ball, column, cache) drops a ball into the settled game and waits until
+#   everything settled again. Looks up / stores the outcome in the cache.
+# - state_key(ball, column) compact hash of the current game state plus the dropped ball
+
+from collections import OrderedDict
+from typing import NamedTuple
+import hashlib
+import os
+import pickle
+
+import balls
+import game
+import packing
+
+
+class SettledOutcome(NamedTuple):
+    """Result of dropping a Ball into a settled game, once it settled again.
+    state is a Playfield.snapshot(), score_delta the score gained, scorefactor the
+    global score factor afterwards, alive False if the drop lost the game."""
+
+    state: bytes
+    score_delta: float
+    scorefactor: float
+    alive: bool
+
+
+class DiskStore:
+    """On-disk store for SettledOutcomes, one file per key in a directory. Can be shared
+    between the processes of a tournament run, writes are atomic. The files are pickles, and
+    loading a pickle can run arbitrary code: only use a directory that nobody else can write to.
+    Once more than maxfiles files are stored, the least recently written tenth is removed.
+    The count is kept per process, with several writers the directory can grow a bit beyond.
+    Constructor: DiskStore(path, maxfiles=100000), the directory is created if necessary."""
+
+    def __init__(self, path: str, maxfiles: int = 100000):
+        if maxfiles < 1:
+            raise ValueError("DiskStore needs a maxfiles of at least 1")
+        self.path = path
+        self.maxfiles = maxfiles
+        os.makedirs(path, exist_ok=True)
+        self.files = len(self._stored())
+
+    def _stored(self):
+        return [entry for entry in os.scandir(self.path)
+                if entry.is_file() and not entry.name.endswith(".tmp")]
+
+    def _evict(self):
+        """Removes the oldest files until a tenth of maxfiles is free again"""
+        entries = sorted(self._stored(), key=lambda entry: entry.stat().st_mtime_ns)
+        keep = self.maxfiles - max(self.maxfiles // 10, 1)
+        for entry in entries[:max(len(entries) - keep, 0)]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # another process removed it already
+                pass
+        self.files = len(self._stored())
+
+    def _filename(self, key: bytes):
+        return os.path.join(self.path, key.hex())
+
+    def get(self, key: bytes):
+        """Returns the stored outcome, or None if there is none"""
+        try:
+            with open(self._filename(key), "rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key: bytes, outcome: SettledOutcome):
+        # write to a temp file first, other processes must never see half a file
+        tmpname = "{}.{}.tmp".format(self._filename(key), os.getpid())
+        with open(tmpname, "wb") as f:
+            pickle.dump(tuple(outcome), f)
+        if not os.path.exists(self._filename(key)):
+            self.files += 1
+        os.replace(tmpname, self._filename(key))
+        if self.files > self.maxfiles:
+            self._evict()
+
+
+class SettleCache:
+    """Bounded cache of SettledOutcomes with least-recently-used eviction. Counts hits and
+    misses. If a store (e.g. a DiskStore) is given, it is asked on a local miss and every
+    new outcome is written to it.
+    Constructor: SettleCache(maxsize=10000, store=None)"""
+
+    def __init__(self, maxsize: int = 10000, store: DiskStore = None):
+        if maxsize < 1:
+            raise ValueError("SettleCache needs a maxsize of at least 1")
+        self.maxsize = maxsize
+        self.store = store
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: bytes):
+        return key in self.entries
+
+    def get(self, key: bytes):
+        """Returns the outcome stored for key and marks it as recently used.
+        Returns None (and counts a miss) if it is unknown."""
+        outcome = self.entries.get(key)
+        if outcome is None and self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                outcome = SettledOutcome(*stored)
+                self._insert(key, outcome)
+        if outcome is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return outcome
+
+    def put(self, key: bytes, outcome: SettledOutcome):
+        self._insert(key, outcome)
+        if self.store is not None:
+            self.store.put(key, outcome)
+
+    def _insert(self, key: bytes, outcome: SettledOutcome):
+        self.entries[key] = outcome
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries and resets the counters. The store is not touched."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def hitrate(self):
+        """Fraction of get() calls that were hits, 0.0 if there were none"""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+
+def state_key(ball: balls.Ball, column: int):
+    """Compact hash of everything that decides the outcome of dropping ball into
+    column: board size, Playfield content and tilts, level and global score factor.
+    The snapshot alone does not tell the number of rows."""
+    digest = hashlib.blake2b(game.playfield.snapshot(), digest_size=16)
+    digest.update(repr((game.playfield.seesaws, game.playfield.rows, game.level,
+                        game.global_scorefactor, packing.encode_ball(ball), column)).encode())
+    return digest.digest()
+
+
+def resolve_drop(ball: balls.Ball, column: int, cache: SettleCache = None,
+                 maxticks: int = 100000):
+    """Drops ball into column and lets the game settle. Score, score factor and
+    Playfield are updated just like ticking through it. With a cache, a known outcome
+    is applied directly instead. Returns the SettledOutcome.
+    Raises ValueError if the game is not settled when this is called."""
+    if not game.is_settled():
+        raise ValueError("resolve_drop needs a settled game, something is still moving")
+
+    key = None
+    if cache is not None:
+        key = state_key(ball, column)
+        outcome = cache.get(key)
+        if outcome is not None:
+            game.playfield.restore(outcome.state)
+            game.addscore(outcome.score_delta)
+            game.global_scorefactor = outcome.scorefactor
+            game.playfield.alive = outcome.alive
+            return outcome
+
+    score_before = game.getscore()
+    game.ongoing.drop_ball_in_column(ball, column)
+    game.run_until_settled(maxticks, skip_idle=True)
+    outcome = SettledOutcome(game.playfield.snapshot(), game.getscore() - score_before,
+                             game.getscorefactor(), game.playfield.alive)
+    if cache is not None:
+        cache.put(key, outcome)
+    return outcome
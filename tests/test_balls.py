@@ -0,0 +1,79 @@
+# tests the balls module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import game
+import balls
+from balls import ColoredBall, Bomb, Cutter, Heart, EmptySpace, BlockedSpace
+import unittest
+
+
+class TestBalls(unittest.TestCase):
+
+    def test_placeholders_are_singletons(self):
+        """EmptySpace and BlockedSpace exist only once, the Playfield hands out these objects"""
+        game.reset()
+
+        self.assertIs(EmptySpace(), EmptySpace())
+        self.assertIs(BlockedSpace(), balls.blocked_space)
+        self.assertIsNot(EmptySpace(), BlockedSpace())
+        self.assertIs(game.playfield.get_ball_at((0, 0)), balls.blocked_space)
+        self.assertIs(game.playfield.get_ball_at((0, 1)), balls.empty_space)
+
+    def test_balls_have_no_dict(self):
+        """Balls are slot-based, they can not get new attributes"""
+        for ball in [ColoredBall(1, 1), Bomb(), Heart()]:
+            self.assertFalse(hasattr(ball, "__dict__"))
+
+    def test_specials_share_image(self):
+        self.assertIs(Bomb().image, Bomb().image)
+        self.assertIsNot(Bomb().image, Heart().image)
+
+    def test_bomb_chain(self):
+        """Two neighboring Bombs explode each other exactly once. The Balls above the
+        blast fall down together as one segment"""
+        from ongoing import Explosion, FallingBall
+
+        game.reset()
+        the_playfield = game.playfield
+        # seesaw 0 is balanced, lowest free position is 1 on both sides
+        column0 = [ColoredBall(1, 1), Bomb(), ColoredBall(2, 1),
+                   ColoredBall(3, 1), ColoredBall(4, 1), ColoredBall(5, 1)]
+        for ball in column0:
+            the_playfield.add_on_top(ball, 0)
+        the_playfield.add_on_top(Bomb(), 1)
+
+        the_playfield.trigger_explosion((1, 2))
+
+        explosions = [e for e in game.ongoing.eventQueue if isinstance(e, Explosion)]
+        self.assertEqual(3, len(explosions))
+        self.assertTrue(the_playfield.column_is_empty(0))
+        self.assertTrue(the_playfield.column_is_empty(1))
+
+        falling = game.ongoing.get_event_of_type(FallingBall)
+        self.assertEqual(column0[3:], falling.getballs())
+        self.assertEqual(4, falling.getheight())
+        self.assertEqual(1, len([e for e in game.ongoing.eventQueue if isinstance(e, FallingBall)]))
+
+        # the whole segment lands again
+        game.run_until_settled(1000)
+        self.assertEqual(3, the_playfield.get_number_of_balls())
+
+    def test_cutter_cuts_to_the_bottom(self):
+        """A Cutter destroys the whole stack, including the Ball at height 0 of a tilted seesaw"""
+        game.reset()
+        the_playfield = game.playfield
+        the_playfield.land_ball_in_column(ColoredBall(1, 3), 0)
+        the_playfield.land_ball_in_column(ColoredBall(2, 1), 0)
+        game.run_until_settled(1000)
+        self.assertEqual(0, the_playfield.stacks[0].get_blocked_height(True))
+
+        game.ongoing.ball_falls_from_height(Cutter(), 0, 8)
+        game.run_until_settled(1000)
+        self.assertEqual(0, the_playfield.get_number_of_balls())
+
+
+if __name__ == "__main__":
+    unittest.main()
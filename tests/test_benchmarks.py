@@ -0,0 +1,91 @@
+# tests the benchmarks package: scenarios are reproducible and the suite reports statistics
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import json
+import game
+import ongoing
+from benchmarks import compare, scenarios, suite
+import unittest
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_scenarios_are_reproducible(self):
+        """The same seed gives the same board and the same events"""
+        for name, scenario in scenarios.SCENARIOS.items():
+            scenario(7)
+            first = (game.playfield.snapshot(), [type(e) for e in ongoing.eventQueue])
+            scenario(7)
+            second = (game.playfield.snapshot(), [type(e) for e in ongoing.eventQueue])
+            self.assertEqual(first, second, name)
+        game.reset()
+
+    def test_fill_board_is_quiet(self):
+        scenarios.start(3, level=8)
+        scenarios.fill_board([6] * game.playfield.columns, scenarios.random.Random(3))
+        game.playfield.refresh_status()
+        self.assertEqual(0, ongoing.get_number_of_events())
+        self.assertFalse(game.playfield.any_seesaw_is_moving())
+        self.assertEqual(48, game.playfield.get_number_of_balls())
+        game.reset()
+
+    def test_percentile(self):
+        self.assertEqual(2.5, suite.percentile([1, 2, 3, 4], 50))
+        self.assertEqual(4, suite.percentile([1, 2, 3, 4], 100))
+        self.assertEqual(7, suite.percentile([7], 90))
+
+    def test_run_suite(self):
+        report = suite.run_suite(["large_scoring", "empty"], ["check_Scoring_full", "Scoring.expand"],
+                                 warmup=0, repetitions=3)
+        json.dumps(report)
+        results = report["results"]
+        self.assertEqual(3, len(results["large_scoring"]["Scoring.expand"]["samples"]))
+        # there is nothing to score on an empty board
+        self.assertNotIn("Scoring.expand", results["empty"])
+        entry = results["empty"]["check_Scoring_full"]
+        self.assertTrue(entry["min"] <= entry["p50"] <= entry["p90"] <= entry["max"])
+
+        with self.assertRaises(ValueError):
+            suite.run_suite(["no_such_scenario"])
+
+
+    def test_mann_whitney_u(self):
+        # textbook value of the normal approximation with continuity correction
+        self.assertAlmostEqual(0.01219, compare.mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10]), 4)
+        self.assertEqual(1.0, compare.mann_whitney_u([1, 1, 1], [1, 1, 1]))
+        with self.assertRaises(ValueError):
+            compare.mann_whitney_u([], [1])
+
+    def test_compare_flags_regressions(self):
+        def report(samples):
+            return {"results": {"empty": {"tick": {"samples": samples}}}}
+
+        baseline = report([1.0 + i / 100 for i in range(20)])
+        slower = report([1.5 + i / 100 for i in range(20)])
+        noisy = report([1.02 + i / 100 for i in range(20)])
+
+        [result] = compare.compare(baseline, slower, threshold=0.1)
+        self.assertTrue(result.regressed)
+        self.assertIn("REGRESSED", result.describe())
+        [result] = compare.compare(baseline, noisy, threshold=0.1)
+        self.assertFalse(result.regressed)
+        [result] = compare.compare(slower, baseline, threshold=0.1)
+        self.assertTrue(result.improved)
+        # operations missing in the baseline are not compared
+        self.assertEqual([], compare.compare({"results": {}}, slower))
+
+    def test_save_and_compare_exclude_each_other(self):
+        """Saving a baseline and comparing with it in the same run would compare the run with itself"""
+        import contextlib, io
+        from benchmarks.__main__ import parse_args
+
+        self.assertTrue(parse_args(["--compare"]).compare)
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--save-baseline", "--compare"])
+
+
+if __name__ == "__main__":
+    unittest.main()
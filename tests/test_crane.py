@@ -45,6 +45,24 @@ class TestTheCrane(unittest.TestCase):
         the_crane.move_right()
         self.assertEqual(the_crane.getx(), 7)
 
+    def test_crane_follows_playfield_width(self):
+        """On a wider Playfield, the Crane reaches all of its columns"""
+        import constants, playfield
+
+        game.reset()
+        the_crane: Crane = game.crane
+        saved = game.playfield
+        game.playfield = playfield.Playfield(constants.playfieldsize, seesaws=6)
+        try:
+            the_crane.move_to_column(11)
+            the_crane.move_right()
+            self.assertEqual(the_crane.getx(), 11)
+            with self.assertRaises(ValueError):
+                the_crane.move_to_column(12)
+        finally:
+            game.playfield = saved
+            game.reset()
+
     def test_crane_has_ball(self):
         game.reset()
         the_crane = game.crane
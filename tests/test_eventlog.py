@@ -0,0 +1,104 @@
+# tests the eventlog module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import json
+import os
+import tempfile
+import game
+import eventlog
+from balls import ColoredBall, Bomb
+import unittest
+
+
+class TestEventlog(unittest.TestCase):
+
+    def tearDown(self):
+        eventlog.configure(None, eventlog.OFF)
+
+    def test_filtered_levels_are_noops(self):
+        ring = eventlog.RingSink()
+        eventlog.configure(ring, eventlog.WARNING)
+        self.assertIs(eventlog._noop, eventlog.debug)
+        self.assertIs(eventlog._noop, eventlog.info)
+        eventlog.info("throw", range=3)
+        eventlog.warning("death", score=1)
+        self.assertEqual(["death"], [record["event"] for record in ring.records])
+        self.assertTrue(eventlog.enabled(eventlog.WARNING))
+        self.assertFalse(eventlog.enabled(eventlog.INFO))
+
+    def test_fields_not_built_when_off(self):
+        """With logging off, a throw does not even ask the Ball for the logged fields"""
+        class CountingBall(ColoredBall):
+            __slots__ = ("asked",)
+
+            def getcolor(self):
+                self.asked += 1
+                return super().getcolor()
+
+        game.reset()
+        ball = CountingBall(1, 1)
+        ball.asked = 0
+        game.ongoing.throw_ball(ball, (0, 1), 2)
+        self.assertEqual(0, ball.asked)
+        eventlog.configure(eventlog.RingSink(), eventlog.INFO)
+        game.ongoing.throw_ball(ball, (0, 1), 2)
+        self.assertEqual(1, ball.asked)
+        game.reset()
+
+    def test_game_events(self):
+        """Throws, fly-outs, explosions, Scorings, tilts and the death of a game are logged"""
+        ring = eventlog.RingSink(capacity=1000)
+        eventlog.configure(ring, eventlog.DEBUG)
+        game.reset()
+        game.ongoing.throw_ball(ColoredBall(1, 1), (6, 2), 4)
+        game.run_until_settled(1000)
+        game.playfield.add_on_top(ColoredBall(2, 1), 0)
+        game.playfield.add_on_top(Bomb(), 1)
+        game.playfield.trigger_explosion((1, 1))
+        for column in range(4, 7):
+            game.playfield.add_on_top(ColoredBall(3, 2), column)
+        game.playfield.add_on_top(ColoredBall(4, 2), 7)
+        game.playfield.add_on_top(ColoredBall(5, 1), 2)
+        game.playfield.refresh_status()
+        game.run_until_settled(1000)
+        game.reset()
+        for height in range(game.playfield.rows):
+            game.playfield.add_on_top(ColoredBall(height % 2 + 1, 1), 0)
+            game.playfield.add_on_top(ColoredBall(height % 2 + 1, 1), 1)
+        game.playfield.refresh_status()
+
+        events = [record["event"] for record in ring.records]
+        for event in ["throw", "fly_out", "explosion", "score", "tilt", "death"]:
+            self.assertIn(event, events)
+        throw = ring.records[events.index("throw")]
+        self.assertEqual({"tick": 0, "severity": "INFO", "event": "throw", "ball": "ColoredBall",
+                          "color": 1, "weight": 1, "origin": [6, 2], "range": 4}, throw)
+        score = ring.records[events.index("score")]
+        self.assertEqual(3, score["balls"])
+        death = ring.records[events.index("death")]
+        self.assertEqual("WARNING", death["severity"])
+        self.assertEqual([0, 1], death["columns"])
+        game.reset()
+
+    def test_jsonl_sink(self):
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        try:
+            sink = eventlog.JsonlSink(path, buffer_records=2)
+            eventlog.configure(sink, eventlog.INFO)
+            for i in range(3):
+                eventlog.info("throw", range=i)
+            with open(path) as f:
+                self.assertEqual(2, len(f.readlines()))
+            sink.close()
+            with open(path) as f:
+                self.assertEqual([0, 1, 2], [json.loads(line)["range"] for line in f])
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
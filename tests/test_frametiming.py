@@ -0,0 +1,72 @@
+# tests the frametiming module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import time
+import pygame
+import frametiming
+from frametiming import FrameTimer, FrameOverlay
+import unittest
+
+
+class TestFrameTiming(unittest.TestCase):
+
+    def run_frames(self, timer, frames: int):
+        for _ in range(frames):
+            timer.begin_frame()
+            timer.mark("input")
+            time.sleep(0.002)
+            timer.mark("draw")
+
+    def test_disabled_timer_records_nothing(self):
+        timer = FrameTimer()
+        self.run_frames(timer, 3)
+        self.assertEqual({}, timer.stages)
+        self.assertIsNone(timer.slowest_stage())
+
+    def test_stages_and_frames(self):
+        timer = FrameTimer(window=4, enabled=True)
+        self.run_frames(timer, 6)
+        self.assertEqual(["input", "draw", "frame"], list(timer.stages))
+        # only the last window frames are kept
+        self.assertEqual(4, len(timer.stages["draw"]))
+        p50, p95, p99 = timer.percentiles("draw")
+        self.assertTrue(0.002 <= p50 <= p95 <= p99)
+        self.assertEqual("draw", timer.slowest_stage())
+        # a frame is the sum of its stages, the time after the last mark is not counted
+        self.assertAlmostEqual(timer.stages["frame"][-1],
+                               timer.stages["input"][-2] + timer.stages["draw"][-2])
+
+        timer.toggle()
+        self.run_frames(timer, 2)
+        self.assertEqual(4, len(timer.stages["draw"]))
+        self.assertFalse(timer.enabled)
+
+    def test_tick_stages(self):
+        """game.tick() marks its stages on the frame timer of the main loop"""
+        import game
+
+        game.reset()
+        timer = FrameTimer(enabled=True)
+        timer.begin_frame()
+        game.tick(timer.mark)
+        self.assertEqual(["playfield.tick", "ongoing.tick"], list(timer.stages))
+
+    def test_overlay(self):
+        timer = FrameTimer(enabled=True)
+        self.run_frames(timer, 3)
+        timer.stages["draw"].append(2 * frametiming.frame_budget)
+        overlay = FrameOverlay(timer)
+        lines = overlay.lines(5)
+        self.assertEqual("events: 5", lines[-1][0])
+        self.assertEqual([True], [over for text, over in lines if text.startswith("draw")])
+
+        screen = pygame.Surface((400, 300))
+        overlay.draw(screen, 5)
+        self.assertIsNotNone(overlay.surf)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# tests the fuzzing harness: invariants, replays of input logs and shrinking
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import game
+import ongoing
+import fuzzing
+from fuzzing import Move, Failure
+import unittest
+
+
+class TestInvariants(unittest.TestCase):
+
+    def tearDown(self):
+        ongoing.headless = False
+        game.reset()
+
+    def test_fresh_game(self):
+        """Nothing is broken in a new game"""
+        fuzzing.start_game(1)
+        self.assertIsNone(fuzzing.check_invariants())
+
+    def test_wrong_weight(self):
+        """A stored weight that does not match the stack is found"""
+        fuzzing.start_game(1)
+        fuzzing.play_move(Move(0))
+        game.playfield.stacks[0].weightleft += 1
+
+        name, message = fuzzing.check_invariants()
+        self.assertEqual("weights", name)
+        self.assertIn("seesaw 0", message)
+
+    def test_duplicate_event(self):
+        """An event in the eventQueue twice is found, even while the game is not settled"""
+        fuzzing.start_game(1)
+        fuzzing.play_move(Move(3, wait=1))
+        ongoing.eventQueue.append(ongoing.eventQueue[0])
+
+        self.assertEqual("event_queue", fuzzing.check_invariants()[0])
+
+
+class TestReplay(unittest.TestCase):
+
+    def tearDown(self):
+        ongoing.headless = False
+        game.reset()
+
+    def test_replay_is_deterministic(self):
+        """The same input log leads to the same board"""
+        moves = [Move(2), Move(5, "B", 10), Move(5), Move(0, "H"), Move(7)]
+        fuzzing.replay(3, moves, ["event_queue"])
+        first = game.playfield.snapshot()
+        fuzzing.replay(3, moves, ["event_queue"])
+        self.assertEqual(first, game.playfield.snapshot())
+
+    def test_json_roundtrip(self):
+        failure = Failure("weights", "message", 7, (Move(1), Move(2, "B", 5)), 1)
+        self.assertEqual(failure, Failure.from_json(failure.to_json()))
+
+    def test_shrink(self):
+        """A failure that needs three drops shrinks to three plain moves"""
+        fuzzing.INVARIANTS["three_drops"] = \
+            lambda: "three Balls dropped" if game.balls_dropped >= 3 else None
+        try:
+            moves = tuple(Move(i % 8, "H" if i % 3 else None, 5) for i in range(12))
+            failure, _ = fuzzing._play(5, moves, 4, ["three_drops"])
+            self.assertEqual("three_drops", failure.invariant)
+
+            shrunk = fuzzing.shrink(failure, invariants=["three_drops"])
+            self.assertEqual(3, len(shrunk.moves))
+            self.assertTrue(all(move.special is None and move.wait is None
+                                for move in shrunk.moves))
+        finally:
+            del fuzzing.INVARIANTS["three_drops"]
+
+    def test_shrink_keeps_signature(self):
+        """Shrinking does not switch over to a different exception found on the way"""
+        def two_bugs():
+            if game.balls_dropped == 2:
+                raise ValueError("second drop")
+            if game.balls_dropped >= 5:
+                raise KeyError("fifth drop")
+
+        fuzzing.INVARIANTS["two_bugs"] = two_bugs
+        try:
+            # checked after moves 1 and 5 only, the second drop goes unnoticed
+            failure, _ = fuzzing._play(5, tuple(Move(i % 8) for i in range(8)), 4, ["two_bugs"])
+            self.assertIn("KeyError", failure.message)
+
+            shrunk = fuzzing.shrink(failure, invariants=["two_bugs"])
+            self.assertEqual(fuzzing.signature(failure), fuzzing.signature(shrunk))
+        finally:
+            del fuzzing.INVARIANTS["two_bugs"]
+
+
+class TestFuzz(unittest.TestCase):
+
+    def test_signature(self):
+        """Failures that only differ in numbers share a signature"""
+        first = Failure("exception", "ValueError: position (4, 1)", 1, (), 0)
+        second = Failure("exception", "ValueError: position (7, 12)", 2, (), 0)
+        self.assertEqual(fuzzing.signature(first), fuzzing.signature(second))
+
+    def test_short_run(self):
+        """A short run plays some moves, and leaves a normal game behind"""
+        failures, stats = fuzzing.fuzz(seconds=0.5, max_moves=20, invariants=["event_queue"],
+                                       specials="")
+        self.assertGreater(stats["moves"], 0)
+        self.assertGreater(stats["moves_per_hour"], 0)
+        self.assertFalse(ongoing.headless)
+        self.assertEqual(0, game.balls_dropped)
+
+
+if __name__ == '__main__':
+    unittest.main()
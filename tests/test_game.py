@@ -9,8 +9,10 @@ from balls import Ball
 from ongoing import FallingBall
 import unittest
 
+from tests.testing_generals import GameTestCase, fresh_game
 
-class TestTheGame(unittest.TestCase):
+
+class TestTheGame(GameTestCase):
 
     def test_game_init(self):
         game.reset()
@@ -37,6 +39,30 @@ class TestTheGame(unittest.TestCase):
         self.assertIsInstance(event, FallingBall)
         self.assertEqual(event.getball(), the_ball)
 
+    def test_idle_ticks(self):
+        """A falling Ball on an empty board: idle until the tick before it lands"""
+        game.ongoing.drop_ball_in_column(game.crane.getball(), 2)
+        event: FallingBall = game.ongoing.get_newest_event()
+        self.assertEqual(event.ticks_until_landing() - 1, game.idle_ticks(10000))
+        self.assertEqual(5, game.idle_ticks(5))
+
+    def test_fast_forward_matches_ticking(self):
+        """Seeded games end up the same with and without the virtual clock, tick for tick"""
+        def play(skip_idle: bool):
+            fresh_game(7)
+            for i in range(40):
+                game.crane.move_to_column((3 * i) % 8)
+                game.drop_ball()
+                if i % 3:
+                    game.run_until_settled(100000, skip_idle=skip_idle)
+                else:
+                    game.run_ticks(20, skip_idle=skip_idle)
+            game.run_until_settled(100000, skip_idle=skip_idle)
+            return (game.playfield.snapshot(), game.score, game.ongoing.current_tick(),
+                    game.playfield.alive)
+
+        self.assertEqual(play(False), play(True))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,47 @@
+# tests the geometry module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import geometry
+import unittest
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_tables_stay_on_board(self):
+        tables = geometry.board(8, 10)
+        self.assertIs(tables, geometry.board(8, 10))
+
+        corner = tables.cell(0, 0)
+        self.assertEqual({(1, 0), (0, 1)}, {tables.coords[c] for c in tables.neighbours[corner]})
+        self.assertEqual(4, len(tables.blasts[corner]))
+        self.assertEqual(9, len(tables.blasts[tables.cell(3, 3)]))
+        with self.assertRaises(IndexError):
+            tables.cell(8, 0)
+
+    def test_masks_match_tuples(self):
+        tables = geometry.board(8, 10)
+        for table, masks in [(tables.neighbours, tables.neighbour_masks),
+                             (tables.blasts, tables.blast_masks),
+                             (tables.diagonals, tables.diagonal_masks),
+                             (tables.rows, tables.row_masks),
+                             (tables.triangles, tables.triangle_masks)]:
+            for cell in range(8 * 10):
+                self.assertEqual(sorted(table[cell]), geometry.cells_of_mask(masks[cell]))
+
+    def test_areas(self):
+        tables = geometry.board(8, 10)
+        cell = tables.cell(3, 2)
+        self.assertEqual([(x, 2) for x in range(8)], [tables.coords[c] for c in tables.rows[cell]])
+        # triangle below (3,2): 3 cells in row 1, 5 cells in row 0
+        self.assertEqual(8, len(tables.triangles[cell]))
+        self.assertIn(tables.cell(0, 5), tables.diagonals[cell])
+        self.assertNotIn(cell, tables.diagonals[cell])
+        self.assertEqual(0b1110, geometry.column_bits(tables.blast_masks[cell], 2, 10))
+        self.assertEqual(0, geometry.column_bits(tables.blast_masks[cell], 5, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
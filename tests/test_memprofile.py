@@ -0,0 +1,67 @@
+# tests the memprofile module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import json
+import os
+import tempfile
+import game
+import balls
+import memprofile
+from balls import ColoredBall, Bomb
+import unittest
+
+
+class TestMemprofile(unittest.TestCase):
+
+    def test_count_objects(self):
+        game.reset()
+        kept = [ColoredBall(1, 1) for _ in range(3)] + [Bomb()]
+        game.crane.drop_ball()
+        counts = memprofile.count_objects()
+        self.assertGreaterEqual(counts["ColoredBall"], 3)
+        self.assertGreaterEqual(counts["Bomb"], 1)
+        self.assertEqual(1, counts["FallingBall"])
+        game.reset()
+
+    def test_surface_memory(self):
+        balls.load_image(Bomb.imagefile)
+        usage = memprofile.surface_memory()
+        self.assertGreaterEqual(usage["images"]["count"], 1)
+        self.assertEqual(4, usage["components"]["count"])
+        self.assertEqual(memprofile.surface_bytes(game.playfield.surf) + memprofile.surface_bytes(
+            game.depot.surf) + memprofile.surface_bytes(game.crane.surf) + memprofile.surface_bytes(
+            game.score_area.surf), usage["components"]["bytes"])
+
+    def test_growing_series(self):
+        history = {"up": [1, 2, 3, 4], "flat": [1, 2, 2, 3], "short": [1, 2]}
+        self.assertEqual(["up"], memprofile.growing_series(history, 3))
+        self.assertEqual(["up"], memprofile.growing_series(history, 4))
+
+    def test_monitor_flags_growth(self):
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        monitor = memprofile.MemoryMonitor(path, interval=3600, window=3)
+        leak = []
+        try:
+            monitor.start()
+            self.assertIsNone(monitor.maybe_sample())
+            for _ in range(2):
+                leak.extend(ColoredBall(1, 1) for _ in range(100))
+                monitor.sample()
+        finally:
+            monitor.stop()
+        self.assertIn("objects.ColoredBall", monitor.growing)
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        os.remove(path)
+        self.assertEqual(3, len(records))
+        self.assertIn("objects.ColoredBall", records[-1]["growing"])
+        self.assertTrue(records[-1]["top_growth"])
+        self.assertGreater(records[-1]["traced_current"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# tests the metrics module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import urllib.error
+import urllib.request
+import game
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry
+from balls import ColoredBall, Bomb
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_main_loop_ticks_are_timed(self):
+        """Frames of the main loop end up in the tick duration histogram"""
+        import SelfSwing_main
+
+        game.reset()
+        before = metrics.tick_seconds.count
+        for _ in range(5):
+            SelfSwing_main.update_game()
+        self.assertEqual(before + 5, metrics.tick_seconds.count)
+        self.assertIn("swing_tick_seconds_count {}".format(before + 5),
+                      metrics.registry.render())
+        game.reset()
+
+    def test_render(self):
+        registry = Registry()
+        drops = Counter("drops_total", "Drops", registry=registry)
+        sides = Counter("sides_total", "Sides", ["side"], registry=registry)
+        depth = Gauge("depth", "Depth", lambda: 7, registry=registry)
+        sizes = Histogram("sizes", "Sizes", [5, 1], registry=registry)
+        drops.inc()
+        sides.inc("left", amount=2)
+        sides.inc('a"b')
+        for value in (1, 2, 9):
+            sizes.observe(value)
+
+        text = registry.render()
+        self.assertIn("# TYPE drops_total counter\ndrops_total 1\n", text)
+        self.assertIn('sides_total{side="left"} 2\n', text)
+        self.assertIn('sides_total{side="a\\"b"} 1\n', text)
+        self.assertIn("depth 7\n", text)
+        self.assertIn('sizes_bucket{le="1"} 1\nsizes_bucket{le="5"} 2\nsizes_bucket{le="+Inf"} 3\n'
+                      "sizes_sum 12\nsizes_count 3\n", text)
+
+        with self.assertRaises(ValueError):
+            sides.inc()
+        with self.assertRaises(ValueError):
+            Counter("drops_total", "again", registry=registry)
+
+    def test_engine_counts(self):
+        """Headless throws count their fly-outs, Bombs their explosions, Scorings their size"""
+        game.reset()
+        fly_outs = metrics.fly_outs.get("left")
+        throws = metrics.throw_range.count
+        game.ongoing.headless = True
+        try:
+            game.ongoing.throw_ball(ColoredBall(1, 1), (1, 0), -10)
+        finally:
+            game.ongoing.headless = False
+        self.assertEqual(fly_outs + 2, metrics.fly_outs.get("left"))
+        self.assertEqual(throws + 1, metrics.throw_range.count)
+
+        game.reset()
+        explosions = metrics.explosions.get()
+        game.playfield.add_on_top(ColoredBall(1, 1), 0)
+        game.playfield.add_on_top(Bomb(), 1)
+        game.playfield.trigger_explosion((0, 1))
+        self.assertEqual(explosions + 2, metrics.explosions.get())
+
+        game.reset()
+        scorings = metrics.scoring_size.count
+        for column in range(3):
+            game.playfield.add_on_top(ColoredBall(2, 1), column)
+        game.playfield.add_on_top(ColoredBall(3, 1), 3)
+        game.playfield.refresh_status()
+        game.run_until_settled(1000)
+        self.assertEqual(scorings + 1, metrics.scoring_size.count)
+        self.assertEqual(0, metrics.event_queue_depth.get())
+        game.reset()
+
+    def test_endpoint(self):
+        server = metrics.serve(0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen("http://127.0.0.1:{}/metrics".format(port)) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+                body = response.read().decode("utf-8")
+            self.assertIn("swing_balls_dropped_total", body)
+            self.assertIn("swing_tick_seconds_count", body)
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen("http://127.0.0.1:{}/other".format(port))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
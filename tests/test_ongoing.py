@@ -10,10 +10,10 @@ from balls import generate_starting_ball
 from ongoing import FallingBall
 import unittest, random
 
-from tests.testing_generals import wait_for_empty_eq
+from tests.testing_generals import GameTestCase, wait_for_empty_eq
 
 
-class TestFalling(unittest.TestCase):
+class TestFalling(GameTestCase):
     def test_dropping(self):
         """create a random ball, drop it in a random column. Assert it is inserted into EventQueue"""
         game.reset()
@@ -52,8 +52,49 @@ class TestFalling(unittest.TestCase):
         self.assertTrue(wait_for_empty_eq(maxticks))
         self.assertFalse(game.ongoing.event_type_exists(FallingBall))
 
+    def test_landing_prediction(self):
+        """The number of ticks until landing is known in advance and updated when the column changes"""
+        game.reset()
+
+        game.ongoing.drop_ball_in_column(generate_starting_ball(), 3)
+        the_falling_event: FallingBall = game.ongoing.get_newest_event()
+        predicted: int = the_falling_event.ticks_until_landing()
+        self.assertGreater(predicted, 0)
+
+        # a ball appearing in the column lets it land earlier
+        game.playfield.add_on_top(generate_starting_ball(), 3)
+        self.assertLess(the_falling_event.ticks_until_landing(), predicted)
+        predicted = the_falling_event.ticks_until_landing()
+
+        # the virtual clock jumps to the tick before the landing
+        self.assertEqual(predicted - 1, game.fast_forward(10 * predicted))
+        self.assertIn(the_falling_event, game.ongoing.eventQueue)
+        game.tick()
+        self.assertNotIn(the_falling_event, game.ongoing.eventQueue)
 
-class TestTilting(unittest.TestCase):
+    def test_heights_are_exact(self):
+        """Heights and tilts advance in exact steps, no float error accumulates"""
+        from fractions import Fraction
+
+        game.reset()
+        game.ongoing.drop_ball_in_column(generate_starting_ball(), 3)
+        the_falling_event: FallingBall = game.ongoing.get_newest_event()
+        game.run_ticks(25, skip_idle=True)
+        self.assertEqual(8 - 25 * constants.falling_per_tick, the_falling_event.getheight())
+        self.assertEqual(Fraction(13, 2), the_falling_event.getheight())
+        self.assertEqual(25, game.ongoing.current_tick())
+
+        sesa = game.playfield.stacks[0]
+        sesa.add_on_top(generate_starting_ball(), True)
+        sesa.update_weight()
+        sesa.check_gravity()
+        for _ in range(constants.tilting_steps_per_unit // constants.tilting_steps_per_tick):
+            sesa.tick()
+        self.assertEqual(-1, sesa.gettilt())
+        self.assertFalse(sesa.ismoving())
+
+
+class TestTilting(GameTestCase):
     def test_tilting(self):
         """create a Ball, land it, assert that the seesaw's tilt changes per tick.
         And assert that the sum of the heights stays roughly 0.0"""
@@ -146,7 +187,7 @@ class TestTilting(unittest.TestCase):
         self.assertEqual(-1, game.playfield.get_seesaw_state(chosen_column))
 
 
-class TestThrowing(unittest.TestCase):
+class TestThrowing(GameTestCase):
 
     def test_throwing_range(self):
         """land a Ball with weight 1 in column 0, then a Ball with weight 3 in column 1.
@@ -295,8 +336,71 @@ class TestThrowing(unittest.TestCase):
 
         self.assertIsInstance(the_throwing_event.getball(), Heart)
 
+    def test_closed_form_matches_flight(self):
+        """For throws of all kinds of ranges, the landing column, converted Ball and flight duration
+        known at throw time must match what happens when the flight is ticked through"""
+        from ongoing import ThrownBall
 
-class TestScoring(unittest.TestCase):
+        for origin_x, throwing_range in [(0, 3), (1, -2), (6, 2), (0, -10), (7, -9), (6, 30), (3, -20)]:
+            game.reset()
+            game.ongoing.throw_ball(generate_starting_ball(), (origin_x, 2), throwing_range)
+            the_throwing_event: ThrownBall = game.ongoing.get_event_of_type(ThrownBall)
+            landing = the_throwing_event.getlanding()
+            self.assertEqual((origin_x + throwing_range) % 8, landing)
+
+            for ticks in range(1, 10000):
+                game.tick()
+                if not game.ongoing.event_type_exists(ThrownBall):
+                    break
+            self.assertEqual(the_throwing_event.get_total_ticks(), ticks)
+            the_falling_event = game.ongoing.get_event_of_type(FallingBall)
+            self.assertEqual(landing, the_falling_event.getcolumn())
+            self.assertIsInstance(the_falling_event.getball(), the_throwing_event.landing_type)
+
+    def test_throw_on_wide_board(self):
+        """Fly-outs wrap around the actual number of columns of the Playfield"""
+        from ongoing import ThrownBall
+        import playfield
+
+        game.reset()
+        saved = game.playfield
+        game.playfield = playfield.Playfield(constants.playfieldsize, seesaws=8, rows=12)
+        try:
+            game.ongoing.throw_ball(ColoredBall(1, 1), (14, 2), 5)
+            the_throwing_event: ThrownBall = game.ongoing.get_event_of_type(ThrownBall)
+            self.assertEqual(3, the_throwing_event.getlanding())
+            for ticks in range(1, 10000):
+                game.tick()
+                if not game.ongoing.event_type_exists(ThrownBall):
+                    break
+            self.assertEqual(the_throwing_event.get_total_ticks(), ticks)
+            the_falling_event = game.ongoing.get_event_of_type(FallingBall)
+            self.assertEqual(3, the_falling_event.getcolumn())
+            self.assertEqual(12, FallingBall(ColoredBall(1, 1), 0).getheight())
+            # the flight goes over the 12 rows, and the Ball falls from above them
+            self.assertGreater(max(y for _, y in the_throwing_event.path), 12)
+            self.assertEqual(constants.thrown_ball_dropheight(12) - 2,
+                             the_falling_event.getheight())
+        finally:
+            game.playfield = saved
+            game.reset()
+
+    def test_headless_throw_skips_flight(self):
+        """In headless mode, a thrown Ball is falling above its landing column right away"""
+        game.reset()
+        game.ongoing.headless = True
+        try:
+            game.ongoing.throw_ball(ColoredBall(1, 1), (6, 0), 11)
+        finally:
+            game.ongoing.headless = False
+
+        self.assertFalse(game.ongoing.event_type_exists(game.ongoing.ThrownBall))
+        the_falling_event = game.ongoing.get_event_of_type(FallingBall)
+        self.assertEqual(1, the_falling_event.getcolumn())
+        self.assertIsInstance(the_falling_event.getball(), Bomb)
+
+
+class TestScoring(GameTestCase):
 
     # Helper function, no actual test
     def make_solid_ground(self):
@@ -436,7 +540,7 @@ class TestScoring(unittest.TestCase):
         self.assertEqual(falling_event.getcolumn(), 1)
 
 
-class TestCombining(unittest.TestCase):
+class TestCombining(GameTestCase):
 
     # Helper function, no actual test
     def make_solid_ground(self):
@@ -459,9 +563,6 @@ class TestCombining(unittest.TestCase):
         Combine and that the total weight is added."""
         from ongoing import Combining
 
-        # Test deactivated for now, since there is no implementation for Combining
-        return
-
         game.reset()
         self.make_solid_ground()
 
@@ -487,7 +588,7 @@ class TestCombining(unittest.TestCase):
         self.assertEqual((0, 2), the_combining_event.getposition())
 
         # After finishing eQ, check the resulting ball
-        maxticks: int = constants.combining_totaltime
+        maxticks: int = constants.combining_numticks + 2
         self.assertTrue(wait_for_empty_eq(maxticks))
 
         resulting_ball = game.playfield.get_ball_at((0, 2))
@@ -495,7 +596,7 @@ class TestCombining(unittest.TestCase):
         self.assertEqual(totalweight, resulting_ball.getweight())
 
 
-class TestOngoing(unittest.TestCase):
+class TestOngoing(GameTestCase):
 
     def make_solid_ground(self):
         """Drop heavy (weight=50) balls, color=1, on one side of each seesaw. Wait for tilt to finish."""
@@ -513,5 +614,58 @@ class TestOngoing(unittest.TestCase):
         self.assertTrue(wait_for_empty_eq(maxticks))
 
 
+    def test_timer_wheel(self):
+        """Items come out in the tick they are due, also across the levels of the wheel"""
+        from ongoing import TimerWheel
+
+        wheel = TimerWheel(slotbits=2, levels=3)
+        delays = [1, 3, 4, 5, 17, 40, 63, 3]
+        for i, delay in enumerate(delays):
+            wheel.schedule(i, delay)
+        self.assertEqual(1, wheel.next_wakeup())
+        with self.assertRaises(ValueError):
+            wheel.schedule("too late", 64)
+
+        due = {}
+        for _ in range(64):
+            for item in wheel.advance():
+                due[item] = wheel.now
+        self.assertEqual({i: delay for i, delay in enumerate(delays)}, due)
+        self.assertEqual(0, len(wheel))
+        self.assertIsNone(wheel.next_wakeup())
+
+    def test_timer_wheel_jump(self):
+        """Items due in skipped ticks come out in the tick after the jump, behind the items
+        due then. Items further ahead are not moved, also across the levels of the wheel"""
+        from ongoing import TimerWheel
+
+        wheel = TimerWheel(slotbits=2, levels=3)
+        wheel.schedule("next", 1)
+        wheel.schedule("late", 3)
+        wheel.schedule("after", 8)
+        wheel.schedule("far", 40)
+        wheel.jump(2)
+        self.assertEqual(2, wheel.now)
+        self.assertEqual(4, len(wheel))
+        self.assertEqual(["late", "next"], wheel.advance())
+
+        due = {}
+        for _ in range(40):
+            for item in wheel.advance():
+                due[item] = wheel.now
+        self.assertEqual({"after": 8, "far": 40}, due)
+
+    def test_waiting_events_are_not_resumed(self):
+        """An Explosion sleeps until it is over, the next wake-up is known in advance"""
+        game.reset()
+        game.ongoing.draw_explosion((3, 3))
+        start = game.ongoing.current_tick()
+        self.assertEqual(start + 1, game.ongoing.next_wakeup())
+        game.ongoing.tick()
+        self.assertEqual(start + 1 + int(constants.explosion_numticks),
+                         game.ongoing.next_wakeup())
+        self.assertTrue(wait_for_empty_eq(int(constants.explosion_numticks) + 1))
+
+
 if __name__ == "__main__":
     unittest.main()
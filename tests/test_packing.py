@@ -0,0 +1,53 @@
+# tests the packing module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import game
+import packing
+from balls import ColoredBall, Bomb, Cutter, Heart, EmptySpace
+import unittest
+
+
+class TestPacking(unittest.TestCase):
+
+    def test_ball_roundtrip(self):
+        """Every kind of Ball must survive encoding and decoding"""
+        for ball in [ColoredBall(0, 1), ColoredBall(9, 250), Bomb(), Cutter(), Heart()]:
+            code = packing.encode_ball(ball)
+            decoded = packing.decode_ball(code)
+            self.assertIs(type(ball), type(decoded))
+            self.assertEqual(ball.getcolor(), decoded.getcolor())
+            self.assertEqual(ball.getweight(), decoded.getweight())
+
+        self.assertEqual(packing.EMPTY, packing.encode_ball(EmptySpace()))
+        self.assertEqual(7, packing.weight_of(packing.encode_ball(ColoredBall(2, 7))))
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            packing.encode_ball(ColoredBall(packing.MAX_COLOR + 1, 1))
+        with self.assertRaises(ValueError):
+            packing.encode_ball(ColoredBall(1, -1))
+
+    def test_board_roundtrip(self):
+        """Fill a few stacks, snapshot the Playfield, restore it into an empty one and compare"""
+        game.reset()
+        the_playfield = game.playfield
+        the_playfield.add_on_top(ColoredBall(1, 3), 0)
+        the_playfield.add_on_top(Bomb(), 0)
+        the_playfield.add_on_top(ColoredBall(3, 12), 5)
+        the_playfield.stacks[2].tilt = 1.0
+        state = the_playfield.snapshot()
+        self.assertIsInstance(state, bytes)
+
+        game.reset()
+        self.assertNotEqual(state, the_playfield.snapshot())
+        the_playfield.restore(state)
+        self.assertEqual(state, the_playfield.snapshot())
+        self.assertIsInstance(the_playfield.stacks[0].stackleft[1], Bomb)
+        self.assertEqual(12, the_playfield.stacks[2].stackright[0].getweight())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,9 +6,9 @@ sys.path.append("S:/SwingSelfmade/")
 import game, constants
 import unittest
 import balls
-from tests.testing_generals import wait_for_empty_eq
+from tests.testing_generals import GameTestCase, wait_for_empty_eq
 
-class TestPlayfield(unittest.TestCase):
+class TestPlayfield(GameTestCase):
     def test_playfield(self):
         game.reset()
 
@@ -48,7 +48,155 @@ class TestPlayfield(unittest.TestCase):
         self.assertEqual(the_playfield.get_weight_of_column(0), Testball.getweight())
         self.assertEqual(the_playfield.get_weight_of_column(1), Testball.getweight())
 
-    
+
+    def test_grid_follows_changes(self):
+        """get_ball_at is served from a cached grid. Adding and removing balls
+        must be visible right away, and rows up to 9 can be queried"""
+        game.reset()
+        the_playfield = game.playfield
+
+        self.assertIs(the_playfield.get_ball_at((3,1)), balls.empty_space)
+        Testball = balls.generate_starting_ball()
+        the_playfield.add_on_top(Testball, 3)
+        self.assertIs(the_playfield.get_ball_at((3,1)), Testball)
+        self.assertIs(the_playfield.get_grid()[3*10 + 1], Testball)
+
+        the_playfield.remove_ball_at((3,1))
+        self.assertIs(the_playfield.get_ball_at((3,1)), balls.empty_space)
+        self.assertIs(the_playfield.get_ball_at((3,9)), balls.empty_space)
+        with self.assertRaises(IndexError):
+            the_playfield.get_ball_at((3,10))
+
+    def test_color_index(self):
+        """The positions of all balls of a color are known without scanning, also
+        after re-coloring, throwing and removing"""
+        game.reset()
+        the_playfield = game.playfield
+
+        the_playfield.add_on_top(balls.ColoredBall(2, 1), 0)
+        the_playfield.add_on_top(balls.ColoredBall(3, 1), 0)
+        the_playfield.add_on_top(balls.ColoredBall(2, 1), 5)
+        the_playfield.add_on_top(balls.Heart(), 5)
+        self.assertEqual(sorted(the_playfield.positions_of_color(2)), [(0,1), (5,1)])
+        self.assertEqual(the_playfield.positions_of_color(3), [(0,2)])
+
+        the_playfield.recolor_ball_at((0,2), 2)
+        self.assertEqual(the_playfield.positions_of_color(3), [])
+        self.assertEqual(len(the_playfield.positions_of_color(2)), 3)
+
+        # color-wide effect, followed by a single status refresh
+        def make_heavy(ball, coords):
+            ball.setweight(5)
+        self.assertEqual(3, the_playfield.apply_to_color(2, make_heavy))
+        self.assertEqual(10, the_playfield.get_weight_of_column(0))
+
+        # removing a color lets the Heart above fall
+        game.ongoing.reset()
+        self.assertEqual(3, the_playfield.remove_color(2))
+        self.assertEqual(the_playfield.positions_of_color(2), [])
+        self.assertTrue(game.ongoing.event_type_exists(game.ongoing.FallingBall))
+
+    def test_combining_long_run(self):
+        """A run of six is tracked while stacking and re-coloring, and combines as a whole.
+        The Ball above the run falls down"""
+        game.reset()
+        the_playfield = game.playfield
+
+        stack = [balls.ColoredBall(2, 1) for _ in range(3)] + [balls.ColoredBall(3, 1)]
+        stack += [balls.ColoredBall(2, 1) for _ in range(2)] + [balls.ColoredBall(4, 1)]
+        for ball in stack:
+            the_playfield.add_on_top(ball, 2)
+        self.assertEqual([], the_playfield.colorindex.long_runs(2))
+        self.assertFalse(the_playfield.check_combining())
+
+        the_playfield.recolor_ball_at((2, 4), 2)
+        self.assertEqual([(0, 6)], the_playfield.colorindex.long_runs(2))
+        self.assertTrue(the_playfield.check_combining())
+        self.assertEqual(6, stack[0].getweight())
+        self.assertEqual([stack[0]], the_playfield.stacks[1].stackleft)
+        self.assertIs(stack[-1], game.ongoing.get_event_of_type(game.ongoing.FallingBall).getball())
+        self.assertEqual(6, game.ongoing.get_event_of_type(game.ongoing.Combining).length)
+
+    def test_headroom(self):
+        """The free height per column follows every added and removed Ball. Too many Balls
+        on a resting seesaw end the game"""
+        game.reset()
+        the_playfield = game.playfield
+
+        for i in range(6):
+            the_playfield.add_on_top(balls.ColoredBall(i % 2, 1), 2)
+        self.assertEqual([2], the_playfield.columns_at_risk(margin=1))
+        self.assertEqual([], the_playfield.columns_at_risk())
+        the_playfield.add_on_top(balls.ColoredBall(2, 1), 2)
+        self.assertEqual([2], the_playfield.columns_at_risk())
+        self.assertTrue(the_playfield.check_alive())
+
+        the_playfield.add_on_top(balls.ColoredBall(3, 1), 2)
+        self.assertFalse(the_playfield.check_alive())
+        the_playfield.remove_ball_at((2, 8))
+        self.assertTrue(the_playfield.check_alive())
+
+        # tilting towards the stack gives it more room
+        the_playfield.add_on_top(balls.ColoredBall(3, 1), 2)
+        the_playfield.refresh_status()
+        self.assertTrue(the_playfield.stacks[1].ismoving())
+        self.assertTrue(the_playfield.check_alive())
+        game.run_until_settled(1000)
+        self.assertTrue(the_playfield.alive)
+        self.assertEqual(0, the_playfield.headroom.free[2])
+
+    def test_large_board(self):
+        """A board of 16 seesaws and 16 rows finds Scorings in its far corner and is lost
+        only when its own top is reached"""
+        import playfield
+
+        the_playfield = playfield.Playfield(constants.playfieldsize, seesaws=16, rows=16)
+        self.assertEqual(32, the_playfield.columns)
+        self.assertEqual(32 * 18, len(the_playfield.get_grid()))
+        for x in (29, 30, 31):
+            for _ in range(13):
+                the_playfield.add_on_top(balls.ColoredBall(x % 2 + 2, 1), x)
+        self.assertTrue(the_playfield.check_alive())
+        self.assertEqual([], the_playfield.columns_at_risk())
+
+        game.ongoing.reset()
+        saved = game.playfield
+        game.playfield = the_playfield
+        try:
+            for x in (29, 30, 31):
+                the_playfield.add_on_top(balls.ColoredBall(1, 1), x)
+            self.assertTrue(the_playfield.check_Scoring_full())
+            the_scoring = game.ongoing.get_event_of_type(game.ongoing.Scoring)
+            self.assertEqual([the_playfield.tables.cell(30, 14)], the_scoring.next)
+        finally:
+            game.playfield = saved
+            game.ongoing.reset()
+
+        # the screen layout is made for the configured board only
+        with self.assertRaises(ValueError):
+            the_playfield.draw()
+
+    def test_batched_removal(self):
+        """Remove two balls of a stack at once, by position mask and by identity. The
+        balls above are returned as separate segments if there is a gap between them"""
+        from playfield import Seesaw
+
+        sesa = Seesaw(0)
+        stack = [balls.ColoredBall(1, 1) for _ in range(5)]
+        for ball in stack:
+            sesa.add_on_top(ball, True)
+
+        # balanced seesaw, stack index i is at height i+1
+        segments = sesa.remove_balls(leftmask=(1 << 2) | (1 << 4))
+        self.assertEqual(sesa.stackleft, [stack[0]])
+        self.assertEqual(segments, [(0, 3.0, [stack[2]]), (0, 5.0, [stack[4]])])
+
+        for ball in stack[1:]:
+            sesa.add_on_top(ball, True)
+        segments = sesa.remove_balls({id(stack[0])})
+        self.assertEqual(sesa.stackleft, [])
+        self.assertEqual(segments, [(0, 2.0, stack[1:])])
+
     # Test all outcomes of refresh_status
     def test_refresh_status(self):
         game.reset()
@@ -103,22 +251,21 @@ class TestPlayfield(unittest.TestCase):
         self.assertIsInstance(game.ongoing.get_newest_event(), game.ongoing.Scoring)
         self.assertTrue(wait_for_empty_eventQueue(4*constants.scoring_delay))
 
-        # Combining. Skipped for now. TODO
-        if False:
-            # land 5 equal balls in column 4, they should combine
-            for i in range(5):
-                Testball4 = balls.generate_starting_ball()
-                Testball4.setcolor(2)
-                Testball4.setweight(3)
-                the_playfield.land_ball_in_column(Testball4, 4)
-            game.tick()
-            self.assertIsInstance(game.ongoing.get_newest_event(), game.ongoing.Combining)
-            self.assertTrue(wait_for_empty_eventQueue(constants.combining_totaltime * constants.max_FPS))
-            # The resulting ball should be at position (4,2), color=2, weight=15
-            resulting_ball = the_playfield.get_ball_at((4,2))
-            self.assertIsInstance(resulting_ball, balls.ColoredBall)
-            self.assertEqual(resulting_ball.getcolor(), 2)
-            self.assertEqual(resulting_ball.getweight(), 15)
+        # Combining
+        # land 5 equal balls in column 4, they should combine
+        for i in range(5):
+            Testball4 = balls.generate_starting_ball()
+            Testball4.setcolor(2)
+            Testball4.setweight(3)
+            the_playfield.land_ball_in_column(Testball4, 4)
+        game.tick()
+        self.assertIsInstance(game.ongoing.get_newest_event(), game.ongoing.Combining)
+        self.assertTrue(wait_for_empty_eventQueue(constants.combining_numticks + 1))
+        # The resulting ball should be at position (4,2), color=2, weight=15
+        resulting_ball = the_playfield.get_ball_at((4,2))
+        self.assertIsInstance(resulting_ball, balls.ColoredBall)
+        self.assertEqual(resulting_ball.getcolor(), 2)
+        self.assertEqual(resulting_ball.getweight(), 15)
 
         # Hanging Balls
         game.reset()
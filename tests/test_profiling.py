@@ -0,0 +1,79 @@
+# tests the profiling module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import game
+import profiling
+from balls import ColoredBall, Bomb
+import unittest
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_capture_state(self):
+        game.reset()
+        game.playfield.add_on_top(ColoredBall(2, 3), 0)
+        game.playfield.add_on_top(Bomb(), 3)
+        game.crane.drop_ball()
+        state = profiling.capture_state()
+        json.dumps(state)
+
+        self.assertEqual(["ColoredBall(2,3)"], state["seesaws"][0]["left"])
+        self.assertEqual(["Bomb"], state["seesaws"][1]["right"])
+        self.assertEqual({"FallingBall": 1}, state["events"])
+        self.assertEqual(game.playfield.snapshot().hex(), state["snapshot"])
+        game.reset()
+
+    def test_profile_capture(self):
+        capture = profiling.ProfileCapture(self.folder)
+        self.assertIsNone(capture.toggle())
+        game.reset()
+        game.run_until_settled(10)
+        path = capture.toggle()
+        self.assertFalse(capture.running())
+        self.assertTrue(path.endswith(".pstats"))
+        stats = pstats.Stats(path)
+        self.assertTrue(any(name == "run_until_settled" for _, _, name in stats.stats))
+
+    def test_watchdog(self):
+        """A slow frame is reported with a stack sample taken while it was running, fast
+        frames are not reported"""
+        game.reset()
+        watchdog = profiling.SlowFrameWatchdog(0.02, self.folder)
+        try:
+            watchdog.frame_started()
+            self.assertIsNone(watchdog.frame_finished())
+
+            def slow_stage():
+                time.sleep(0.1)
+
+            watchdog.frame_started()
+            slow_stage()
+            path = watchdog.frame_finished()
+        finally:
+            watchdog.stop()
+
+        with open(path) as f:
+            report = json.load(f)
+        self.assertGreater(report["duration"], 0.02)
+        self.assertIn("slow_stage", "".join(report["stack_sample"]))
+        self.assertEqual(game.level, report["state"]["level"])
+        self.assertEqual([path], watchdog.reports)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# tests the settlecache module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import game
+from settlecache import SettleCache, SettledOutcome, DiskStore, resolve_drop, state_key
+from balls import ColoredBall
+import unittest, tempfile, os
+
+
+class TestSettleCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        """Insert three outcomes into a cache of size two. The least recently used one must be evicted"""
+        cache = SettleCache(maxsize=2)
+        outcome = SettledOutcome((), 0, 1.0, True)
+        cache.put(b"a", outcome)
+        cache.put(b"b", outcome)
+        # touch a, so b is the least recently used
+        self.assertIs(cache.get(b"a"), outcome)
+        cache.put(b"c", outcome)
+
+        self.assertEqual(2, len(cache))
+        self.assertIn(b"a", cache)
+        self.assertNotIn(b"b", cache)
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_disk_store_is_shared(self):
+        """Two caches on the same directory, what one of them stores the other one finds"""
+        with tempfile.TemporaryDirectory() as path:
+            writer = SettleCache(store=DiskStore(path))
+            reader = SettleCache(store=DiskStore(path))
+            writer.put(b"key", SettledOutcome(("state",), 12, 1.1, False))
+
+            self.assertEqual(SettledOutcome(("state",), 12, 1.1, False), reader.get(b"key"))
+            self.assertEqual(1, reader.hits)
+
+    def test_disk_store_is_bounded(self):
+        """A full store removes its oldest files"""
+        with tempfile.TemporaryDirectory() as path:
+            store = DiskStore(path, maxfiles=10)
+            for i in range(11):
+                store.put(bytes([i]), SettledOutcome(b"", i, 1.0, True))
+            self.assertEqual(9, len(os.listdir(path)))
+            self.assertEqual(9, store.files)
+
+    def test_key_depends_on_rows(self):
+        """The same stacks on a board with more rows are a different state"""
+        import playfield
+        from constants import playfieldsize
+
+        game.reset()
+        ball = ColoredBall(1, 2)
+        key = state_key(ball, 3)
+        standard = game.playfield
+        game.playfield = playfield.Playfield(playfieldsize, standard.seesaws, standard.rows + 2)
+        try:
+            self.assertEqual(standard.snapshot(), game.playfield.snapshot())
+            self.assertNotEqual(key, state_key(ball, 3))
+        finally:
+            game.playfield = standard
+
+    def test_cached_drop_equals_simulated_drop(self):
+        """Drop the same ball into the same state twice, once simulated and once from the cache.
+        Both must end in the same Playfield and score"""
+        cache = SettleCache()
+
+        game.reset()
+        ColoredBall(1, 2).lands_on_empty((2, 1))
+        game.playfield.refresh_status()
+        game.run_until_settled(1000)
+        start = game.playfield.snapshot()
+
+        simulated = resolve_drop(ColoredBall(2, 3), 3, cache)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(simulated.state, game.playfield.snapshot())
+
+        game.playfield.restore(start)
+        cached = resolve_drop(ColoredBall(2, 3), 3, cache)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(simulated, cached)
+        self.assertEqual(simulated.state, game.playfield.snapshot())
+
+    def test_drop_needs_settled_game(self):
+        game.reset()
+        game.ongoing.drop_ball_in_column(ColoredBall(1, 1), 0)
+        with self.assertRaises(ValueError):
+            resolve_drop(ColoredBall(1, 1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# tests the tracing module
+
+import sys
+
+sys.path.append("S:/SwingSelfmade/")
+
+import json
+import os
+import tempfile
+import game
+import ongoing
+import playfield
+import tracing
+from balls import ColoredBall, Bomb
+import unittest
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+
+    def tearDown(self):
+        tracing.uninstall()
+        os.remove(self.path)
+
+    def test_trace_of_a_bomb(self):
+        """A Bomb landing on a Ball shows up as spans of the events, the explosion and the
+        checks, the file is valid trace-event JSON"""
+        original_tick = playfield.Playfield.tick
+        game.reset()
+        tracer = tracing.start(self.path)
+        game.playfield.add_on_top(ColoredBall(1, 1), 0)
+        game.playfield.add_on_top(ColoredBall(1, 1), 1)
+        ongoing.add_event(ongoing.FallingBall(Bomb(), 0))
+        game.run_until_settled(1000)
+        game.playfield.draw()
+        tracer.close()
+        tracing.uninstall()
+        game.reset()
+
+        self.assertIs(original_tick, playfield.Playfield.tick)
+        with open(self.path) as f:
+            events = json.load(f)
+        names = {event["name"] for event in events}
+        for name in ["game.tick", "ongoing.tick", "FallingBall.tick", "Explosion.tick",
+                     "Playfield.trigger_explosion", "Playfield.refresh_status",
+                     "Playfield.draw", "eventQueue"]:
+            self.assertIn(name, names)
+        span = next(event for event in events if event["name"] == "game.tick")
+        self.assertEqual("X", span["ph"])
+        self.assertGreaterEqual(span["dur"], 0)
+        self.assertEqual(0, tracer.dropped)
+
+    def test_trace_of_main_loop(self):
+        """The frames of the main loop have a game.tick span around its Playfield.tick and
+        ongoing.tick spans"""
+        import SelfSwing_main
+
+        game.reset()
+        tracer = tracing.start(self.path)
+        for _ in range(3):
+            SelfSwing_main.update_game()
+        tracer.close()
+        tracing.uninstall()
+        game.reset()
+
+        with open(self.path) as f:
+            events = json.load(f)
+        spans = {name: [event for event in events if event["name"] == name]
+                 for name in ("game.tick", "Playfield.tick", "ongoing.tick")}
+        for name, found in spans.items():
+            self.assertEqual(3, len(found), name)
+        outer = spans["game.tick"][0]
+        for name in ("Playfield.tick", "ongoing.tick"):
+            inner = spans[name][0]
+            self.assertLessEqual(outer["ts"], inner["ts"])
+            # float microseconds, allow for rounding
+            self.assertLessEqual(inner["ts"] + inner["dur"], outer["ts"] + outer["dur"] + 0.01)
+
+    def test_full_buffer_drops_oldest(self):
+        tracer = tracing.Tracer(self.path, capacity=3, flush_interval=60)
+        for i in range(5):
+            tracer.complete(str(i), "test", 0.0, 0.0)
+        tracer.close()
+        with open(self.path) as f:
+            self.assertEqual(["2", "3", "4"], [event["name"] for event in json.load(f)])
+        self.assertEqual(2, tracer.dropped)
+
+    def test_install_twice(self):
+        tracer = tracing.Tracer(self.path)
+        tracing.install(tracer)
+        with self.assertRaises(RuntimeError):
+            tracing.install(tracer)
+        tracer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,44 @@
 # contains some code used several times in tests.
+# Tests run against a virtual clock: waiting jumps over the ticks in which Balls only fall
+# and seesaws only tilt (game.fast_forward()), with the same result as ticking through them.
+# GameTestCase starts every test from a fresh game, so the tests do not depend on each other
+# and the suite can be split over parallel worker processes, e.g. pytest -n auto (pytest-xdist).
 
 import sys
 sys.path.append("S:/SwingSelfmade/")
 
+import random
+import unittest
 
-import game, ongoing
+import balls, game, ongoing
 
 
 def wait_for_empty_eq(maxticks: int):
     """performs tick()s until nothing is happening any more.
-    Parameter is the maximum number of ticks. Return False if 
+    Parameter is the maximum number of ticks. Return False if
     after that many ticks, something is still going on"""
-    for i in range(maxticks-1):
-        game.tick()
-        if (ongoing.get_number_of_events() == 0 and
-           not game.playfield.any_seesaw_is_moving()):
-           return True
-    
-    return False
\ No newline at end of file
+    try:
+        game.run_until_settled(maxticks - 1, skip_idle=True)
+    except RuntimeError:
+        return False
+    return True
+
+
+def fresh_game(seed: int = None):
+    """Puts the game into the state of a new game: game.reset(), not headless, a new upcoming
+    special. With a seed, the Balls the game generates are always the same."""
+    if seed is not None:
+        random.seed(seed)
+    ongoing.headless = False
+    game.reset()
+    balls.regenerate_nextspecial()
+
+
+class GameTestCase(unittest.TestCase):
+    """TestCase whose tests each start from a fresh game, see fresh_game().
+    Set seed in a subclass for seeded games."""
+
+    seed = None
+
+    def setUp(self):
+        fresh_game(self.seed)
@@ -0,0 +1,193 @@
+# provides an opt-in tracer that writes Chrome trace-event JSON, to be opened in
+# chrome://tracing or https://ui.perfetto.dev. install() wraps the interesting functions
+# and methods of the game, every call becomes a span. Spans are collected in a ring buffer
+# and written to the file by a background thread, so the game loop never waits for the disk.
+# Set SWING_TRACE=<file> to trace a game started with SelfSwing_main.py.
+
+# shorts:
+# - start(path) creates a Tracer writing to path and installs it, close() it at the end
+# - Tracer.complete(...) / Tracer.counter(...) record one event
+# - install(tracer) / uninstall() wrap resp. restore the traced functions and methods
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+import crane
+import depot
+import game
+import ongoing
+import playfield
+import scoreArea
+
+# wrapped functions and methods, as (owner, attribute name, original), for uninstall()
+_installed = []
+
+
+class Tracer:
+    """Collects trace events and streams them to a file as a JSON array. If the writer
+    thread falls behind by more than capacity events, the oldest are dropped. Vars:
+        path (str), file the trace is written to
+        dropped (int), number of events lost because the buffer was full
+    Constructor: Tracer(path, capacity=100000, flush_interval=0.2). The writer thread starts
+        right away, call close() to write the rest and end the file.
+    """
+
+    __slots__ = ("path", "capacity", "buffer", "dropped", "flush_interval", "origin", "pid",
+                 "file", "first", "stop_event", "thread")
+
+    def __init__(self, path: str, capacity: int = 100000, flush_interval: float = 0.2):
+        self.path = path
+        self.capacity = capacity
+        self.buffer = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.flush_interval = flush_interval
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.file = open(path, "w")
+        self.file.write("[\n")
+        self.first = True
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+        self.thread.start()
+
+    def _append(self, event: dict):
+        if len(self.buffer) == self.capacity:
+            self.dropped += 1
+        self.buffer.append(event)
+
+    def microseconds(self, perf_time: float):
+        """Trace timestamp of a time.perf_counter() value"""
+        return (perf_time - self.origin) * 1e6
+
+    def complete(self, name: str, category: str, begin: float, end: float, args: dict = None):
+        """Span from begin to end, both time.perf_counter() values"""
+        event = {"name": name, "cat": category, "ph": "X", "ts": self.microseconds(begin),
+                 "dur": (end - begin) * 1e6, "pid": self.pid, "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def counter(self, name: str, values: dict):
+        """Values of a counter track at the current time"""
+        self._append({"name": name, "ph": "C", "ts": self.microseconds(time.perf_counter()),
+                      "pid": self.pid, "args": values})
+
+    def flush(self):
+        """Writes all buffered events. Called by the writer thread"""
+        lines = []
+        while self.buffer:
+            lines.append(json.dumps(self.buffer.popleft()))
+        if not lines:
+            return
+        if not self.first:
+            self.file.write(",\n")
+        self.first = False
+        self.file.write(",\n".join(lines))
+        self.file.flush()
+
+    def _write_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stops the writer thread, writes the remaining events and ends the file"""
+        if self.file.closed:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.flush()
+        self.file.write("\n]\n")
+        self.file.close()
+
+
+def _wrap(tracer: Tracer, owner, attribute: str, name: str, category: str):
+    original = getattr(owner, attribute)
+
+    @functools.wraps(original)
+    def traced(*args, **kwargs):
+        begin = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            tracer.complete(name, category, begin, time.perf_counter())
+
+    setattr(owner, attribute, traced)
+    _installed.append((owner, attribute, original))
+
+
+def _wrap_resume(tracer: Tracer):
+    """Every step of an ongoing event becomes a span named after its class"""
+    original = ongoing.resume
+
+    @functools.wraps(original)
+    def traced(event, routine):
+        begin = time.perf_counter()
+        try:
+            return original(event, routine)
+        finally:
+            tracer.complete(type(event).__name__ + ".tick", "ongoing", begin, time.perf_counter())
+
+    ongoing.resume = traced
+    _installed.append((ongoing, "resume", original))
+
+
+def _wrap_ongoing_tick(tracer: Tracer):
+    """ongoing.tick() as span, followed by the length of the eventQueue as counter"""
+    original = ongoing.tick
+
+    @functools.wraps(original)
+    def traced():
+        begin = time.perf_counter()
+        try:
+            return original()
+        finally:
+            tracer.complete("ongoing.tick", "tick", begin, time.perf_counter())
+            tracer.counter("eventQueue", {"events": ongoing.get_number_of_events()})
+
+    ongoing.tick = traced
+    _installed.append((ongoing, "tick", original))
+
+
+def _ongoing_classes():
+    pending = [ongoing.Ongoing]
+    while pending:
+        cls = pending.pop()
+        yield cls
+        pending.extend(cls.__subclasses__())
+
+
+def install(tracer: Tracer):
+    """Wraps the traced functions and methods so that every call is recorded by tracer.
+    Raises RuntimeError if a tracer is installed already"""
+    if _installed:
+        raise RuntimeError("A tracer is installed already, uninstall() it first")
+    _wrap(tracer, game, "tick", "game.tick", "tick")
+    _wrap(tracer, playfield.Playfield, "tick", "Playfield.tick", "tick")
+    _wrap_ongoing_tick(tracer)
+    _wrap_resume(tracer)
+    for cls in _ongoing_classes():
+        if "draw" in cls.__dict__:
+            _wrap(tracer, cls, "draw", cls.__name__ + ".draw", "draw")
+    for method in ("refresh_status", "gravity_moves", "check_Scoring_full", "check_combining"):
+        _wrap(tracer, playfield.Playfield, method, "Playfield." + method, "engine")
+    _wrap(tracer, playfield.Playfield, "trigger_explosion", "Playfield.trigger_explosion", "engine")
+    for cls in (depot.Depot, crane.Crane, playfield.Playfield, scoreArea.ScoreArea):
+        _wrap(tracer, cls, "draw", cls.__name__ + ".draw", "draw")
+
+
+def uninstall():
+    """Restores all wrapped functions and methods"""
+    while _installed:
+        owner, attribute, original = _installed.pop()
+        setattr(owner, attribute, original)
+
+
+def start(path: str, capacity: int = 100000):
+    """Creates a Tracer writing to path and installs it. Returns the Tracer"""
+    tracer = Tracer(path, capacity)
+    install(tracer)
+    return tracer